@@ -0,0 +1,74 @@
+"""Binarny format punktów kontrolnych symulacji.
+
+Plik punktu kontrolnego ma postać:
+- nagłówek (`MAGIC`, wersja formatu, znaczniki),
+- ładunek: pickle (protokół 5) stanu obiektu, opcjonalnie skompresowany zlib.
+
+Kolumny NumPy (zgłoszenia, akumulatory) zapisywane są przez pickle jako
+surowe bufory, więc zapis i odczyt są szybkie, a kompresja (szybki
+poziom 1) dobrze zmniejsza kolumny zawierające zera. Strumienie losowe
+zapisują tylko stan generatora i pozycję w bieżącym bloku, a historia
+kolejek – tylko na życzenie (`TicketSimulation.checkpoint_history`).
+Zapis do pliku jest atomowy: dane trafiają najpierw do pliku tymczasowego,
+który następnie zastępuje docelowy.
+"""
+
+from __future__ import annotations
+
+import os
+import pickle
+import struct
+import zlib
+from typing import Any, Type, TypeVar
+
+
+MAGIC = b"BCMPCKP1"
+FORMAT_VERSION = 3
+FLAG_COMPRESSED = 1
+_HEADER = struct.Struct("<8sII")  # magic, wersja, znaczniki
+
+T = TypeVar("T")
+
+
+def dumps(state: Any, compress: bool = True) -> bytes:
+    payload = pickle.dumps(state, protocol=5)
+    flags = 0
+    if compress:
+        payload = zlib.compress(payload, 1)
+        flags |= FLAG_COMPRESSED
+    return _HEADER.pack(MAGIC, FORMAT_VERSION, flags) + payload
+
+
+def loads(data: bytes, expected_type: Type[T]) -> T:
+    if len(data) < _HEADER.size:
+        raise ValueError("Dane są zbyt krótkie, aby były punktem kontrolnym")
+    magic, version, flags = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Dane nie są punktem kontrolnym symulacji")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Nieobsługiwana wersja punktu kontrolnego: {version}")
+
+    payload = memoryview(data)[_HEADER.size :]
+    if flags & FLAG_COMPRESSED:
+        payload = zlib.decompress(payload)
+    state = pickle.loads(payload)
+    if not isinstance(state, expected_type):
+        raise ValueError(f"Punkt kontrolny zawiera {type(state).__name__}, oczekiwano {expected_type.__name__}")
+    return state
+
+
+def save(path: str | os.PathLike, state: Any, compress: bool = True) -> None:
+    """Zapisuje punkt kontrolny atomowo (przerwanie zapisu nie psuje poprzedniego pliku)."""
+
+    path = os.fspath(path)
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as handle:
+        handle.write(dumps(state, compress))
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temporary, path)
+
+
+def load(path: str | os.PathLike, expected_type: Type[T]) -> T:
+    with open(path, "rb") as handle:
+        return loads(handle.read(), expected_type)
@@ -0,0 +1,143 @@
+"""Porównanie wariantów sieci metodą wspólnych liczb losowych (CRN).
+
+Każda replikacja uruchamiana jest z tym samym ziarnem dla wszystkich
+wariantów. Strumienie `RandomStreams` są wyprowadzane z ziarna oraz nazw
+węzła i klasy, więc k-ty czas obsługi (i k-ty wybór trasy) danej klasy
+w danym węźle pochodzi w każdym wariancie z tej samej liczby losowej.
+Różnice metryk liczone są parami (wariant − wariant bazowy) w obrębie
+replikacji, dzięki czemu szum wspólny dla wariantów się znosi, a przedział
+ufności różnicy jest znacznie węższy niż przy niezależnych przebiegach.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field, fields
+from typing import Dict, List
+
+from bcmp.config_schema import NetworkConfig
+from bcmp.metrics import NodePerformanceSummary
+from bcmp.replications import execute_replications, replication_seeds
+from bcmp.stats import mean_confidence_interval
+
+
+@dataclass
+class ComparisonResults:
+    """Wyniki porównania wariantów.
+
+    Atrybuty:
+    - `baseline`: nazwa wariantu odniesienia,
+    - `means`: {wariant: {węzeł: średnie metryki}},
+    - `differences`: {wariant: {węzeł: średnia różnica względem bazowego}},
+    - `half_widths`: połowy szerokości przedziałów ufności tych różnic,
+    - `samples`: {wariant: wyniki kolejnych replikacji}.
+    """
+
+    baseline: str
+    replications: int
+    confidence: float
+    means: Dict[str, Dict[str, NodePerformanceSummary]] = field(default_factory=dict)
+    differences: Dict[str, Dict[str, NodePerformanceSummary]] = field(default_factory=dict)
+    half_widths: Dict[str, Dict[str, NodePerformanceSummary]] = field(default_factory=dict)
+    samples: Dict[str, List[Dict[str, NodePerformanceSummary]]] = field(default_factory=dict)
+
+
+def _field_values(
+    samples: List[Dict[str, NodePerformanceSummary]], node_id: str, name: str
+) -> List[float]:
+    return [float(getattr(sample[node_id], name)) for sample in samples]
+
+
+def summarize_comparison(
+    samples: Dict[str, List[Dict[str, NodePerformanceSummary]]],
+    baseline: str,
+    confidence: float = 0.95,
+) -> ComparisonResults:
+    """Liczy średnie wariantów i sparowane przedziały ufności różnic."""
+
+    replications = len(samples[baseline])
+    results = ComparisonResults(
+        baseline=baseline, replications=replications, confidence=confidence, samples=samples
+    )
+    if replications == 0:
+        return results
+
+    common_nodes = [
+        node_id
+        for node_id in samples[baseline][0]
+        if all(node_id in variant_samples[0] for variant_samples in samples.values())
+    ]
+    names = [summary_field.name for summary_field in fields(NodePerformanceSummary)]
+
+    for variant, variant_samples in samples.items():
+        results.means[variant] = {
+            node_id: NodePerformanceSummary(
+                **{
+                    name: mean_confidence_interval(_field_values(variant_samples, node_id, name), confidence)[0]
+                    for name in names
+                }
+            )
+            for node_id in variant_samples[0]
+        }
+        if variant == baseline:
+            continue
+
+        differences: Dict[str, NodePerformanceSummary] = {}
+        half_widths: Dict[str, NodePerformanceSummary] = {}
+        for node_id in common_nodes:
+            means = {}
+            widths = {}
+            for name in names:
+                paired = [
+                    value - reference
+                    for value, reference in zip(
+                        _field_values(variant_samples, node_id, name),
+                        _field_values(samples[baseline], node_id, name),
+                    )
+                ]
+                means[name], widths[name] = mean_confidence_interval(paired, confidence)
+            differences[node_id] = NodePerformanceSummary(**means)
+            half_widths[node_id] = NodePerformanceSummary(**widths)
+        results.differences[variant] = differences
+        results.half_widths[variant] = half_widths
+
+    return results
+
+
+def run_comparison(
+    variants: Dict[str, NetworkConfig],
+    replications: int = 10,
+    *,
+    baseline: str | None = None,
+    duration: float = 600.0,
+    warmup: float = 60.0,
+    time_step: float = 0.1,
+    seed: int | None = None,
+    confidence: float = 0.95,
+    max_workers: int | None = None,
+) -> ComparisonResults:
+    """Uruchamia sparowane replikacje wariantów ze wspólnymi liczbami losowymi.
+
+    `baseline` to nazwa wariantu odniesienia (domyślnie pierwszy w słowniku).
+    Wszystkie przebiegi (warianty × replikacje) trafiają do jednej puli procesów.
+    """
+
+    if len(variants) < 2:
+        raise ValueError("Porównanie wymaga co najmniej dwóch wariantów")
+    if replications < 2:
+        raise ValueError("Porównanie sparowane wymaga co najmniej dwóch replikacji")
+
+    names = list(variants)
+    baseline = names[0] if baseline is None else baseline
+    if baseline not in variants:
+        raise ValueError(f"Nieznany wariant bazowy: {baseline}")
+
+    seeds = replication_seeds(seed, replications)
+    tasks = [(variants[name], replication_seed) for name in names for replication_seed in seeds]
+    results = execute_replications(
+        tasks, duration=duration, warmup=warmup, time_step=time_step, max_workers=max_workers
+    )
+
+    samples = {
+        name: results[index * replications : (index + 1) * replications] for index, name in enumerate(names)
+    }
+    return summarize_comparison(samples, baseline, confidence)
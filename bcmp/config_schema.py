@@ -8,11 +8,45 @@ Ten moduł ma zawierać *czyste dane* opisujące model:
 - parametry obsługi w węzłach.
 """
 
-from dataclasses import dataclass
-from typing import Dict, List, Literal, Optional
+from dataclasses import dataclass, field
+from typing import Dict, List, Literal, Optional, Tuple
 
 
 NodeType = Literal["FCFS", "PS", "IS", "LCFS_PR"]
+SchedulingPolicy = Literal["FIFO", "PRIORITY", "PRIORITY_PR"]
+DistributionKind = Literal["EXP", "DET", "ERLANG", "HYPEREXP", "LOGNORMAL", "PH"]
+
+
+@dataclass(frozen=True)
+class ServiceDistribution:
+    """Rozkład czasu obsługi używany przez symulację (SUM zakłada rozkład wykładniczy).
+
+    Rozkład opisuje wyłącznie *kształt* – jest normalizowany do średniej 1,
+    a czas obsługi to wartość z rozkładu podzielona przez μ z
+    `service_rates_per_class`. Średnie pozostają więc zgodne z modelem SUM,
+    zmienia się jedynie zmienność.
+
+    Atrybuty:
+    - `kind`: "EXP" (wykładniczy), "DET" (deterministyczny), "ERLANG"
+      (Erlang-k, cv² = 1/k), "HYPEREXP" (hiperwykładniczy H2, cv >= 1),
+      "LOGNORMAL" (logarytmiczno-normalny) lub "PH" (fazowy).
+    - `k`: liczba faz rozkładu Erlanga.
+    - `cv`: współczynnik zmienności dla "HYPEREXP" i "LOGNORMAL".
+    - `initial`: wektor początkowy α rozkładu fazowego.
+    - `generator`: podgenerator T rozkładu fazowego (wiersze macierzy).
+    """
+
+    kind: DistributionKind = "EXP"
+    k: int = 1
+    cv: float = 1.0
+    initial: Tuple[float, ...] = ()
+    generator: Tuple[Tuple[float, ...], ...] = ()
+
+    def __post_init__(self) -> None:
+        # Parametry PH wczytane z JSON-a są listami – krotki zachowują
+        # haszowalność wymaganą przez pamięć podręczną generatorów.
+        object.__setattr__(self, "initial", tuple(float(value) for value in self.initial))
+        object.__setattr__(self, "generator", tuple(tuple(float(value) for value in row) for row in self.generator))
 
 
 @dataclass
@@ -26,8 +60,12 @@ class ServiceCenterConfig:
     - `servers`: liczba serwerów (dla IS można traktować jako None lub bardzo dużą liczbę).
     - `service_rates_per_class`: słownik {class_id: mu_i^(k)} – intensywności obsługi
       dla danej klasy w tym węźle.
-
-    Można dodać inne parametry (np. priorytety), jeśli zajdzie potrzeba.
+    - `scheduling`: dyscyplina wyboru z kolejki w symulacji – "FIFO" (domyślnie),
+      "PRIORITY" (priorytety bez wywłaszczania) lub "PRIORITY_PR" (priorytety
+      z wywłaszczaniem i wznowieniem obsługi). Priorytet pochodzi z
+      `ClassConfig.priority` (mniejsza liczba = wyższy priorytet).
+    - `service_distributions`: słownik {class_id: ServiceDistribution} – kształt
+      rozkładu czasu obsługi w symulacji; klasy bez wpisu mają rozkład wykładniczy.
     """
 
     id: str
@@ -35,6 +73,8 @@ class ServiceCenterConfig:
     node_type: NodeType
     servers: Optional[int]
     service_rates_per_class: Dict[str, float]
+    scheduling: SchedulingPolicy = "FIFO"
+    service_distributions: Dict[str, ServiceDistribution] = field(default_factory=dict)
 
 
 @dataclass
@@ -45,7 +85,9 @@ class ClassConfig:
     - `id`: unikalny identyfikator klasy (np. "P1", "P2", "P3", "P4").
     - `name`: czytelna nazwa klasy (np. "Awaria krytyczna").
     - `population`: liczba klientów tej klasy w systemie (sieć zamknięta).
-    - `priority`: opcjonalna informacja o priorytecie (do wykorzystania w analizie).
+    - `priority`: opcjonalny priorytet (1 = najwyższy); wykorzystywany przez
+      symulację w węzłach z dyscypliną priorytetową, klasy bez priorytetu
+      obsługiwane są na końcu.
 
     UWAGA: klasa klienta jest **stała** – klient nie zmienia przynależności do klasy
     podczas przejścia przez sieć.
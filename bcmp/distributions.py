@@ -0,0 +1,160 @@
+"""Wektorowe generatory czasów obsługi o rozkładach innych niż wykładniczy.
+
+Każdy rozkład `ServiceDistribution` zamieniany jest na funkcję
+`(generator, size) -> ndarray` zwracającą od razu cały blok wartości
+o średniej 1 – tak jak oczekuje `RandomStreams`. Funkcje są zapamiętywane
+per rozkład, więc strumień symulacji nie traci bufora przy kolejnych
+wywołaniach.
+"""
+
+from __future__ import annotations
+
+import math
+from functools import lru_cache
+
+import numpy as np
+
+from bcmp.config_schema import ServiceDistribution
+from bcmp.random_streams import Sampler
+
+
+def _exponential(generator: np.random.Generator, size: int) -> np.ndarray:
+    return generator.standard_exponential(size)
+
+
+def _deterministic(generator: np.random.Generator, size: int) -> np.ndarray:
+    return np.ones(size)
+
+
+def _erlang(k: int) -> Sampler:
+    if k < 1:
+        raise ValueError("Liczba faz rozkładu Erlanga musi być >= 1")
+
+    def sample(generator: np.random.Generator, size: int) -> np.ndarray:
+        return generator.gamma(k, 1.0 / k, size)
+
+    return sample
+
+
+def _hyperexponential(cv: float) -> Sampler:
+    """Rozkład H2 o zrównoważonych średnich faz (p₁/λ₁ = p₂/λ₂)."""
+
+    if cv < 1.0:
+        raise ValueError("Rozkład hiperwykładniczy wymaga cv >= 1")
+
+    cv2 = cv * cv
+    p1 = 0.5 * (1.0 + math.sqrt((cv2 - 1.0) / (cv2 + 1.0)))
+    rate1, rate2 = 2.0 * p1, 2.0 * (1.0 - p1)
+
+    def sample(generator: np.random.Generator, size: int) -> np.ndarray:
+        first = generator.random(size) < p1
+        return generator.standard_exponential(size) / np.where(first, rate1, rate2)
+
+    return sample
+
+
+def _lognormal(cv: float) -> Sampler:
+    if cv <= 0:
+        raise ValueError("Współczynnik zmienności rozkładu log-normalnego musi być dodatni")
+
+    sigma2 = math.log1p(cv * cv)
+    mu, sigma = -0.5 * sigma2, math.sqrt(sigma2)
+
+    def sample(generator: np.random.Generator, size: int) -> np.ndarray:
+        return generator.lognormal(mu, sigma, size)
+
+    return sample
+
+
+def _phase_type(initial: tuple, generator_rows: tuple) -> Sampler:
+    """Rozkład fazowy (α, T) symulowany równolegle dla całego bloku.
+
+    Każda próbka to droga łańcucha Markowa aż do pochłonięcia; w jednej
+    iteracji pętli wszystkie jeszcze aktywne próbki wykonują jeden skok.
+    """
+
+    alpha = np.asarray(initial, dtype=np.float64)
+    matrix = np.asarray(generator_rows, dtype=np.float64)
+    phases = alpha.shape[0]
+    if phases == 0 or matrix.shape != (phases, phases):
+        raise ValueError("Rozkład fazowy wymaga wektora α i kwadratowej macierzy T tego samego rozmiaru")
+    if np.any(alpha < 0) or alpha.sum() > 1.0 + 1e-9:
+        raise ValueError("Wektor początkowy α musi być rozkładem prawdopodobieństwa")
+
+    exit_rates = -matrix.sum(axis=1)
+    holding_rates = -np.diag(matrix)
+    off_diagonal = matrix - np.diag(np.diag(matrix))
+    if np.any(holding_rates <= 0) or np.any(off_diagonal < 0) or np.any(exit_rates < -1e-9):
+        raise ValueError("Macierz T nie jest poprawnym podgeneratorem rozkładu fazowego")
+
+    try:
+        mean = float(alpha @ np.linalg.solve(-matrix, np.ones(phases)))
+    except np.linalg.LinAlgError as exc:
+        raise ValueError("Macierz T rozkładu fazowego jest osobliwa") from exc
+    if mean <= 0:
+        raise ValueError("Średnia rozkładu fazowego musi być dodatnia")
+
+    # Skumulowane prawdopodobieństwa skoku z fazy i do fazy j (kolumna `phases` = pochłonięcie).
+    jumps = np.column_stack([off_diagonal, np.clip(exit_rates, 0.0, None)]) / holding_rates[:, None]
+    jump_cdf = np.cumsum(jumps, axis=1)
+    jump_cdf[:, -1] = 1.0
+    start_cdf = np.cumsum(np.append(alpha, max(1.0 - alpha.sum(), 0.0)))
+    start_cdf[-1] = 1.0
+    scale = 1.0 / mean
+
+    def sample(generator: np.random.Generator, size: int) -> np.ndarray:
+        totals = np.zeros(size)
+        state = np.searchsorted(start_cdf, generator.random(size), side="right")
+        active = np.flatnonzero(state < phases)
+        while active.shape[0]:
+            current = state[active]
+            totals[active] += generator.standard_exponential(active.shape[0]) / holding_rates[current]
+            rolls = generator.random(active.shape[0])
+            following = (rolls[:, None] >= jump_cdf[current]).sum(axis=1)
+            state[active] = following
+            active = active[following < phases]
+        return totals * scale
+
+    return sample
+
+
+@lru_cache(maxsize=None)
+def unit_mean_sampler(distribution: ServiceDistribution) -> Sampler:
+    """Zwraca (zapamiętany) generator blokowy rozkładu znormalizowanego do średniej 1."""
+
+    kind = distribution.kind
+    if kind == "EXP":
+        return _exponential
+    if kind == "DET":
+        return _deterministic
+    if kind == "ERLANG":
+        return _erlang(distribution.k)
+    if kind == "HYPEREXP":
+        return _hyperexponential(distribution.cv)
+    if kind == "LOGNORMAL":
+        return _lognormal(distribution.cv)
+    if kind == "PH":
+        return _phase_type(distribution.initial, distribution.generator)
+    raise ValueError(f"Nieznany rodzaj rozkładu czasu obsługi: {kind}")
+
+
+def squared_cv(distribution: ServiceDistribution) -> float:
+    """Kwadrat współczynnika zmienności rozkładu (przydatny do porównań z SUM)."""
+
+    kind = distribution.kind
+    if kind == "EXP":
+        return 1.0
+    if kind == "DET":
+        return 0.0
+    if kind == "ERLANG":
+        return 1.0 / distribution.k
+    if kind in ("HYPEREXP", "LOGNORMAL"):
+        return distribution.cv * distribution.cv
+    if kind == "PH":
+        alpha = np.asarray(distribution.initial, dtype=np.float64)
+        inverse = np.linalg.inv(-np.asarray(distribution.generator, dtype=np.float64))
+        ones = np.ones(alpha.shape[0])
+        mean = alpha @ inverse @ ones
+        second = 2.0 * alpha @ inverse @ inverse @ ones
+        return float(second / (mean * mean) - 1.0)
+    raise ValueError(f"Nieznany rodzaj rozkładu czasu obsługi: {kind}")
@@ -0,0 +1,245 @@
+"""Czasy obsługi pobierane z rzeczywistych danych (symulacja sterowana śladem).
+
+Dzienniki produkcyjne z czasami obsługi mogą mieć dziesiątki GB, dlatego
+dane czytane są strumieniowo (CSV blokami wierszy, kolumny binarne przez
+`numpy.memmap`), a dla każdej pary (węzeł, klasa) przechowywana jest tylko
+próbka rezerwuarowa o stałym rozmiarze. Z próbki budowana jest tablica
+odwrotnej dystrybuanty, z której czasy losowane są blokowo przez
+interpolację – pamięć nie zależy od długości dziennika.
+"""
+
+from __future__ import annotations
+
+import csv
+import os
+from typing import Callable, Dict, Iterable, Sequence, Tuple
+
+import numpy as np
+
+
+Key = Tuple[str, str]
+
+
+class _Reservoir:
+    """Próbka rezerwuarowa (algorytm R) o stałym rozmiarze."""
+
+    __slots__ = ("values", "size", "seen")
+
+    def __init__(self, capacity: int) -> None:
+        self.values = np.empty(capacity, dtype=np.float64)
+        self.size = 0
+        self.seen = 0
+
+    def add(self, values: np.ndarray, generator: np.random.Generator) -> None:
+        capacity = self.values.shape[0]
+        free = min(capacity - self.size, values.shape[0])
+        if free > 0:
+            self.values[self.size : self.size + free] = values[:free]
+            self.size += free
+        rest = values[free:]
+        if rest.shape[0]:
+            # Element o numerze i (od 0) trafia do próbki z prawdopodobieństwem k/(i+1).
+            positions = self.seen + free + np.arange(rest.shape[0])
+            slots = (generator.random(rest.shape[0]) * (positions + 1)).astype(np.int64)
+            chosen = slots < capacity
+            self.values[slots[chosen]] = rest[chosen]
+        self.seen += values.shape[0]
+
+
+class EmpiricalServiceTimes:
+    """Tablice odwrotnych dystrybuant czasów obsługi per (węzeł, klasa).
+
+    Pary bez danych nie są obsługiwane – symulacja używa dla nich rozkładu
+    wykładniczego z `service_rates_per_class`.
+    """
+
+    def __init__(self, tables: Dict[Key, np.ndarray]) -> None:
+        self.tables = {key: np.asarray(table, dtype=np.float64) for key, table in tables.items()}
+        self._samplers: Dict[Key, Callable[[np.random.Generator, int], np.ndarray]] = {}
+
+    def __getstate__(self) -> dict:
+        return {"tables": self.tables}
+
+    def __setstate__(self, state: dict) -> None:
+        self.tables = state["tables"]
+        self._samplers = {}
+
+    def __contains__(self, key: Key) -> bool:
+        return key in self.tables
+
+    def mean(self, node_id: str, class_id: str) -> float:
+        """Średni czas obsługi wynikający z tablicy (przybliżenie średniej z danych)."""
+
+        table = self.tables[(node_id, class_id)]
+        return float((table[:-1] + table[1:]).sum() / (2 * (table.shape[0] - 1)))
+
+    def sample(self, node_id: str, class_id: str, generator: np.random.Generator, size: int) -> np.ndarray:
+        return self.sampler(node_id, class_id)(generator, size)
+
+    def sampler(self, node_id: str, class_id: str) -> Callable[[np.random.Generator, int], np.ndarray]:
+        """Zwraca (zawsze ten sam) obiekt próbkujący dla pary – do użycia w `RandomStreams`."""
+
+        key = (node_id, class_id)
+        sampler = self._samplers.get(key)
+        if sampler is None:
+            table = self.tables[key]
+            grid = np.arange(table.shape[0])
+
+            def sampler(generator: np.random.Generator, size: int) -> np.ndarray:
+                return np.interp(generator.random(size) * (table.shape[0] - 1), grid, table)
+
+            self._samplers[key] = sampler
+        return sampler
+
+    # ------------------------------------------------------------------
+    # Budowanie z danych
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_samples(
+        cls,
+        chunks: Iterable[Tuple[Key, np.ndarray]],
+        *,
+        reservoir_size: int = 20_000,
+        table_points: int = 1025,
+        seed: int | None = 0,
+    ) -> "EmpiricalServiceTimes":
+        """Buduje tablice ze strumienia bloków `((węzeł, klasa), czasy)`."""
+
+        if reservoir_size < 2 or table_points < 2:
+            raise ValueError("Rozmiar próbki i liczba punktów tablicy muszą być >= 2")
+
+        generator = np.random.default_rng(seed)
+        reservoirs: Dict[Key, _Reservoir] = {}
+        for key, durations in chunks:
+            durations = np.asarray(durations, dtype=np.float64)
+            durations = durations[np.isfinite(durations) & (durations >= 0)]
+            if durations.shape[0] == 0:
+                continue
+            reservoir = reservoirs.get(key)
+            if reservoir is None:
+                reservoir = _Reservoir(reservoir_size)
+                reservoirs[key] = reservoir
+            reservoir.add(durations, generator)
+
+        probabilities = np.linspace(0.0, 1.0, table_points)
+        tables = {
+            key: np.quantile(reservoir.values[: reservoir.size], probabilities)
+            for key, reservoir in reservoirs.items()
+            if reservoir.size > 0
+        }
+        return cls(tables)
+
+    @classmethod
+    def from_csv(
+        cls,
+        path: str | os.PathLike,
+        *,
+        node_column: str = "node_id",
+        class_column: str = "class_id",
+        duration_column: str = "duration",
+        chunk_rows: int = 500_000,
+        delimiter: str = ",",
+        **kwargs,
+    ) -> "EmpiricalServiceTimes":
+        """Wczytuje dziennik CSV (z nagłówkiem) blokami po `chunk_rows` wierszy."""
+
+        return cls.from_samples(
+            _csv_chunks(path, node_column, class_column, duration_column, chunk_rows, delimiter),
+            **kwargs,
+        )
+
+    @classmethod
+    def from_columns(
+        cls,
+        node_codes: np.ndarray,
+        class_codes: np.ndarray,
+        durations: np.ndarray,
+        node_ids: Sequence[str],
+        class_ids: Sequence[str],
+        *,
+        chunk_rows: int = 4_000_000,
+        **kwargs,
+    ) -> "EmpiricalServiceTimes":
+        """Wczytuje kolumny binarne (kody węzłów i klas + czasy), np. z `np.memmap`."""
+
+        return cls.from_samples(
+            _column_chunks(node_codes, class_codes, durations, node_ids, class_ids, chunk_rows),
+            **kwargs,
+        )
+
+    @classmethod
+    def from_npy(
+        cls,
+        node_path: str | os.PathLike,
+        class_path: str | os.PathLike,
+        duration_path: str | os.PathLike,
+        node_ids: Sequence[str],
+        class_ids: Sequence[str],
+        **kwargs,
+    ) -> "EmpiricalServiceTimes":
+        """Wczytuje kolumny zapisane w plikach `.npy` bez ładowania ich do pamięci."""
+
+        return cls.from_columns(
+            np.load(node_path, mmap_mode="r"),
+            np.load(class_path, mmap_mode="r"),
+            np.load(duration_path, mmap_mode="r"),
+            node_ids,
+            class_ids,
+            **kwargs,
+        )
+
+
+def _csv_chunks(
+    path: str | os.PathLike,
+    node_column: str,
+    class_column: str,
+    duration_column: str,
+    chunk_rows: int,
+    delimiter: str,
+) -> Iterable[Tuple[Key, np.ndarray]]:
+    with open(path, newline="", encoding="utf-8") as handle:
+        reader = csv.DictReader(handle, delimiter=delimiter)
+        buffered: Dict[Key, list] = {}
+        rows = 0
+        for row in reader:
+            try:
+                duration = float(row[duration_column])
+            except (TypeError, ValueError):
+                continue
+            buffered.setdefault((row[node_column], row[class_column]), []).append(duration)
+            rows += 1
+            if rows >= chunk_rows:
+                for key, values in buffered.items():
+                    yield key, np.asarray(values, dtype=np.float64)
+                buffered = {}
+                rows = 0
+        for key, values in buffered.items():
+            yield key, np.asarray(values, dtype=np.float64)
+
+
+def _column_chunks(
+    node_codes: np.ndarray,
+    class_codes: np.ndarray,
+    durations: np.ndarray,
+    node_ids: Sequence[str],
+    class_ids: Sequence[str],
+    chunk_rows: int,
+) -> Iterable[Tuple[Key, np.ndarray]]:
+    total = durations.shape[0]
+    class_count = len(class_ids)
+    for start in range(0, total, chunk_rows):
+        stop = min(start + chunk_rows, total)
+        nodes = np.asarray(node_codes[start:stop], dtype=np.int64)
+        classes = np.asarray(class_codes[start:stop], dtype=np.int64)
+        values = np.asarray(durations[start:stop], dtype=np.float64)
+
+        combined = nodes * class_count + classes
+        order = np.argsort(combined, kind="stable")
+        combined = combined[order]
+        values = values[order]
+        boundaries = np.flatnonzero(np.diff(combined)) + 1
+        for group_codes, group_values in zip(
+            np.split(combined, boundaries), np.split(values, boundaries)
+        ):
+            code = int(group_codes[0])
+            yield (node_ids[code // class_count], class_ids[code % class_count]), group_values
@@ -0,0 +1,111 @@
+"""Zdarzenia symulacji zapisywane jako zwarte rekordy strukturalne.
+
+Zamiast budować tekst komunikatu przy każdym zdarzeniu, symulacja zapisuje
+rekord (czas, rodzaj, zgłoszenie, klasa, węzeł źródłowy, węzeł docelowy)
+do bufora pierścieniowego o stałym rozmiarze. Tekst powstaje dopiero, gdy
+GUI poprosi o ostatnie N zdarzeń.
+"""
+
+from __future__ import annotations
+
+from typing import List, Sequence
+
+import numpy as np
+
+
+EVENT_DTYPE = np.dtype(
+    [
+        ("time", np.float64),
+        ("kind", np.uint8),
+        ("ticket", np.int64),
+        ("class_index", np.int16),
+        ("from_node", np.int32),
+        ("to_node", np.int32),
+    ]
+)
+
+EVENT_SPAWN = 0
+EVENT_START = 1
+EVENT_PREEMPT = 2
+EVENT_ROUTE = 3
+EVENT_CYCLE = 4
+
+NO_NODE = -1
+
+
+def format_event(record: np.void, class_ids: Sequence[str], node_ids: Sequence[str]) -> str:
+    """Zamienia rekord zdarzenia na komunikat dziennika."""
+
+    kind = int(record["kind"])
+    label = f"{class_ids[int(record['class_index'])]}#{int(record['ticket'])}"
+    from_node = node_ids[int(record["from_node"])] if record["from_node"] != NO_NODE else ""
+    to_node = node_ids[int(record["to_node"])] if record["to_node"] != NO_NODE else ""
+
+    if kind == EVENT_SPAWN:
+        return f"{label} trafił do {to_node} (nowe zgłoszenie)"
+    if kind == EVENT_START:
+        return f"{label} rozpoczął obsługę w {from_node}"
+    if kind == EVENT_PREEMPT:
+        return f"{label} wywłaszczony w {from_node}"
+    if kind == EVENT_CYCLE:
+        return f"{label} zakończył cykl i wraca do {to_node}"
+    return f"{label} przechodzi z {from_node} do {to_node}"
+
+
+class EventLog:
+    """Bufor pierścieniowy ostatnich `capacity` zdarzeń.
+
+    `total` liczy wszystkie zarejestrowane zdarzenia (również te już
+    nadpisane), co pozwala konsumentom ustalić, które rekordy są nowe.
+    Przy `enabled = False` rejestracja jest pomijana.
+    """
+
+    def __init__(self, capacity: int = 200, enabled: bool = True) -> None:
+        if capacity <= 0:
+            raise ValueError("Pojemność dziennika musi być dodatnia")
+        self.capacity = capacity
+        self.enabled = enabled
+        self._buffer = np.zeros(capacity, dtype=EVENT_DTYPE)
+        self.total = 0
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    def record(
+        self,
+        time: float,
+        kind: int,
+        ticket: int,
+        class_index: int,
+        from_node: int = NO_NODE,
+        to_node: int = NO_NODE,
+    ) -> None:
+        if not self.enabled:
+            return
+        self._buffer[self.total % self.capacity] = (time, kind, ticket, class_index, from_node, to_node)
+        self.total += 1
+
+    def record_many(self, records: np.ndarray) -> None:
+        """Rejestruje tablicę rekordów `EVENT_DTYPE` (zachowywane jest ostatnie `capacity`)."""
+
+        count = records.shape[0]
+        if not self.enabled or count == 0:
+            return
+        kept = records[-self.capacity :]
+        first = self.total + count - kept.shape[0]
+        self._buffer[(first + np.arange(kept.shape[0])) % self.capacity] = kept
+        self.total += count
+
+    def last(self, count: int) -> np.ndarray:
+        """Zwraca (kopię) ostatnich `count` rekordów w kolejności chronologicznej."""
+
+        count = max(0, min(count, len(self)))
+        end = self.total % self.capacity
+        indices = (np.arange(end - count, end)) % self.capacity
+        return self._buffer[indices]
+
+    def format_last(self, count: int, class_ids: Sequence[str], node_ids: Sequence[str]) -> List[str]:
+        return [format_event(record, class_ids, node_ids) for record in self.last(count)]
+
+    def clear(self) -> None:
+        self.total = 0
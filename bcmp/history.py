@@ -0,0 +1,326 @@
+"""Historia długości kolejek w buforach pierścieniowych o kilku rozdzielczościach.
+
+Każdy krok symulacji dopisuje jeden wiersz (długości kolejek wszystkich
+węzłów) do bufora surowych próbek. Równolegle próbki agregowane są do
+przedziałów o stałej długości (domyślnie 1 s i 1 min) z minimum, średnią
+ważoną czasem i maksimum; przedziały poziomu 1 min powstają z zamkniętych
+przedziałów poziomu 1 s. Każdy poziom ma bufor o stałej pojemności, więc
+pamięć jest ograniczona niezależnie od długości przebiegu, a koszt
+dopisania próbki jest stały (jedna operacja wektorowa na poziom).
+
+Bufory rosną dopiero w miarę dopisywania próbek (podwajając rozmiar aż do
+pojemności), a przy dużej liczbie węzłów pojemności są zmniejszane tak,
+aby pełna historia mieściła się w limicie `max_bytes`.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+@dataclass
+class HistoryRange:
+    """Wynik zapytania o zakres czasu: czasy oraz minimum/średnia/maksimum."""
+
+    resolution: float
+    times: np.ndarray
+    minimum: np.ndarray
+    mean: np.ndarray
+    maximum: np.ndarray
+
+
+class _Ring:
+    """Bufor pierścieniowy wierszy [czas, wartości węzłów] jednego poziomu.
+
+    Tablice alokowane są leniwie: zaczynają od `INITIAL_ROWS` wierszy
+    i podwajają się, dopóki nie osiągną pojemności `capacity`.
+    """
+
+    INITIAL_ROWS = 64
+
+    def __init__(self, capacity: int, node_count: int, columns: int) -> None:
+        self.capacity = capacity
+        self.node_count = node_count
+        self.columns = columns
+        self.clear()
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    def clear(self) -> None:
+        self.total = 0
+        self._allocate(min(self.capacity, self.INITIAL_ROWS))
+
+    def _allocate(self, rows: int) -> None:
+        times = np.zeros(rows, dtype=np.float64)
+        values = np.zeros((self.columns, rows, self.node_count), dtype=np.float64)
+        if self.total:
+            # Przed zawinięciem wiersze zajmują początek tablic w kolejności dopisywania.
+            times[: self.total] = self.times[: self.total]
+            values[:, : self.total] = self.values[:, : self.total]
+        self.times, self.values = times, values
+
+    def push(self, time: float, *rows: np.ndarray) -> None:
+        if self.total == self.times.shape[0] < self.capacity:
+            self._allocate(min(self.capacity, 2 * self.total))
+        slot = self.total % self.capacity
+        self.times[slot] = time
+        for column, row in enumerate(rows):
+            self.values[column, slot] = row
+        self.total += 1
+
+    def last_indices(self, count: int) -> np.ndarray:
+        count = max(0, min(count, len(self)))
+        return np.arange(self.total - count, self.total) % self.capacity
+
+    def range_indices(self, start: float, end: float) -> np.ndarray:
+        order = self.last_indices(len(self))
+        times = self.times[order]
+        first = int(np.searchsorted(times, start, side="left"))
+        last = int(np.searchsorted(times, end, side="right"))
+        return order[first:last]
+
+    def oldest_time(self) -> float:
+        if not len(self):
+            return math.inf
+        return float(self.times[self.last_indices(len(self))[0]])
+
+
+class _Aggregator:
+    """Przedział w budowie dla jednego poziomu agregacji."""
+
+    def __init__(self, resolution: float, node_count: int) -> None:
+        self.resolution = resolution
+        self.bucket = None
+        self.minimum = np.full(node_count, np.inf)
+        self.maximum = np.full(node_count, -np.inf)
+        self.weighted = np.zeros(node_count)
+        self.weight = 0.0
+
+    def reset(self) -> None:
+        self.bucket = None
+        self.minimum.fill(np.inf)
+        self.maximum.fill(-np.inf)
+        self.weighted.fill(0.0)
+        self.weight = 0.0
+
+    def add(self, minimum: np.ndarray, mean: np.ndarray, maximum: np.ndarray, weight: float) -> None:
+        np.minimum(self.minimum, minimum, out=self.minimum)
+        np.maximum(self.maximum, maximum, out=self.maximum)
+        self.weighted += mean * weight
+        self.weight += weight
+
+    def mean(self) -> np.ndarray:
+        if self.weight > 0:
+            return self.weighted / self.weight
+        return np.where(np.isfinite(self.minimum), (self.minimum + self.maximum) / 2, 0.0)
+
+
+class QueueHistory:
+    """Historia długości kolejek wszystkich węzłów.
+
+    - `raw_capacity`: liczba ostatnich surowych próbek (jedna na krok),
+    - `resolutions` / `capacities`: długości przedziałów agregacji [s]
+      i liczba przechowywanych przedziałów na każdym poziomie,
+    - `max_bytes`: limit pamięci zapełnionej historii; gdy pełne pojemności
+      go przekraczają (wiele węzłów), wszystkie są proporcjonalnie
+      zmniejszane (do co najmniej `MIN_CAPACITY`); `None` wyłącza limit.
+    """
+
+    MIN_CAPACITY = 16
+
+    def __init__(
+        self,
+        node_ids: Sequence[str],
+        raw_capacity: int = 3000,
+        resolutions: Sequence[float] = (1.0, 60.0),
+        capacities: Sequence[int] = (3600, 1440),
+        max_bytes: int | None = 64 * 2**20,
+    ) -> None:
+        if len(resolutions) != len(capacities):
+            raise ValueError("Każdy poziom agregacji musi mieć określoną pojemność")
+        if raw_capacity <= 0 or any(capacity <= 0 for capacity in capacities):
+            raise ValueError("Pojemności buforów historii muszą być dodatnie")
+        if any(later <= earlier for earlier, later in zip(resolutions, resolutions[1:])):
+            raise ValueError("Rozdzielczości agregacji muszą rosnąć")
+
+        self.node_ids: List[str] = list(node_ids)
+        self.node_lookup: Dict[str, int] = {node_id: idx for idx, node_id in enumerate(self.node_ids)}
+        node_count = len(self.node_ids)
+        if max_bytes is not None:
+            row_bytes = [8 * (1 + node_count)] + [8 * (1 + 3 * node_count)] * len(capacities)
+            sizes = [raw_capacity, *capacities]
+            full = sum(size * row for size, row in zip(sizes, row_bytes))
+            if full > max_bytes:
+                scale = max_bytes / full
+                raw_capacity, *capacities = (
+                    max(self.MIN_CAPACITY, min(size, int(size * scale))) for size in sizes
+                )
+        self.raw = _Ring(raw_capacity, node_count, 1)
+        self.resolutions = tuple(float(resolution) for resolution in resolutions)
+        self.levels = [_Ring(capacity, node_count, 3) for capacity in capacities]
+        self._aggregators = [_Aggregator(resolution, node_count) for resolution in self.resolutions]
+        self._last_time: float | None = None
+
+    def empty_copy(self) -> "QueueHistory":
+        """Nowa, pusta historia o tych samych węzłach i pojemnościach."""
+
+        return QueueHistory(
+            self.node_ids,
+            self.raw.capacity,
+            self.resolutions,
+            [level.capacity for level in self.levels],
+            max_bytes=None,
+        )
+
+    @property
+    def total(self) -> int:
+        """Liczba wszystkich dopisanych próbek (także tych już nadpisanych)."""
+
+        return self.raw.total
+
+    def clear(self) -> None:
+        self.raw.clear()
+        for level, aggregator in zip(self.levels, self._aggregators):
+            level.clear()
+            aggregator.reset()
+        self._last_time = None
+
+    def append(self, time: float, lengths: np.ndarray) -> None:
+        """Dopisuje próbkę: długości kolejek węzłów obowiązujące do chwili `time`."""
+
+        weight = time - self._last_time if self._last_time is not None else 0.0
+        self._last_time = time
+        self.raw.push(time, lengths)
+        self._feed(0, time, lengths, lengths, lengths, weight)
+
+    def _feed(
+        self,
+        level: int,
+        time: float,
+        minimum: np.ndarray,
+        mean: np.ndarray,
+        maximum: np.ndarray,
+        weight: float,
+    ) -> None:
+        if level >= len(self._aggregators):
+            return
+        aggregator = self._aggregators[level]
+        # Próbka z chwili `time` opisuje przedział kończący się w tej chwili.
+        bucket = math.ceil(time / aggregator.resolution - 1e-9) - 1
+        if aggregator.bucket is not None and bucket != aggregator.bucket:
+            self._close(level)
+        aggregator.bucket = bucket
+        aggregator.add(minimum, mean, maximum, weight)
+
+    def _close(self, level: int) -> None:
+        aggregator = self._aggregators[level]
+        end = (aggregator.bucket + 1) * aggregator.resolution
+        mean = aggregator.mean()
+        self.levels[level].push(end, aggregator.minimum, mean, aggregator.maximum)
+        self._feed(level + 1, end, aggregator.minimum.copy(), mean, aggregator.maximum.copy(), aggregator.weight)
+        aggregator.reset()
+
+    # ------------------------------------------------------------------
+    # Zapytania
+    # ------------------------------------------------------------------
+    def last(self, count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Zwraca `count` ostatnich surowych próbek: czasy i macierz [próbka × węzeł]."""
+
+        indices = self.raw.last_indices(count)
+        return self.raw.times[indices], self.raw.values[0, indices]
+
+    def points(self, node_id: str, count: int) -> List[Tuple[float, int]]:
+        """Ostatnie `count` surowych próbek węzła jako lista (czas, długość kolejki)."""
+
+        indices = self.raw.last_indices(count)
+        column = self.node_lookup[node_id]
+        return list(zip(self.raw.times[indices].tolist(), self.raw.values[0, indices, column].astype(int).tolist()))
+
+    def range(self, node_id: str, start: float, end: float, max_points: int | None = None) -> HistoryRange:
+        """Zwraca historię węzła z przedziału [start, end] w najdrobniejszej dostępnej rozdzielczości.
+
+        Wybierany jest pierwszy poziom (surowy, 1 s, 1 min, …), który sięga
+        do `start` i mieści się w `max_points` punktach; gdy żaden nie spełnia
+        obu warunków, używany jest najgrubszy.
+        """
+
+        column = self.node_lookup[node_id]
+        candidates = [(0.0, self.raw)] + list(zip(self.resolutions, self.levels))
+        resolution, ring = candidates[-1]
+        indices = None
+        for candidate_resolution, candidate in candidates:
+            # Poziom, który już się zawinął, nie zawiera danych sprzed najstarszej próbki.
+            if candidate.total > candidate.capacity and candidate.oldest_time() > start:
+                continue
+            candidate_indices = candidate.range_indices(start, end)
+            if max_points is None or candidate_indices.shape[0] <= max_points:
+                resolution, ring, indices = candidate_resolution, candidate, candidate_indices
+                break
+        if indices is None:
+            indices = ring.range_indices(start, end)
+
+        times = ring.times[indices]
+        if ring is self.raw:
+            values = ring.values[0, indices, column]
+            return HistoryRange(resolution, times, values, values, values)
+        return HistoryRange(
+            resolution,
+            times,
+            ring.values[0, indices, column],
+            ring.values[1, indices, column],
+            ring.values[2, indices, column],
+        )
+
+    def span(self, node_id: str, start: float, end: float) -> HistoryRange:
+        """Zwraca historię węzła z [start, end], łącząc poziomy.
+
+        Najświeższa część pochodzi z najdrobniejszego poziomu, który ją
+        jeszcze przechowuje, a starsza – z kolejnych, grubszych poziomów.
+        `resolution` wyniku to rozdzielczość najstarszej (najgrubszej) części.
+        """
+
+        column = self.node_lookup[node_id]
+        parts: List[Tuple[_Ring, np.ndarray]] = []
+        resolution = 0.0
+        boundary = end
+        for candidate_resolution, ring in [(0.0, self.raw)] + list(zip(self.resolutions, self.levels)):
+            if boundary < start:
+                break
+            indices = ring.range_indices(start, boundary)
+            if parts:
+                indices = indices[ring.times[indices] < boundary]
+            if indices.shape[0]:
+                parts.append((ring, indices))
+                resolution = candidate_resolution
+                boundary = float(ring.times[indices[0]])
+            if ring.total <= ring.capacity:
+                # Poziom się nie zawinął, więc sięga początku przebiegu.
+                break
+
+        times, minimum, mean, maximum = [], [], [], []
+        for ring, indices in reversed(parts):
+            times.append(ring.times[indices])
+            if ring is self.raw:
+                values = ring.values[0, indices, column]
+                minimum.append(values)
+                mean.append(values)
+                maximum.append(values)
+            else:
+                minimum.append(ring.values[0, indices, column])
+                mean.append(ring.values[1, indices, column])
+                maximum.append(ring.values[2, indices, column])
+        if not parts:
+            empty = np.empty(0)
+            return HistoryRange(resolution, empty, empty, empty, empty)
+        return HistoryRange(
+            resolution, np.concatenate(times), np.concatenate(minimum), np.concatenate(mean), np.concatenate(maximum)
+        )
+
+    def nbytes(self) -> int:
+        rings = [self.raw] + self.levels
+        return int(sum(ring.times.nbytes + ring.values.nbytes for ring in rings))
@@ -51,6 +51,26 @@ class NodePerformanceSummary:
     utilization: float = 0.0  # ρ
 
 
+@dataclass
+class LatencyStats:
+    """Rozkład czasu (oczekiwania, przebywania lub cyklu) z symulacji."""
+
+    count: int = 0
+    mean: float = 0.0
+    std: float = 0.0
+    p50: float = 0.0
+    p95: float = 0.0
+    p99: float = 0.0
+
+
+@dataclass
+class NodeClassLatency:
+    """Czasy oczekiwania (Wq) i przebywania (W) jednej klasy w jednym węźle."""
+
+    waiting: LatencyStats = field(default_factory=LatencyStats)
+    response: LatencyStats = field(default_factory=LatencyStats)
+
+
 @dataclass
 class NetworkMetrics:
     """Metryki całej sieci BCMP.
@@ -0,0 +1,147 @@
+"""Blokowe generowanie liczb losowych dla symulacji.
+
+Każdy niezależny strumień (węzeł × klasa × rodzaj losowania) ma własny
+`numpy.random.Generator`, z którego zmienne losowe pobierane są blokami
+i wydawane pojedynczo z bufora. Ziarno strumienia wyprowadzane jest z
+`seed` symulacji oraz stabilnych skrótów identyfikatorów węzła i klasy,
+dzięki czemu wynik nie zależy od kolejności, w jakiej strumienie zostały
+po raz pierwszy użyte.
+"""
+
+from __future__ import annotations
+
+import zlib
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+
+Sampler = Callable[[np.random.Generator, int], np.ndarray]
+
+STREAM_SERVICE = 0
+STREAM_ROUTING = 1
+
+DEFAULT_BLOCK_SIZE = 4096
+
+
+def _standard_exponential(generator: np.random.Generator, size: int) -> np.ndarray:
+    return generator.standard_exponential(size)
+
+
+def _uniform(generator: np.random.Generator, size: int) -> np.ndarray:
+    return generator.random(size)
+
+
+def stable_key(name: str) -> int:
+    """Zwraca niezależny od procesu skrót identyfikatora (do `spawn_key`)."""
+
+    return zlib.crc32(name.encode("utf-8"))
+
+
+class VariateBuffer:
+    """Bufor kolejnych wartości jednego strumienia, uzupełniany blokami."""
+
+    __slots__ = ("generator", "sampler", "block_size", "_block", "_block_state", "_position")
+
+    def __init__(self, generator: np.random.Generator, sampler: Sampler, block_size: int) -> None:
+        self.generator = generator
+        self.sampler = sampler
+        self.block_size = block_size
+        self._block: List[float] = []
+        self._block_state: dict | None = None
+        self._position = 0
+
+    def __getstate__(self) -> dict:
+        # Zamiast niewykorzystanej reszty bloku zapisywany jest stan generatora
+        # sprzed jego wylosowania i pozycja w bloku – blok odtwarza `resume`.
+        # Funkcja losująca nie jest zapisywana (może być domknięciem);
+        # strumień przejmie ją przy pierwszym użyciu po odtworzeniu.
+        pending = self._position < len(self._block)
+        return {
+            "generator": self.generator,
+            "block_size": self.block_size,
+            "block_state": self._block_state if pending else None,
+            "position": self._position if pending else 0,
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        self.generator = state["generator"]
+        self.sampler = None
+        self.block_size = state["block_size"]
+        self._block = []
+        self._block_state = state["block_state"]
+        self._position = state["position"]
+
+    def resume(self, sampler: Sampler) -> None:
+        """Przyjmuje funkcję losującą po odtworzeniu i regeneruje bieżący blok."""
+
+        self.sampler = sampler
+        if self._block_state is not None and not self._block:
+            self.generator.bit_generator.state = self._block_state
+            self._block = sampler(self.generator, self.block_size).tolist()
+
+    def replace_sampler(self, sampler: Sampler) -> None:
+        """Zmienia rozkład strumienia; niewykorzystana część bloku jest odrzucana."""
+
+        self.sampler = sampler
+        self._block = []
+        self._block_state = None
+        self._position = 0
+
+    def next(self) -> float:
+        if self._position >= len(self._block):
+            self._block_state = self.generator.bit_generator.state
+            self._block = self.sampler(self.generator, self.block_size).tolist()
+            self._position = 0
+        value = self._block[self._position]
+        self._position += 1
+        return value
+
+
+class RandomStreams:
+    """Zbiór niezależnych, blokowo buforowanych strumieni losowych.
+
+    - `service(node_id, class_id)`: zmienna wykładnicza o średniej 1
+      (czas obsługi skalowany przez wywołującego przez 1/μ) albo wartość
+      z podanego `sampler` (np. empiryczny rozkład czasów obsługi),
+    - `routing(node_id, class_id)`: zmienna jednostajna na [0, 1).
+    """
+
+    def __init__(self, seed: int | None = None, block_size: int = DEFAULT_BLOCK_SIZE) -> None:
+        if block_size <= 0:
+            raise ValueError("Rozmiar bloku musi być dodatni")
+        self.entropy = np.random.SeedSequence(seed).entropy
+        self.block_size = block_size
+        self._streams: Dict[Tuple[int, str, str], VariateBuffer] = {}
+
+    def service(self, node_id: str, class_id: str, sampler: Sampler = _standard_exponential) -> float:
+        return self._stream((STREAM_SERVICE, node_id, class_id), sampler).next()
+
+    def routing(self, node_id: str, class_id: str) -> float:
+        return self._stream((STREAM_ROUTING, node_id, class_id), _uniform).next()
+
+    def generator_for(self, kind: int, node_id: str, class_id: str) -> np.random.Generator:
+        """Tworzy świeży generator strumienia (deterministyczny dla danego ziarna)."""
+
+        seed_sequence = np.random.SeedSequence(
+            self.entropy,
+            spawn_key=(kind, stable_key(node_id), stable_key(class_id)),
+        )
+        return np.random.Generator(np.random.PCG64(seed_sequence))
+
+    def _stream(self, key: Tuple[int, str, str], sampler: Sampler) -> VariateBuffer:
+        stream = self._streams.get(key)
+        if stream is None:
+            return self._create(key, sampler)
+        if stream.sampler is None:
+            # Strumień odtworzony z punktu kontrolnego – blok jest regenerowany.
+            stream.resume(sampler)
+        elif stream.sampler != sampler:
+            stream.replace_sampler(sampler)
+        return stream
+
+    def _create(self, key: Tuple[int, str, str], sampler: Sampler) -> VariateBuffer:
+        kind, node_id, class_id = key
+        stream = VariateBuffer(self.generator_for(kind, node_id, class_id), sampler, self.block_size)
+        self._streams[key] = stream
+        return stream
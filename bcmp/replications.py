@@ -0,0 +1,216 @@
+"""Niezależne replikacje symulacji uruchamiane w puli procesów.
+
+Pojedynczy przebieg `TicketSimulation` daje jedynie estymatę punktową.
+Ten moduł uruchamia R niezależnych replikacji (każda z własnym ziarnem,
+bez GUI i z odrzuceniem okresu rozbiegowego), a następnie łączy ich
+metryki węzłów w średnie z przedziałami ufności t-Studenta.
+
+`run_replications` czeka na wynik; `submit_replications` zwraca od razu
+`Future` – dla GUI, które nie może blokować wątku zdarzeń.
+"""
+
+from __future__ import annotations
+
+import copy
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, InvalidStateError, ProcessPoolExecutor
+from dataclasses import dataclass, field, fields
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from bcmp.config_schema import NetworkConfig
+from bcmp.metrics import NodePerformanceSummary
+from bcmp.network import BCMPNetwork
+from bcmp.simulation import TicketSimulation
+from bcmp.stats import mean_confidence_interval
+
+
+@dataclass
+class ReplicationResults:
+    """Wyniki serii replikacji.
+
+    Atrybuty:
+    - `means`: średnie metryk węzłów po replikacjach,
+    - `half_widths`: połowy szerokości przedziałów ufności dla tych samych pól,
+    - `samples`: surowe wyniki poszczególnych replikacji (w kolejności ziaren).
+    """
+
+    replications: int
+    confidence: float
+    means: Dict[str, NodePerformanceSummary] = field(default_factory=dict)
+    half_widths: Dict[str, NodePerformanceSummary] = field(default_factory=dict)
+    samples: List[Dict[str, NodePerformanceSummary]] = field(default_factory=list)
+
+
+def replication_seeds(seed: int | None, replications: int) -> List[int]:
+    """Wyprowadza niezależne ziarna replikacji z jednego ziarna bazowego."""
+
+    state = np.random.SeedSequence(seed).generate_state(replications)
+    return [int(value) for value in state]
+
+
+def run_single_replication(
+    config: NetworkConfig,
+    seed: int,
+    duration: float,
+    warmup: float,
+    time_step: float,
+) -> Dict[str, NodePerformanceSummary]:
+    """Wykonuje jedną replikację bez GUI i zwraca empiryczne metryki węzłów."""
+
+    simulation = TicketSimulation(BCMPNetwork(config=config), seed=seed, log_events=False, latency_quantiles=False)
+    simulation.run(duration, time_step=time_step, warmup=warmup)
+    return simulation.empirical_performance()
+
+
+def summarize_replications(
+    samples: List[Dict[str, NodePerformanceSummary]], confidence: float = 0.95
+) -> ReplicationResults:
+    """Łączy wyniki replikacji w średnie i przedziały ufności per węzeł."""
+
+    results = ReplicationResults(replications=len(samples), confidence=confidence, samples=samples)
+    if not samples:
+        return results
+
+    for node_id in samples[0]:
+        means = {}
+        half_widths = {}
+        for summary_field in fields(NodePerformanceSummary):
+            values = [float(getattr(sample[node_id], summary_field.name)) for sample in samples]
+            means[summary_field.name], half_widths[summary_field.name] = mean_confidence_interval(
+                values, confidence
+            )
+        results.means[node_id] = NodePerformanceSummary(**means)
+        results.half_widths[node_id] = NodePerformanceSummary(**half_widths)
+
+    return results
+
+
+def execute_replications(
+    tasks: Sequence[Tuple[NetworkConfig, int]],
+    *,
+    duration: float,
+    warmup: float,
+    time_step: float,
+    max_workers: int | None = None,
+) -> List[Dict[str, NodePerformanceSummary]]:
+    """Wykonuje przebiegi `(konfiguracja, ziarno)` w puli procesów, zachowując kolejność.
+
+    Pula używa metody `spawn`, aby procesy potomne nie dziedziczyły stanu GUI.
+    """
+
+    workers = min(len(tasks), max_workers or os.cpu_count() or 1)
+    if workers <= 1:
+        return [
+            run_single_replication(config, seed, duration, warmup, time_step) for config, seed in tasks
+        ]
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = [
+            pool.submit(run_single_replication, config, seed, duration, warmup, time_step)
+            for config, seed in tasks
+        ]
+        return [future.result() for future in futures]
+
+
+def _gather(futures: List[Future], finish: Callable[[list], object]) -> Future:
+    """Łączy zlecenia w jeden `Future` z wynikiem `finish(wyniki w kolejności zleceń)`.
+
+    Anulowanie połączonego `Future` anuluje zlecenia, które jeszcze nie ruszyły.
+    """
+
+    combined: Future = Future()
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def on_done(_future: Future) -> None:
+        with lock:
+            remaining[0] -= 1
+            if remaining[0] > 0:
+                return
+        if combined.cancelled():
+            return
+        try:
+            combined.set_result(finish([future.result() for future in futures]))
+        except InvalidStateError:
+            pass
+        except Exception as error:
+            combined.set_exception(error)
+
+    def on_cancel(done: Future) -> None:
+        if done.cancelled():
+            for future in futures:
+                future.cancel()
+
+    combined.add_done_callback(on_cancel)
+    for future in futures:
+        future.add_done_callback(on_done)
+    return combined
+
+
+def submit_replications(
+    config: NetworkConfig,
+    replications: int = 10,
+    *,
+    duration: float = 600.0,
+    warmup: float = 60.0,
+    time_step: float = 0.1,
+    seed: int | None = None,
+    confidence: float = 0.95,
+    max_workers: int | None = None,
+) -> "Future[ReplicationResults]":
+    """Zleca replikacje do puli procesów i od razu zwraca `Future` z `ReplicationResults`.
+
+    Konfiguracja jest kopiowana w chwili zlecenia – dalsze edycje w GUI nie
+    wpływają na trwającą serię.
+    """
+
+    _check_replications(replications)
+    config = copy.deepcopy(config)
+    workers = max(1, min(replications, max_workers or os.cpu_count() or 1))
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    futures = [
+        pool.submit(run_single_replication, config, replication_seed, duration, warmup, time_step)
+        for replication_seed in replication_seeds(seed, replications)
+    ]
+    # Procesy kończą się same po wykonaniu zleceń; wynik odbiera się przez `Future`.
+    pool.shutdown(wait=False)
+    return _gather(futures, lambda samples: summarize_replications(samples, confidence))
+
+
+def _check_replications(replications: int) -> None:
+    if replications < 2:
+        raise ValueError("Przedziały ufności wymagają co najmniej dwóch replikacji")
+
+
+def run_replications(
+    config: NetworkConfig,
+    replications: int = 10,
+    *,
+    duration: float = 600.0,
+    warmup: float = 60.0,
+    time_step: float = 0.1,
+    seed: int | None = None,
+    confidence: float = 0.95,
+    max_workers: int | None = None,
+) -> ReplicationResults:
+    """Uruchamia `replications` niezależnych przebiegów na wszystkich rdzeniach.
+
+    Replikacje są od siebie niezależne, więc rozdzielane są na pulę procesów
+    (domyślnie tyle procesów, ile rdzeni).
+    """
+
+    _check_replications(replications)
+
+    samples = execute_replications(
+        [(config, replication_seed) for replication_seed in replication_seeds(seed, replications)],
+        duration=duration,
+        warmup=warmup,
+        time_step=time_step,
+        max_workers=max_workers,
+    )
+    return summarize_replications(samples, confidence)
@@ -4,7 +4,8 @@ Tutaj można umieścić funkcje do pracy z `RoutingEntry` i budowania
 macierzy przejść między węzłami dla poszczególnych klas.
 """
 
-from typing import Dict, List
+from typing import Dict, Iterable, List, Tuple
+
 from bcmp.config_schema import RoutingEntry
 
 
@@ -43,3 +44,93 @@ def build_routing_matrix(
             )
 
     return routing_matrix
+
+
+class SparseRouting:
+    """Edytowalny routing jednej klasy przechowywany jako lista niezerowych krawędzi.
+
+    Obiekt operuje w miejscu na liście `RoutingEntry` z konfiguracji oraz
+    na słownikowej macierzy z `BCMPNetwork.routing_matrices`, więc obie
+    reprezentacje pozostają zgodne bez przebudowy po każdej zmianie.
+    Indeks (z węzła, do węzła) → pozycja na liście sprawia, że zmiana,
+    dodanie i usunięcie krawędzi kosztują O(1); krawędź o zerowym
+    prawdopodobieństwie jest usuwana (przez zamianę z ostatnią pozycją).
+    """
+
+    def __init__(self, entries: List[RoutingEntry], matrix: Dict[str, Dict[str, float]]) -> None:
+        self.entries = entries
+        self.matrix = matrix
+
+        # Zduplikowane lub zerowe wpisy są scalane, aby każdej krawędzi odpowiadała jedna pozycja.
+        merged: Dict[Tuple[str, str], float] = {}
+        for entry in entries:
+            key = (entry.from_node_id, entry.to_node_id)
+            merged[key] = merged.get(key, 0.0) + entry.probability
+        if len(merged) != len(entries) or any(probability == 0.0 for probability in merged.values()):
+            entries[:] = [RoutingEntry(src, dst, p) for (src, dst), p in merged.items() if p != 0.0]
+
+        self._positions: Dict[Tuple[str, str], int] = {
+            (entry.from_node_id, entry.to_node_id): position for position, entry in enumerate(entries)
+        }
+        matrix.clear()
+        for entry in entries:
+            matrix.setdefault(entry.from_node_id, {})[entry.to_node_id] = entry.probability
+            matrix.setdefault(entry.to_node_id, {})
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def position(self, from_node: str, to_node: str) -> int | None:
+        return self._positions.get((from_node, to_node))
+
+    def probability(self, from_node: str, to_node: str) -> float:
+        return self.matrix.get(from_node, {}).get(to_node, 0.0)
+
+    def set(self, from_node: str, to_node: str, probability: float) -> Tuple[int | None, int | None]:
+        """Ustawia prawdopodobieństwo krawędzi.
+
+        Zwraca `(pozycja, przeniesiona)`: pozycję zmienionego/dodanego wpisu
+        (None, gdy krawędź usunięto lub nie istniała) oraz – przy usunięciu –
+        dawną pozycję wpisu przeniesionego na miejsce usuniętego.
+        """
+
+        if probability < 0:
+            raise ValueError(f"Prawdopodobieństwo przejścia {from_node} → {to_node} nie może być ujemne")
+
+        key = (from_node, to_node)
+        position = self._positions.get(key)
+        if probability == 0.0:
+            return None, self._remove(key) if position is not None else None
+
+        self.matrix.setdefault(from_node, {})[to_node] = probability
+        self.matrix.setdefault(to_node, {})
+        if position is None:
+            position = len(self.entries)
+            self.entries.append(RoutingEntry(from_node, to_node, probability))
+            self._positions[key] = position
+        else:
+            self.entries[position].probability = probability
+        return position, None
+
+    def _remove(self, key: Tuple[str, str]) -> int | None:
+        position = self._positions.pop(key)
+        del self.matrix[key[0]][key[1]]
+        last = self.entries.pop()
+        if position == len(self.entries):
+            return None
+        self.entries[position] = last
+        self._positions[(last.from_node_id, last.to_node_id)] = position
+        return len(self.entries)
+
+    def outgoing_sum(self, node_id: str) -> float:
+        return float(sum(self.matrix.get(node_id, {}).values()))
+
+    def invalid_rows(self, node_ids: Iterable[str], tolerance: float = 1e-6) -> Dict[str, float]:
+        """Zwraca węzły (spośród `node_ids`), których niezerowa suma wyjść różni się od 1."""
+
+        invalid: Dict[str, float] = {}
+        for node_id in node_ids:
+            total = self.outgoing_sum(node_id)
+            if total > 0.0 and abs(total - 1.0) > tolerance:
+                invalid[node_id] = total
+        return invalid
@@ -0,0 +1,169 @@
+"""Scenariusze „co jeśli” sąsiadujące z bieżącą konfiguracją sieci.
+
+Typowe edycje w GUI to małe kroki: ±1 serwer w węźle, ±10% intensywności
+obsługi, ±1 klient w populacji klasy. Ten moduł:
+
+- wylicza odcisk konfiguracji (`config_fingerprint`) obejmujący tylko
+  parametry wpływające na wynik SUM (liczby zmiennoprzecinkowe zaokrąglane
+  do 9 cyfr znaczących, aby np. 2.0 · 1.1 i wpisane ręcznie 2.2 dawały ten
+  sam odcisk),
+- generuje leniwie konfiguracje sąsiednie (`neighbour_configs`) – płytkie
+  kopie z jedną zmienioną wartością, dzielące routing z migawką
+  konfiguracji bazowej (edycje „w miejscu” bieżącej konfiguracji nie
+  zmieniają więc sąsiadów i ich odcisków),
+- przechowuje wyniki w ograniczonej pamięci podręcznej LRU (`MetricsCache`).
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Dict, Iterator, Sequence, Tuple
+
+from bcmp.config_schema import NetworkConfig
+from bcmp.metrics import NetworkMetrics
+
+
+RATE_STEP = 0.10
+
+
+def _number(value: float | int | None) -> str | None:
+    return None if value is None else f"{float(value):.9g}"
+
+
+def routing_digest(config: NetworkConfig) -> str:
+    """Skrót routingu (niezależny od kolejności wpisów)."""
+
+    digest = hashlib.blake2b(digest_size=16)
+    for class_id in sorted(config.routing_per_class):
+        edges = sorted(
+            (entry.from_node_id, entry.to_node_id, _number(entry.probability))
+            for entry in config.routing_per_class[class_id]
+            if entry.probability != 0.0
+        )
+        digest.update(json.dumps([class_id, edges]).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def config_fingerprint(config: NetworkConfig, routing: str | None = None) -> str:
+    """Odcisk parametrów konfiguracji istotnych dla metody SUM.
+
+    `routing` pozwala podać gotowy `routing_digest` (np. dla wielu sąsiadów
+    jednej konfiguracji, które routingu nie zmieniają).
+    """
+
+    payload = [
+        [
+            node.id,
+            node.node_type,
+            node.servers,
+            sorted((class_id, _number(rate)) for class_id, rate in node.service_rates_per_class.items()),
+        ]
+        for node in config.nodes
+    ]
+    payload.append([[cls.id, cls.population] for cls in config.classes])
+    payload.append(routing if routing is not None else routing_digest(config))
+    return hashlib.blake2b(json.dumps(payload).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _with_node(config: NetworkConfig, index: int, **changes) -> NetworkConfig:
+    nodes = list(config.nodes)
+    nodes[index] = replace(nodes[index], **changes)
+    return replace(config, nodes=nodes)
+
+
+def neighbour_configs(
+    config: NetworkConfig,
+    node_order: Sequence[str] | None = None,
+) -> Iterator[Tuple[str, NetworkConfig]]:
+    """Generuje `(odcisk, konfiguracja)` scenariuszy różniących się jedną edycją.
+
+    Kolejność: populacje klas, potem węzły w kolejności `node_order`
+    (np. od najbardziej obciążonych) – liczba serwerów, a następnie
+    intensywności obsługi poszczególnych klas.
+
+    Migawka `config` (wraz z odciskiem routingu) powstaje od razu przy
+    wywołaniu, a nie przy pobraniu pierwszego sąsiada – późniejsze edycje
+    konfiguracji nie trafiają do scenariuszy pod starym odciskiem.
+    """
+
+    base = copy.deepcopy(config)
+    return _neighbours(base, routing_digest(base), node_order)
+
+
+def _neighbours(
+    config: NetworkConfig,
+    routing: str,
+    node_order: Sequence[str] | None,
+) -> Iterator[Tuple[str, NetworkConfig]]:
+
+    for index, cls in enumerate(config.classes):
+        for delta in (1, -1):
+            population = cls.population + delta
+            if population < 1:
+                continue
+            classes = list(config.classes)
+            classes[index] = replace(cls, population=population)
+            neighbour = replace(config, classes=classes)
+            yield config_fingerprint(neighbour, routing), neighbour
+
+    positions: Dict[str, int] = {node.id: index for index, node in enumerate(config.nodes)}
+    order = list(dict.fromkeys(node_id for node_id in (node_order or []) if node_id in positions))
+    ordered = set(order)
+    order += [node.id for node in config.nodes if node.id not in ordered]
+
+    for node_id in order:
+        index = positions[node_id]
+        node = config.nodes[index]
+        if node.node_type != "IS" and node.servers is not None:
+            for delta in (1, -1):
+                servers = node.servers + delta
+                if servers >= 1:
+                    neighbour = _with_node(config, index, servers=servers)
+                    yield config_fingerprint(neighbour, routing), neighbour
+
+        for class_id, rate in node.service_rates_per_class.items():
+            if rate <= 0:
+                continue
+            for factor in (1.0 + RATE_STEP, 1.0 - RATE_STEP):
+                rates = dict(node.service_rates_per_class)
+                rates[class_id] = float(_number(rate * factor))
+                neighbour = _with_node(config, index, service_rates_per_class=rates)
+                yield config_fingerprint(neighbour, routing), neighbour
+
+
+class MetricsCache:
+    """Pamięć podręczna LRU wyników SUM indeksowana odciskiem konfiguracji."""
+
+    def __init__(self, capacity: int = 512) -> None:
+        self.capacity = capacity
+        self._entries: "OrderedDict[str, NetworkMetrics]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, fingerprint: str) -> bool:
+        return fingerprint in self._entries
+
+    def get(self, fingerprint: str) -> NetworkMetrics | None:
+        metrics = self._entries.get(fingerprint)
+        if metrics is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(fingerprint)
+        return metrics
+
+    def put(self, fingerprint: str, metrics: NetworkMetrics) -> None:
+        self._entries[fingerprint] = metrics
+        self._entries.move_to_end(fingerprint)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
@@ -0,0 +1,227 @@
+"""Eksport bieżącego stanu węzłów do pamięci współdzielonej.
+
+Inne procesy (panele, prototypy alertów) mogą czytać stan działającej
+symulacji bez kopiowania i bez jakiegokolwiek udziału symulatora.
+Blok `multiprocessing.shared_memory` ma układ:
+
+- nagłówek: `MAGIC`, wersja układu, liczba węzłów, liczba pól,
+  długość tablicy nazw, licznik sekwencji (seqlock), czas symulacji,
+- tablica nazw (JSON: identyfikatory węzłów i nazwy pól),
+- tablica float64 [węzeł × pole] aktualizowana w miejscu.
+
+Protokół seqlock: zapisujący zwiększa licznik do wartości nieparzystej,
+nadpisuje dane i zwiększa go ponownie do parzystej. Czytelnik kopiuje dane
+między dwoma odczytami licznika i ponawia próbę, jeśli licznik był
+nieparzysty lub się zmienił.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+import time
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
+from typing import TYPE_CHECKING, Dict, List, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from bcmp.simulation import TicketSimulation
+
+
+MAGIC = b"BCMPSHM1"
+LAYOUT_VERSION = 1
+_HEADER = struct.Struct("<8sIIII")  # magic, wersja, węzły, pola, długość nazw
+_SEQUENCE_OFFSET = 24  # u64, wyrównany do 8 bajtów
+_TIME_OFFSET = 32  # f8
+_NAMES_OFFSET = 40
+_ALIGNMENT = 8
+
+FIELDS = (
+    "queue_length",
+    "in_service",
+    "completed",
+    "preemptions",
+    "mean_queue_length",
+    "mean_system_length",
+    "utilization",
+    "mean_waiting_time",
+    "mean_system_time",
+)
+
+
+# Bloki utworzone w tym procesie – ich rejestracji w resource_tracker czytelnik nie może usuwać.
+_OWNED: set[str] = set()
+
+
+def _data_offset(names_length: int) -> int:
+    raw = _NAMES_OFFSET + names_length
+    return (raw + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+@dataclass
+class LiveState:
+    """Spójny odczyt bloku: numer wersji, czas symulacji i wartości [węzeł × pole]."""
+
+    sequence: int
+    time: float
+    node_ids: List[str]
+    fields: List[str]
+    values: np.ndarray
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        return {
+            node_id: dict(zip(self.fields, row.tolist())) for node_id, row in zip(self.node_ids, self.values)
+        }
+
+
+class SharedStateExporter:
+    """Właściciel bloku pamięci współdzielonej zasilanego przez symulację.
+
+    Po `attach(simulation)` blok aktualizowany jest po krokach symulacji,
+    nie częściej niż co `min_interval` sekund czasu rzeczywistego (koszt
+    O(liczba węzłów) na aktualizację), oraz zawsze po jej zatrzymaniu –
+    czytelnicy widzą więc stan końcowy przebiegu lub stan z chwili pauzy.
+    """
+
+    def __init__(self, node_ids: Sequence[str], name: str | None = None, min_interval: float = 0.05) -> None:
+        self.node_ids = list(node_ids)
+        self.min_interval = min_interval
+        self._last_publish = float("-inf")
+        names = json.dumps({"node_ids": self.node_ids, "fields": list(FIELDS)}).encode("utf-8")
+        data_offset = _data_offset(len(names))
+        size = data_offset + len(self.node_ids) * len(FIELDS) * 8
+
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        _OWNED.add(self.shm.name)
+        buffer = self.shm.buf
+        _HEADER.pack_into(buffer, 0, MAGIC, LAYOUT_VERSION, len(self.node_ids), len(FIELDS), len(names))
+        buffer[_NAMES_OFFSET : _NAMES_OFFSET + len(names)] = names
+
+        self._sequence = np.ndarray((1,), dtype=np.uint64, buffer=buffer, offset=_SEQUENCE_OFFSET)
+        self._time = np.ndarray((1,), dtype=np.float64, buffer=buffer, offset=_TIME_OFFSET)
+        self.values = np.ndarray(
+            (len(self.node_ids), len(FIELDS)), dtype=np.float64, buffer=buffer, offset=data_offset
+        )
+        self._sequence[0] = 0
+        self.values[:] = 0.0
+        self._simulation: "TicketSimulation | None" = None
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def attach(self, simulation: "TicketSimulation") -> None:
+        self.detach()
+        self._simulation = simulation
+        simulation.add_step_listener(self._on_step)
+        self.publish(simulation)
+
+    def detach(self) -> None:
+        if self._simulation is not None:
+            self._simulation.remove_step_listener(self._on_step)
+            self._simulation = None
+
+    def _on_step(self, simulation: "TicketSimulation") -> None:
+        now = time.monotonic()
+        if not simulation.running or now - self._last_publish >= self.min_interval:
+            self._last_publish = now
+            self.publish(simulation)
+
+    def publish(self, simulation: "TicketSimulation") -> None:
+        """Zapisuje bieżący stan węzłów w miejscu (protokół seqlock)."""
+
+        rows = []
+        for node_id in self.node_ids:
+            state = simulation.node_state[node_id]
+            total_time = state.total_time
+            servers = simulation.network.nodes[node_id].config.servers
+            completed = state.completed
+            rows.append(
+                (
+                    len(state.queue),
+                    len(state.in_service),
+                    completed,
+                    state.preemptions,
+                    state.queue_area / total_time if total_time > 0 else 0.0,
+                    state.system_area / total_time if total_time > 0 else 0.0,
+                    state.busy_area / total_time / servers if total_time > 0 and servers else 0.0,
+                    state.waiting_time_total / completed if completed else 0.0,
+                    state.system_time_total / completed if completed else 0.0,
+                )
+            )
+
+        self._sequence[0] += 1
+        self.values[:] = rows
+        self._time[0] = simulation.current_time
+        self._sequence[0] += 1
+
+    def close(self, unlink: bool = True) -> None:
+        self.detach()
+        # Widoki NumPy trzymają eksport bufora – trzeba je zwolnić przed zamknięciem.
+        del self._sequence, self._time, self.values
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+            _OWNED.discard(self.shm.name)
+
+
+def _attach_untracked(name: str) -> shared_memory.SharedMemory:
+    # Czytelnik nie jest właścicielem bloku – nie może go usuwać przy zakończeniu procesu.
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python ≥ 3.13
+    except TypeError:
+        pass
+    shm = shared_memory.SharedMemory(name=name)
+    if os.name == "posix" and shm.name not in _OWNED:
+        # Śledzone są nazwy POSIX (z wiodącym „/”), a `name` podaje ją bez niego.
+        resource_tracker.unregister(f"/{shm.name}", "shared_memory")
+    return shm
+
+
+class SharedStateReader:
+    """Klient tylko do odczytu bloku utworzonego przez `SharedStateExporter`."""
+
+    def __init__(self, name: str) -> None:
+        self.shm = _attach_untracked(name)
+
+        buffer = self.shm.buf
+        magic, version, node_count, field_count, names_length = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Blok {name} nie zawiera stanu symulacji")
+        if version != LAYOUT_VERSION:
+            raise ValueError(f"Nieobsługiwana wersja układu pamięci współdzielonej: {version}")
+        names = json.loads(bytes(buffer[_NAMES_OFFSET : _NAMES_OFFSET + names_length]).decode("utf-8"))
+
+        self.node_ids: List[str] = names["node_ids"]
+        self.fields: List[str] = names["fields"]
+        self._sequence = np.ndarray((1,), dtype=np.uint64, buffer=buffer, offset=_SEQUENCE_OFFSET)
+        self._time = np.ndarray((1,), dtype=np.float64, buffer=buffer, offset=_TIME_OFFSET)
+        self._values = np.ndarray(
+            (node_count, field_count), dtype=np.float64, buffer=buffer, offset=_data_offset(names_length)
+        )
+
+    @property
+    def sequence(self) -> int:
+        """Bieżący licznik sekwencji – tani sposób na sprawdzenie, czy coś się zmieniło."""
+
+        return int(self._sequence[0])
+
+    def read(self, max_attempts: int = 1000) -> LiveState:
+        """Zwraca spójną kopię stanu (ponawia odczyt, gdy trafi na trwający zapis)."""
+
+        for _ in range(max_attempts):
+            before = int(self._sequence[0])
+            if before % 2:
+                continue
+            values = self._values.copy()
+            time = float(self._time[0])
+            if int(self._sequence[0]) == before:
+                return LiveState(before // 2, time, self.node_ids, self.fields, values)
+        raise RuntimeError("Nie udało się uzyskać spójnego odczytu pamięci współdzielonej")
+
+    def close(self) -> None:
+        del self._sequence, self._time, self._values
+        self.shm.close()
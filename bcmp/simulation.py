@@ -8,33 +8,121 @@ obsługi.
 
 from __future__ import annotations
 
-import random
+import heapq
+import time
+from collections import deque
 from dataclasses import dataclass, field
-from typing import Dict, List, Tuple
-
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from bcmp import checkpoint
+from bcmp.distributions import unit_mean_sampler
+from bcmp.empirical_service import EmpiricalServiceTimes
+from bcmp.events import (
+    EVENT_CYCLE,
+    EVENT_DTYPE,
+    EVENT_PREEMPT,
+    EVENT_ROUTE,
+    EVENT_SPAWN,
+    EVENT_START,
+    NO_NODE,
+    EventLog,
+)
+from bcmp.history import QueueHistory
 from bcmp.network import BCMPNetwork
-from bcmp.metrics import NodePerformanceSummary
-
-
-@dataclass
-class Ticket:
-    """Reprezentuje pojedyncze zgłoszenie w symulacji."""
-
-    id: int
-    class_id: str
-    current_node: str
-    remaining_service: float = 0.0
-    enqueued_at: float = 0.0
-    started_at: float = 0.0
+from bcmp.metrics import (
+    LatencyStats,
+    NodeClassLatency,
+    NodeClassMetrics,
+    NodePerformanceSummary,
+)
+from bcmp.random_streams import DEFAULT_BLOCK_SIZE, RandomStreams
+from bcmp.steady_state import SteadyStateEstimate, SteadyStateMonitor
+from bcmp.streaming import LatencyMatrix
+from bcmp.trace import TraceRecorder
+from bcmp.ticket_store import TicketStore
+
+
+_LOWEST_PRIORITY = 1_000_000
+_VERSION_MARKS = 4096
+ENTRY_NODE = "INTAKE"
+
+
+class TicketQueue:
+    """Kolejka węzła z osobną kolejką FIFO dla każdego poziomu priorytetu.
+
+    Niepuste poziomy trzymane są w kopcu, więc pobranie zgłoszenia o
+    najwyższym priorytecie kosztuje O(log P) niezależnie od długości kolejki.
+    Przy jednym poziomie (dyscyplina FIFO) zachowuje się jak zwykła kolejka.
+    Elementami są identyfikatory zgłoszeń z `TicketStore`.
+    """
+
+    def __init__(self) -> None:
+        self._levels: Dict[int, Deque[int]] = {}
+        self._active: List[int] = []
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[int]:
+        for priority in sorted(self._active):
+            yield from self._levels[priority]
+
+    def push(self, ticket_id: int, priority: int = 0) -> None:
+        self._level(priority).append(ticket_id)
+        self._size += 1
+
+    def extend(self, ticket_ids: Iterable[int], priority: int = 0) -> None:
+        """Dopisuje wiele zgłoszeń jednego poziomu naraz (np. wstrzykniętą populację)."""
+
+        ticket_ids = list(ticket_ids)
+        if ticket_ids:
+            self._level(priority).extend(ticket_ids)
+            self._size += len(ticket_ids)
+
+    def push_front(self, ticket_id: int, priority: int = 0) -> None:
+        """Wstawia zgłoszenie na początek swojego poziomu (wznowienie po wywłaszczeniu)."""
+
+        self._level(priority).appendleft(ticket_id)
+        self._size += 1
+
+    def peek_priority(self) -> int | None:
+        return self._active[0] if self._active else None
+
+    def pop(self) -> int:
+        if not self._active:
+            raise IndexError("pop z pustej kolejki")
+        priority = self._active[0]
+        level = self._levels[priority]
+        ticket_id = level.popleft()
+        if not level:
+            heapq.heappop(self._active)
+        self._size -= 1
+        return ticket_id
+
+    def clear(self) -> None:
+        self._levels.clear()
+        self._active.clear()
+        self._size = 0
+
+    def _level(self, priority: int) -> Deque[int]:
+        level = self._levels.get(priority)
+        if level is None:
+            level = deque()
+            self._levels[priority] = level
+        if not level:
+            heapq.heappush(self._active, priority)
+        return level
 
 
 @dataclass
 class NodeRuntimeState:
     """Stan węzła w trakcie symulacji."""
 
-    in_service: List[Ticket] = field(default_factory=list)
-    queue: List[Ticket] = field(default_factory=list)
-    queue_history: List[Tuple[float, int]] = field(default_factory=list)
+    in_service: List[int] = field(default_factory=list)
+    queue: TicketQueue = field(default_factory=TicketQueue)
     total_time: float = 0.0
     queue_area: float = 0.0
     system_area: float = 0.0
@@ -42,46 +130,132 @@ class NodeRuntimeState:
     waiting_time_total: float = 0.0
     system_time_total: float = 0.0
     completed: int = 0
+    preemptions: int = 0
 
 
 @dataclass
 class SimulationSnapshot:
-    """Agregat stanu przekazywany do GUI."""
+    """Agregat stanu przekazywany do GUI.
+
+    Migawka przyrostowa (`full = False`, wynik `snapshot(since_version=v)`)
+    zawiera stany węzłów zmienionych po wersji `v`, nowe zdarzenia, nowe
+    punkty historii kolejek oraz bieżące metryki wszystkich węzłów;
+    `version` należy przekazać w kolejnym wywołaniu.
+    """
 
     node_states: Dict[str, Tuple[int, int]]
     events: List[str]
     queue_history: Dict[str, List[Tuple[float, int]]]
     empirical_metrics: Dict[str, NodePerformanceSummary]
+    version: int = 0
+    full: bool = True
 
 
 class TicketSimulation:
-    """Symulator tickowy na potrzeby wizualizacji GUI."""
-
-    def __init__(self, network: BCMPNetwork, seed: int | None = None) -> None:
+    """Symulator tickowy na potrzeby wizualizacji GUI.
+
+    Zgłoszenia przechowywane są kolumnowo w `TicketStore`, a kolejki węzłów
+    zawierają jedynie ich identyfikatory, co pozwala symulować populacje
+    rzędu milionów zgłoszeń.
+
+    Czasy obsługi i decyzje routingu losowane są z niezależnych strumieni
+    (osobno dla każdej pary węzeł–klasa) generowanych blokami po
+    `rng_block_size` wartości; ten sam `seed` daje ten sam przebieg.
+
+    Zdarzenia trafiają do bufora pierścieniowego `event_log` jako zwarte
+    rekordy; tekst komunikatów powstaje dopiero w `snapshot()`. Przy
+    `log_events=False` (np. przebiegi bez GUI) dziennik jest wyłączony.
+
+    Gdy podano `service_times`, czasy obsługi par (węzeł, klasa) obecnych
+    w danych empirycznych losowane są z ich odwrotnej dystrybuanty zamiast
+    z rozkładu wykładniczego.
+
+    Pełny stan (zgłoszenia, kolejki, akumulatory, strumienie losowe, zegar)
+    można zapisać w punkcie kontrolnym (`save_checkpoint`, `to_bytes`),
+    a następnie wznowić przebieg (`load_checkpoint`) lub rozgałęzić go na
+    warianty „co, jeśli” (`fork`) współdzielące kosztowny rozbieg. Historia
+    długości kolejek służy tylko do podglądu, więc trafia do punktu
+    kontrolnego jedynie przy `checkpoint_history=True`; bez niej odtworzony
+    przebieg zaczyna historię od nowa.
+    """
+
+    def __init__(
+        self,
+        network: BCMPNetwork,
+        seed: int | None = None,
+        rng_block_size: int = DEFAULT_BLOCK_SIZE,
+        observation_window: float = 1.0,
+        event_log_capacity: int = 200,
+        log_events: bool = True,
+        service_times: EmpiricalServiceTimes | None = None,
+        latency_quantiles: bool = True,
+        checkpoint_history: bool = False,
+    ) -> None:
         self.network = network
-        self.random = random.Random(seed)
-        self._ticket_counter = 0
-        self._events: List[str] = []
+        self.checkpoint_history = checkpoint_history
+        self.latency_quantiles = latency_quantiles
+        self.service_times = service_times
+        self.streams = RandomStreams(seed, block_size=rng_block_size)
+        self.event_log = EventLog(event_log_capacity, enabled=log_events)
+        self.trace: TraceRecorder | None = None
+        self.step_listeners: List[Callable[["TicketSimulation"], None]] = []
+        self.autosave_path: str | None = None
+        self.autosave_interval = 0.0
+        self._last_autosave = 0.0
         self.running = False
         self.current_time = 0.0
 
         self.node_state: Dict[str, NodeRuntimeState] = {
             node_id: NodeRuntimeState() for node_id in self.network.nodes
         }
-        self.tickets: List[Ticket] = []
+        self.tickets = TicketStore(
+            [class_config.id for class_config in self.network.config.classes],
+            list(self.network.nodes),
+        )
+        self.steady_state = SteadyStateMonitor(list(self.node_state), window=observation_window)
+        self.history = QueueHistory(list(self.node_state))
+
+        # Wersjonowanie na potrzeby migawek przyrostowych: numer wersji rośnie
+        # z każdym krokiem, a `_node_versions` pamięta ostatnią zmianę węzła.
+        self.version = 0
+        self._reset_version = 0
+        self._node_versions: List[int] = [0] * len(self.node_state)
+        self._version_marks: Deque[Tuple[int, int, int]] = deque(maxlen=_VERSION_MARKS)
+        self._metrics_cache: Tuple[int, Dict[str, NodePerformanceSummary]] | None = None
+        self._priorities: List[int] = [
+            self._class_priority(class_id) for class_id in self.tickets.class_ids
+        ]
+        self._reset_class_statistics()
 
     # ------------------------------------------------------------------
     # Public API
     # ------------------------------------------------------------------
     def reset(self) -> None:
-        self._ticket_counter = 0
-        self._events.clear()
+        self.event_log.clear()
         self.tickets.clear()
         self.current_time = 0.0
+        self._priorities = [self._class_priority(class_id) for class_id in self.tickets.class_ids]
         for state in self.node_state.values():
             state.in_service.clear()
             state.queue.clear()
-            state.queue_history.clear()
+        self.history.clear()
+        self.reset_statistics()
+        self.version += 1
+        self._reset_version = self.version
+        self._version_marks.clear()
+        self._node_versions = [self.version] * len(self.node_state)
+
+    def reset_statistics(self) -> None:
+        """Zeruje akumulatory metryk bez naruszania stanu sieci.
+
+        Służy do odrzucenia okresu rozbiegowego (warm-up): zgłoszenia
+        pozostają w kolejkach, a średnie liczone są od bieżącej chwili.
+        """
+
+        self._metrics_cache = None
+        self.steady_state.reset()
+        self._reset_class_statistics()
+        for state in self.node_state.values():
             state.total_time = 0.0
             state.queue_area = 0.0
             state.system_area = 0.0
@@ -89,15 +263,129 @@ class TicketSimulation:
             state.waiting_time_total = 0.0
             state.system_time_total = 0.0
             state.completed = 0
+            state.preemptions = 0
+
+    def _reset_class_statistics(self) -> None:
+        # Akumulatory strumieniowe indeksowane [węzeł, klasa] oraz [0, klasa].
+        node_count = len(self.tickets.node_ids)
+        class_count = len(self.tickets.class_ids)
+        quantiles = self.latency_quantiles
+        self._waiting_stats = LatencyMatrix(node_count, class_count, quantiles)
+        self._response_stats = LatencyMatrix(node_count, class_count, quantiles)
+        self._cycle_stats = LatencyMatrix(1, class_count, quantiles)
+        # Suma i liczba wylosowanych czasów obsługi per węzeł i klasa.
+        self._service_work = np.zeros((node_count, class_count))
+        self._service_draws = np.zeros((node_count, class_count), dtype=np.int64)
+
+    def attach_trace(self, path: str) -> TraceRecorder:
+        """Włącza zapis pełnego strumienia zdarzeń do binarnego pliku śladu."""
+
+        self.detach_trace()
+        self.trace = TraceRecorder(path, self.tickets.class_ids, self.tickets.node_ids)
+        return self.trace
+
+    def detach_trace(self) -> None:
+        """Kończy zapis śladu, dopisując zbuforowane rekordy.
+
+        Ślad zamknięty bezpośrednio (`close()` lub blok `with`) jest odłączany
+        automatycznie na początku następnego kroku.
+        """
+
+        if self.trace is not None:
+            self.trace.close()
+            self.trace = None
+
+    # ------------------------------------------------------------------
+    # Punkty kontrolne
+    # ------------------------------------------------------------------
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        # Otwarty plik śladu i obserwatorzy kroków nie są częścią stanu –
+        # po odtworzeniu trzeba je podłączyć ponownie.
+        state["trace"] = None
+        state["step_listeners"] = []
+        if not self.checkpoint_history:
+            # Znaczniki wersji wskazują pozycje w historii – bez niej migawka po odtworzeniu jest pełna.
+            state["history"] = self.history.empty_copy()
+            state["_version_marks"] = deque(maxlen=_VERSION_MARKS)
+        return state
+
+    def to_bytes(self, compress: bool = True) -> bytes:
+        """Serializuje pełny stan symulacji do zwartej postaci binarnej."""
+
+        if self.trace is not None:
+            self.trace.flush()
+        return checkpoint.dumps(self, compress)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "TicketSimulation":
+        return checkpoint.loads(data, cls)
+
+    def save_checkpoint(self, path: str, compress: bool = True) -> None:
+        """Zapisuje punkt kontrolny do pliku (atomowo)."""
+
+        if self.trace is not None:
+            self.trace.flush()
+        checkpoint.save(path, self, compress)
+
+    @classmethod
+    def load_checkpoint(cls, path: str) -> "TicketSimulation":
+        """Odtwarza symulację z pliku; dalsze `run()` kontynuuje przebieg od zapisanej chwili."""
+
+        return checkpoint.load(path, cls)
+
+    def fork(self, seed: int | None = None) -> "TicketSimulation":
+        """Tworzy niezależną kopię bieżącego stanu (gałąź „co, jeśli”).
+
+        Bez `seed` gałąź korzysta z tych samych strumieni losowych co
+        oryginał (wspólne liczby losowe dla porównań wariantów); podanie
+        `seed` daje niezależną kontynuację. Parametry wariantu zmienia się
+        przez `branch.network` – jest to osobna kopia sieci.
+        """
+
+        branch = self.from_bytes(self.to_bytes(compress=False))
+        if seed is not None:
+            branch.streams = RandomStreams(seed, block_size=self.streams.block_size)
+        return branch
+
+    def enable_autosave(self, path: str | None, interval: float = 300.0) -> None:
+        """Zapisuje punkt kontrolny co `interval` sekund czasu rzeczywistego w `run*()`.
+
+        `path=None` wyłącza automatyczny zapis.
+        """
+
+        if interval <= 0:
+            raise ValueError("Odstęp automatycznego zapisu musi być dodatni")
+        self.autosave_path = path
+        self.autosave_interval = interval
+        self._last_autosave = time.monotonic()
+
+    def add_step_listener(self, listener: Callable[["TicketSimulation"], None]) -> None:
+        """Rejestruje funkcję wywoływaną po każdym kroku (np. eksport stanu).
+
+        Funkcja wywoływana jest także po zatrzymaniu symulacji (koniec
+        `run()`, pauza) – wtedy `running` ma już wartość False.
+        """
+
+        self.step_listeners.append(listener)
+
+    def remove_step_listener(self, listener: Callable[["TicketSimulation"], None]) -> None:
+        if listener in self.step_listeners:
+            self.step_listeners.remove(listener)
 
     def start(self) -> None:
         self.running = True
 
     def stop(self) -> None:
-        self.running = False
+        was_running, self.running = self.running, False
+        if was_running:
+            self._notify_step_listeners()
 
     def toggle(self) -> None:
-        self.running = not self.running
+        if self.running:
+            self.stop()
+        else:
+            self.start()
 
     def step(self, elapsed_seconds: float) -> None:
         """Wykonuje pojedynczy krok symulacji.
@@ -109,15 +397,138 @@ class TicketSimulation:
 
         if not self.running:
             return
+        if self.trace is not None and self.trace.closed:
+            # Ślad zamknięty poza `detach_trace` (np. blokiem `with`) – odłączamy go.
+            self.trace = None
 
+        self.version += 1
+        self._version_marks.append((self.version, self.event_log.total, self.history.total))
         self._spawn_missing_tickets()
         self._assign_servers()
         self._record_interval(elapsed_seconds)
         end_time = self.current_time + elapsed_seconds
         self._progress_service(elapsed_seconds, end_time)
         self.current_time = end_time
+        self.steady_state.advance(elapsed_seconds)
+        self._notify_step_listeners()
+
+    def _notify_step_listeners(self) -> None:
+        for listener in self.step_listeners:
+            listener(self)
+
+    def run(self, duration: float, time_step: float = 0.1, warmup: float = 0.0) -> None:
+        """Wykonuje przebieg bez GUI: `warmup` sekund rozbiegu, potem `duration` sekund pomiaru."""
+
+        if time_step <= 0:
+            raise ValueError("Krok czasu musi być dodatni")
+
+        self.start()
+        self._advance(warmup, time_step)
+        if warmup > 0:
+            self.reset_statistics()
+        self._advance(duration, time_step)
+        self.stop()
+
+    def run_until_precision(
+        self,
+        relative_precision: float = 0.05,
+        *,
+        time_step: float = 0.1,
+        confidence: float = 0.95,
+        min_duration: float = 100.0,
+        max_duration: float = 100_000.0,
+        check_every: float = 50.0,
+    ) -> Dict[str, SteadyStateEstimate]:
+        """Symuluje, aż przedziały ufności L i W każdego węzła będą dostatecznie wąskie.
+
+        Co `check_every` sekund symulacji wyznaczane są estymaty stanu
+        ustalonego (MSER-5 + batch means); przebieg kończy się, gdy dla każdego
+        węzła połowa szerokości przedziału nie przekracza `relative_precision`
+        średniej, lub po `max_duration` sekundach. Węzły bez zakończonych
+        obsług (np. nieodwiedzane) nie mają estymaty W i nie wstrzymują
+        zakończenia – liczy się dla nich tylko L.
+        """
 
-    def snapshot(self, max_events: int = 15) -> SimulationSnapshot:
+        if relative_precision <= 0:
+            raise ValueError("Wymagana precyzja względna musi być dodatnia")
+
+        self.start()
+        started_at = self.current_time
+        estimates = self.steady_state.estimates(confidence)
+        while self.current_time - started_at < max_duration:
+            self._advance(min(check_every, max_duration - (self.current_time - started_at)), time_step)
+            if self.current_time - started_at < min_duration:
+                continue
+            estimates = self.steady_state.estimates(confidence)
+            if all(estimate.relative_precision() <= relative_precision for estimate in estimates.values()):
+                break
+        self.stop()
+        return self.steady_state.estimates(confidence)
+
+    def steady_state_performance(self, confidence: float = 0.95) -> Dict[str, SteadyStateEstimate]:
+        """Zwraca estymaty L i W po odrzuceniu okresu przejściowego (MSER-5)."""
+
+        return self.steady_state.estimates(confidence)
+
+    def _advance(self, duration: float, time_step: float) -> None:
+        end_time = self.current_time + duration
+        while self.current_time < end_time - 1e-12:
+            self.step(min(time_step, end_time - self.current_time))
+            if self.autosave_path is not None and time.monotonic() - self._last_autosave >= self.autosave_interval:
+                self.save_checkpoint(self.autosave_path)
+                self._last_autosave = time.monotonic()
+
+    def snapshot(self, max_events: int = 15, since_version: int | None = None) -> SimulationSnapshot:
+        """Zwraca migawkę stanu – pełną albo przyrostową względem `since_version`.
+
+        Migawka przyrostowa obejmuje węzły, w których od tej wersji zmieniła
+        się kolejka lub obsługa, zdarzenia zarejestrowane później (najwyżej
+        `max_events`) i nowe punkty historii kolejek. Metryki empiryczne są
+        średnimi po czasie, zmieniają się więc w każdym kroku – przeliczane
+        są dla wszystkich węzłów (koszt O(liczba węzłów)). Jeśli
+        wersja jest zbyt stara (np. sprzed resetu), zwracana jest migawka pełna.
+        """
+
+        marks = self._version_marks
+        if (
+            since_version is None
+            or since_version < self._reset_version
+            or since_version > self.version
+            or (since_version < self.version and (not marks or since_version + 1 < marks[0][0]))
+        ):
+            return self._full_snapshot(max_events)
+
+        if since_version == self.version:
+            return SimulationSnapshot({}, [], {}, {}, version=self.version, full=False)
+
+        _, event_total, history_total = marks[since_version + 1 - marks[0][0]]
+        changed = [
+            node_id
+            for node_id, node_version in zip(self.node_state, self._node_versions)
+            if node_version > since_version
+        ]
+        new_events = min(self.event_log.total - event_total, max_events)
+        history: Dict[str, List[Tuple[float, int]]] = {}
+        new_points = self.history.total - history_total
+        if new_points > 0:
+            times, lengths = self.history.last(new_points)
+            times = times.tolist()
+            for node_idx, node_id in enumerate(self.node_state):
+                history[node_id] = list(zip(times, lengths[:, node_idx].astype(int).tolist()))
+
+        return SimulationSnapshot(
+            node_states={
+                node_id: (len(self.node_state[node_id].queue), len(self.node_state[node_id].in_service))
+                for node_id in changed
+            },
+            events=self.event_log.format_last(new_events, self.tickets.class_ids, self.tickets.node_ids),
+            queue_history=history,
+            empirical_metrics={node_id: self._node_performance(node_id) for node_id in self.node_state},
+            version=self.version,
+            full=False,
+        )
+
+    def _full_snapshot(self, max_events: int) -> SimulationSnapshot:
         node_states = {
             node_id: (
                 len(state.queue),
@@ -125,123 +536,315 @@ class TicketSimulation:
             )
             for node_id, state in self.node_state.items()
         }
-        events = self._events[-max_events:]
+        events = self.event_log.format_last(max_events, self.tickets.class_ids, self.tickets.node_ids)
         return SimulationSnapshot(
             node_states=node_states,
             events=events,
-            queue_history={node_id: state.queue_history for node_id, state in self.node_state.items()},
+            queue_history={
+                node_id: self.history.points(node_id, len(self.history.raw)) for node_id in self.node_state
+            },
             empirical_metrics=self.empirical_performance(),
+            version=self.version,
         )
 
     def empirical_performance(self) -> Dict[str, NodePerformanceSummary]:
-        """Zwraca empiryczne metryki kolejki na podstawie zebranych danych."""
+        """Zwraca empiryczne metryki kolejki na podstawie zebranych danych.
 
-        metrics: Dict[str, NodePerformanceSummary] = {}
-        for node_id, state in self.node_state.items():
-            total_time = state.total_time if state.total_time > 0 else max(self.current_time, 1e-6)
-            mean_queue_length = state.queue_area / total_time if total_time > 0 else 0.0
-            mean_system_length = state.system_area / total_time if total_time > 0 else 0.0
-            servers = self.network.nodes[node_id].config.servers
-            server_capacity = servers if servers is not None else 0
-            busy = state.busy_area / total_time if total_time > 0 else 0.0
-            utilization = busy / server_capacity if server_capacity else 0.0
-
-            arrival_rate = state.completed / total_time if total_time > 0 else 0.0
-            mean_waiting = (
-                state.waiting_time_total / state.completed
-                if state.completed > 0
-                else (mean_queue_length / arrival_rate if arrival_rate > 0 else 0.0)
-            )
-            mean_system = (
-                state.system_time_total / state.completed
-                if state.completed > 0
-                else (mean_system_length / arrival_rate if arrival_rate > 0 else 0.0)
-            )
+        Wynik jest zapamiętywany do następnego kroku symulacji.
+        """
 
-            metrics[node_id] = NodePerformanceSummary(
-                mean_queue_length=mean_queue_length,
-                mean_system_length=mean_system_length,
-                mean_waiting_time=mean_waiting,
-                mean_system_time=mean_system,
-                utilization=utilization,
-            )
+        cache = self._metrics_cache
+        if cache is not None and cache[0] == self.version:
+            return dict(cache[1])
+        metrics = {node_id: self._node_performance(node_id) for node_id in self.node_state}
+        self._metrics_cache = (self.version, metrics)
+        return dict(metrics)
+
+    def _node_performance(self, node_id: str) -> NodePerformanceSummary:
+        state = self.node_state[node_id]
+        total_time = state.total_time if state.total_time > 0 else max(self.current_time, 1e-6)
+        mean_queue_length = state.queue_area / total_time if total_time > 0 else 0.0
+        mean_system_length = state.system_area / total_time if total_time > 0 else 0.0
+        servers = self.network.nodes[node_id].config.servers
+        server_capacity = servers if servers is not None else 0
+        busy = state.busy_area / total_time if total_time > 0 else 0.0
+        utilization = busy / server_capacity if server_capacity else 0.0
+
+        arrival_rate = state.completed / total_time if total_time > 0 else 0.0
+        mean_waiting = (
+            state.waiting_time_total / state.completed
+            if state.completed > 0
+            else (mean_queue_length / arrival_rate if arrival_rate > 0 else 0.0)
+        )
+        mean_system = (
+            state.system_time_total / state.completed
+            if state.completed > 0
+            else (mean_system_length / arrival_rate if arrival_rate > 0 else 0.0)
+        )
 
+        return NodePerformanceSummary(
+            mean_queue_length=mean_queue_length,
+            mean_system_length=mean_system_length,
+            mean_waiting_time=mean_waiting,
+            mean_system_time=mean_system,
+            utilization=utilization,
+        )
+
+    def empirical_waiting_per_class(self) -> Dict[str, float]:
+        """Zwraca średni czas oczekiwania na jedną obsługę dla każdej klasy.
+
+        Pozwala ocenić zysk klas uprzywilejowanych (np. VIP) w węzłach
+        z dyscypliną priorytetową względem klas o niższym priorytecie.
+        Klasa bez żadnego zakończonego oczekiwania (np. zagłodzona przez
+        klasy o wyższym priorytecie) ma wartość NaN, a nie 0.
+        """
+
+        stats = self._waiting_stats
+        stats.flush()
+        counts = stats.counts.sum(axis=0)
+        totals = (stats.means * stats.counts).sum(axis=0)
+        return {
+            class_id: float(totals[class_idx] / counts[class_idx]) if counts[class_idx] else float("nan")
+            for class_idx, class_id in enumerate(self.tickets.class_ids)
+        }
+
+    def class_latency_statistics(self) -> Dict[str, Dict[str, NodeClassLatency]]:
+        """Zwraca rozkłady Wq i W (średnia, odchylenie, p50/p95/p99) per węzeł i klasa."""
+
+        return {
+            node_id: {
+                class_id: NodeClassLatency(
+                    waiting=self._waiting_stats.summary(node_idx, class_idx),
+                    response=self._response_stats.summary(node_idx, class_idx),
+                )
+                for class_idx, class_id in enumerate(self.tickets.class_ids)
+            }
+            for node_idx, node_id in enumerate(self.tickets.node_ids)
+        }
+
+    def cycle_time_statistics(self) -> Dict[str, LatencyStats]:
+        """Zwraca rozkład czasu pełnego cyklu (od wejścia do INTAKE do powrotu) per klasa."""
+
+        return {
+            class_id: self._cycle_stats.summary(0, class_idx)
+            for class_idx, class_id in enumerate(self.tickets.class_ids)
+        }
+
+    def empirical_class_metrics(self) -> Dict[str, Dict[str, NodeClassMetrics]]:
+        """Zwraca empiryczne metryki per węzeł i klasa w układzie `NodeMetrics.per_class`.
+
+        Przepustowość wyznaczana jest z liczby zakończonych obsług, a L i Lq
+        z prawa Little'a, dzięki czemu wynik można bezpośrednio porównać
+        z wartościami SUM. Czas obsługi i wykorzystanie pochodzą z faktycznie
+        wylosowanych czasów obsługi, więc uwzględniają dowolny rozkład
+        (także empiryczny), a nie tylko 1/μ. Czasy (i pochodne L, Lq) klasy
+        bez żadnej próbki w węźle mają wartość NaN – zagłodzenie klasy nie
+        wygląda jak zerowe oczekiwanie.
+        """
+
+        response_stats, waiting_stats = self._response_stats, self._waiting_stats
+        response_stats.flush()
+        waiting_stats.flush()
+        draws = np.maximum(self._service_draws, 1)
+        metrics: Dict[str, Dict[str, NodeClassMetrics]] = {}
+        for node_idx, (node_id, state) in enumerate(self.node_state.items()):
+            config = self.network.nodes[node_id].config
+            total_time = state.total_time if state.total_time > 0 else max(self.current_time, 1e-6)
+            per_class: Dict[str, NodeClassMetrics] = {}
+            for class_idx, class_id in enumerate(self.tickets.class_ids):
+                response = float(response_stats.means[node_idx, class_idx])
+                waiting = float(waiting_stats.means[node_idx, class_idx])
+                if not response_stats.counts[node_idx, class_idx]:
+                    response = float("nan")
+                if not waiting_stats.counts[node_idx, class_idx]:
+                    waiting = float("nan")
+                arrival_rate = int(response_stats.counts[node_idx, class_idx]) / total_time
+                work = float(self._service_work[node_idx, class_idx])
+                per_class[class_id] = NodeClassMetrics(
+                    mean_customers=arrival_rate * response,
+                    mean_response_time=response,
+                    mean_waiting_time=waiting,
+                    mean_queue_length=arrival_rate * waiting,
+                    service_time=work / draws[node_idx, class_idx],
+                    arrival_rate=arrival_rate,
+                    utilization=work / (total_time * config.servers) if config.servers else 0.0,
+                )
+            metrics[node_id] = per_class
         return metrics
 
     # ------------------------------------------------------------------
     # Internal helpers
     # ------------------------------------------------------------------
     def _spawn_missing_tickets(self) -> None:
-        for class_config in self.network.config.classes:
-            current = sum(1 for t in self.tickets if t.class_id == class_config.id)
-            missing = class_config.population - current
-            for _ in range(max(0, missing)):
-                ticket = self._create_ticket(class_config.id)
-                self.tickets.append(ticket)
-                self._enqueue("INTAKE", ticket)
-                self._log(
-                    f"{ticket.class_id}#{ticket.id} trafił do INTAKE (nowe zgłoszenie)"
-                )
-
-    def _create_ticket(self, class_id: str) -> Ticket:
-        self._ticket_counter += 1
-        return Ticket(id=self._ticket_counter, class_id=class_id, current_node="INTAKE")
+        store = self.tickets
+        missing_per_class = [
+            max(0, class_config.population - int(store.count_per_class[store.class_lookup[class_config.id]]))
+            for class_config in self.network.config.classes
+        ]
+        total_missing = sum(missing_per_class)
+        if total_missing == 0:
+            return
 
-    def _enqueue(self, node_id: str, ticket: Ticket) -> None:
-        ticket.current_node = node_id
-        ticket.enqueued_at = self.current_time
-        self.node_state[node_id].queue.append(ticket)
+        # Wstrzyknięcie hurtowe: kolumny ustawiane wektorowo, kolejka i dziennik dostają całe zakresy.
+        store.reserve(store.size + total_missing)
+        entry = store.node_lookup[ENTRY_NODE]
+        queue = self.node_state[ENTRY_NODE].queue
+        scheduling = self.network.nodes[ENTRY_NODE].config.scheduling
+        for class_config, missing in zip(self.network.config.classes, missing_per_class):
+            if missing == 0:
+                continue
+            ticket_ids = store.add_many(class_config.id, ENTRY_NODE, missing)
+            block = slice(ticket_ids.start, ticket_ids.stop)
+            for column in (store.cycle_started_at, store.enqueued_at, store.waiting_since):
+                column[block] = self.current_time
+            class_index = store.class_lookup[class_config.id]
+            queue.extend(ticket_ids, self._priorities[class_index] if scheduling != "FIFO" else 0)
+            self._log_many(EVENT_SPAWN, ticket_ids, class_index, to_node=entry)
+        self._node_versions[entry] = self.version
+
+    def _class_priority(self, class_id: str) -> int:
+        class_config = self.network.classes.get(class_id)
+        priority = class_config.config.priority if class_config is not None else None
+        # Klasy bez priorytetu obsługiwane są po wszystkich klasach priorytetowych.
+        return priority if priority is not None else _LOWEST_PRIORITY
+
+    def _enqueue(self, node_id: str, ticket_id: int) -> None:
+        store = self.tickets
+        store.node_index[ticket_id] = store.node_lookup[node_id]
+        store.enqueued_at[ticket_id] = self.current_time
+        store.waiting_since[ticket_id] = self.current_time
+        store.waited[ticket_id] = 0.0
+        store.remaining_service[ticket_id] = 0.0
+        scheduling = self.network.nodes[node_id].config.scheduling
+        priority = self._priority_of(ticket_id) if scheduling != "FIFO" else 0
+        self.node_state[node_id].queue.push(ticket_id, priority)
+        self._node_versions[store.node_index[ticket_id]] = self.version
+
+    def _priority_of(self, ticket_id: int) -> int:
+        return self._priorities[self.tickets.class_index[ticket_id]]
 
     def _assign_servers(self) -> None:
         for node_id, state in self.node_state.items():
             config = self.network.nodes[node_id].config
             servers = config.servers or len(state.queue) + len(state.in_service)
             available = max(0, servers - len(state.in_service))
-            if available <= 0:
-                continue
 
             for _ in range(available):
                 if not state.queue:
                     break
-                ticket = state.queue.pop(0)
-                service_rate = config.service_rates_per_class.get(ticket.class_id)
-                if service_rate is None or service_rate <= 0:
-                    continue
-                ticket.remaining_service = self.random.expovariate(service_rate)
-                state.waiting_time_total += max(self.current_time - ticket.enqueued_at, 0.0)
-                ticket.started_at = self.current_time
-                state.in_service.append(ticket)
-                self._log(
-                    f"{ticket.class_id}#{ticket.id} rozpoczął obsługę w {node_id}"
-                )
+                self._start_service(node_id, state, state.queue.pop())
+
+            if config.scheduling == "PRIORITY_PR" and config.servers is not None:
+                self._preempt_lower_priority(node_id, state)
+
+    def _start_service(self, node_id: str, state: NodeRuntimeState, ticket_id: int) -> None:
+        store = self.tickets
+        class_id = store.class_of(ticket_id)
+        if store.remaining_service[ticket_id] <= 0:
+            duration = self._draw_service_time(node_id, class_id)
+            if duration is None:
+                return
+            store.remaining_service[ticket_id] = duration
+            store.started_at[ticket_id] = self.current_time
+            key = (store.node_lookup[node_id], store.class_index[ticket_id])
+            self._service_work[key] += duration
+            self._service_draws[key] += 1
+
+        waited = max(self.current_time - float(store.waiting_since[ticket_id]), 0.0)
+        state.waiting_time_total += waited
+        store.waited[ticket_id] += waited
+        state.in_service.append(ticket_id)
+        self._node_versions[store.node_lookup[node_id]] = self.version
+        self._log(EVENT_START, ticket_id, from_node=node_id)
+
+    def _draw_service_time(self, node_id: str, class_id: str) -> float | None:
+        service_times = self.service_times
+        if service_times is not None and (node_id, class_id) in service_times:
+            return self.streams.service(node_id, class_id, service_times.sampler(node_id, class_id))
+
+        node_config = self.network.nodes[node_id].config
+        service_rate = node_config.service_rates_per_class.get(class_id)
+        if service_rate is None or service_rate <= 0:
+            return None
+        distribution = node_config.service_distributions.get(class_id)
+        if distribution is None:
+            return self.streams.service(node_id, class_id) / service_rate
+        return self.streams.service(node_id, class_id, unit_mean_sampler(distribution)) / service_rate
+
+    def _preempt_lower_priority(self, node_id: str, state: NodeRuntimeState) -> None:
+        """Wywłaszcza obsługiwane zgłoszenia o niższym priorytecie niż czołowe w kolejce.
+
+        Wywłaszczone zgłoszenie wraca na początek swojego poziomu kolejki
+        i zachowuje pozostały czas obsługi (preemptive-resume).
+        """
+
+        store = self.tickets
+        while state.queue and state.in_service:
+            head_priority = state.queue.peek_priority()
+            victim = max(
+                state.in_service,
+                key=lambda ticket_id: (self._priority_of(ticket_id), store.started_at[ticket_id]),
+            )
+            victim_priority = self._priority_of(victim)
+            if victim_priority <= head_priority:
+                break
+
+            state.in_service.remove(victim)
+            store.waiting_since[victim] = self.current_time
+            state.queue.push_front(victim, victim_priority)
+            state.preemptions += 1
+            self._log(EVENT_PREEMPT, victim, from_node=node_id)
+            self._start_service(node_id, state, state.queue.pop())
 
     def _progress_service(self, elapsed_seconds: float, end_time: float) -> None:
-        for node_id, state in self.node_state.items():
-            completed: List[Ticket] = []
-            for ticket in state.in_service:
-                ticket.remaining_service -= elapsed_seconds
-                if ticket.remaining_service <= 0:
-                    completed.append(ticket)
-
-            for ticket in completed:
-                state.in_service.remove(ticket)
-                state.system_time_total += max(end_time - ticket.enqueued_at, 0.0)
-                state.completed += 1
-                next_node = self._choose_next_node(ticket)
+        store = self.tickets
+        for node_idx, (node_id, state) in enumerate(self.node_state.items()):
+            if not state.in_service:
+                continue
+
+            # Dekrementacja pozostałego czasu obsługi wszystkich zgłoszeń węzła naraz.
+            in_service = np.fromiter(state.in_service, dtype=np.int64, count=len(state.in_service))
+            remaining = store.remaining_service[in_service] - elapsed_seconds
+            store.remaining_service[in_service] = remaining
+            done = remaining <= 0
+            if not done.any():
+                continue
+
+            completed = in_service[done]
+            state.in_service = in_service[~done].tolist()
+            self._node_versions[node_idx] = self.version
+            system_times = end_time - store.enqueued_at[completed]
+            system_time_sum = float(np.maximum(system_times, 0.0).sum())
+            state.system_time_total += system_time_sum
+            state.completed += int(completed.shape[0])
+            self.steady_state.record_completions(node_idx, system_time_sum, int(completed.shape[0]))
+
+            classes = store.class_index[completed]
+            self._waiting_stats.add(node_idx, classes, store.waited[completed])
+            self._response_stats.add(node_idx, classes, np.maximum(system_times, 0.0))
+
+            cycles: List[int] = []
+            for ticket_id, class_idx in zip(completed.tolist(), classes.tolist()):
+                next_node = self._choose_next_node(store.class_ids[class_idx], node_id)
+                if next_node is None or next_node == ENTRY_NODE:
+                    cycles.append(ticket_id)
                 if next_node is None:
-                    self._log(
-                        f"{ticket.class_id}#{ticket.id} zakończył cykl i wraca do INTAKE"
-                    )
-                    self._enqueue("INTAKE", ticket)
+                    self._log(EVENT_CYCLE, ticket_id, from_node=node_id, to_node=ENTRY_NODE)
+                    self._enqueue(ENTRY_NODE, ticket_id)
                 else:
-                    self._log(
-                        f"{ticket.class_id}#{ticket.id} przechodzi z {node_id} do {next_node}"
-                    )
-                    self._enqueue(next_node, ticket)
-
-    def _choose_next_node(self, ticket: Ticket) -> str | None:
-        routing_matrix = self.network.routing_matrices.get(ticket.class_id, {})
-        outgoing = routing_matrix.get(ticket.current_node, {})
+                    self._log(EVENT_ROUTE, ticket_id, from_node=node_id, to_node=next_node)
+                    self._enqueue(next_node, ticket_id)
+
+            if cycles:
+                cycle_ids = np.asarray(cycles, dtype=np.int64)
+                self._cycle_stats.add(
+                    0, store.class_index[cycle_ids], self.current_time - store.cycle_started_at[cycle_ids]
+                )
+                store.cycle_started_at[cycle_ids] = self.current_time
+
+    def _choose_next_node(self, class_id: str, node_id: str) -> str | None:
+        routing_matrix = self.network.routing_matrices.get(class_id, {})
+        outgoing = routing_matrix.get(node_id, {})
         if not outgoing:
             return None
 
@@ -252,7 +855,7 @@ class TicketSimulation:
             total += prob
             cumulative.append(total)
 
-        roll = self.random.random() * total
+        roll = self.streams.routing(node_id, class_id) * total
         for idx, threshold in enumerate(cumulative):
             if roll <= threshold:
                 return edges[idx][0]
@@ -263,9 +866,13 @@ class TicketSimulation:
         """Akumuluje pola powierzchni potrzebne do obliczeń empirycznych."""
 
         snapshot_time = self.current_time + elapsed_seconds
-        for node_id, state in self.node_state.items():
+        system_lengths = np.empty(len(self.node_state))
+        queue_lengths = np.empty(len(self.node_state))
+        for node_idx, (node_id, state) in enumerate(self.node_state.items()):
             queue_len = len(state.queue)
             system_len = queue_len + len(state.in_service)
+            system_lengths[node_idx] = system_len
+            queue_lengths[node_idx] = queue_len
             servers = self.network.nodes[node_id].config.servers
             busy = min(len(state.in_service), servers) if servers is not None else 0
 
@@ -274,11 +881,37 @@ class TicketSimulation:
             state.system_area += system_len * elapsed_seconds
             state.busy_area += busy * elapsed_seconds
 
-            state.queue_history.append((snapshot_time, queue_len))
-            if len(state.queue_history) > 300:
-                state.queue_history.pop(0)
+        self.steady_state.record_areas(system_lengths, elapsed_seconds)
+        self.history.append(snapshot_time, queue_lengths)
 
-    def _log(self, message: str) -> None:
-        self._events.append(message)
-        if len(self._events) > 200:
-            self._events = self._events[-200:]
+    def _log_many(self, kind: int, ticket_ids: range, class_index: int, to_node: int) -> None:
+        log = self.event_log
+        if not log.enabled and self.trace is None:
+            return
+        records = np.zeros(len(ticket_ids), dtype=EVENT_DTYPE)
+        records["time"] = self.current_time
+        records["kind"] = kind
+        records["ticket"] = np.arange(ticket_ids.start, ticket_ids.stop)
+        records["class_index"] = class_index
+        records["from_node"] = NO_NODE
+        records["to_node"] = to_node
+        log.record_many(records)
+        if self.trace is not None:
+            self.trace.record_many(records)
+
+    def _log(self, kind: int, ticket_id: int, from_node: str | None = None, to_node: str | None = None) -> None:
+        log = self.event_log
+        if not log.enabled and self.trace is None:
+            return
+        lookup = self.tickets.node_lookup
+        record = (
+            self.current_time,
+            kind,
+            ticket_id,
+            int(self.tickets.class_index[ticket_id]),
+            lookup[from_node] if from_node is not None else NO_NODE,
+            lookup[to_node] if to_node is not None else NO_NODE,
+        )
+        log.record(*record)
+        if self.trace is not None:
+            self.trace.record(*record)
@@ -0,0 +1,129 @@
+"""Rozwiązywanie sieci metodą SUM w osobnym procesie.
+
+`SolverPool` utrzymuje „ciepłą” pulę procesów (`spawn`), do której trafiają
+kopie konfiguracji sieci. Każde zlecenie ma numer pokolenia; pula ma
+współdzielony licznik najnowszego pokolenia, który proces roboczy sprawdza
+co kilka iteracji SUM – gdy pojawi się nowsze zlecenie (albo `cancel()`),
+przerwane obliczenia kończą się wyjątkiem `SolveCancelled`. W ten sam
+sposób proces roboczy publikuje postęp (iterację i błąd względny), który
+GUI może odczytywać bez żadnej komunikacji z procesem.
+"""
+
+from __future__ import annotations
+
+import copy
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Tuple
+
+from bcmp import sum
+from bcmp.config_schema import NetworkConfig
+from bcmp.metrics import NetworkMetrics
+
+
+@dataclass
+class SolveProgress:
+    """Postęp bieżącego zlecenia: pokolenie, iteracja i błąd względny SUM."""
+
+    generation: int
+    iteration: int
+    error: float
+
+
+# Stan procesu roboczego ustawiany przez `_init_worker`.
+_latest = None
+_progress = None
+
+
+def _init_worker(latest, progress) -> None:
+    global _latest, _progress
+    _latest, _progress = latest, progress
+
+
+def _report(generation: int, iteration: int, error: float) -> None:
+    if _latest.value != generation:
+        raise sum.SolveCancelled(f"Przeliczenie {generation} zastąpione nowszym")
+    _progress[0] = generation
+    _progress[1] = iteration
+    _progress[2] = error
+
+
+def _solve(config: NetworkConfig, generation: int | None, eps: float) -> NetworkMetrics:
+    if generation is None:
+        return sum.solve_metrics(config, eps=eps)
+    if _latest.value != generation:
+        raise sum.SolveCancelled(f"Przeliczenie {generation} zastąpione nowszym")
+    return sum.solve_metrics(
+        config,
+        eps=eps,
+        progress=lambda iteration, error: _report(generation, iteration, error),
+    )
+
+
+class SolverPool:
+    """Pula procesów rozwiązujących sieć z anulowaniem i podglądem postępu.
+
+    - `submit(config)`: zleca przeliczenie (unieważnia poprzednie) i zwraca
+      `(pokolenie, Future)`,
+    - `submit_background(config)`: zlecenie, którego nie anulują nowsze
+      (np. obliczenia spekulatywne),
+    - `cancel()`: przerywa bieżące zlecenie bez zlecania nowego,
+    - `progress()`: ostatni raport postępu.
+    """
+
+    def __init__(self, max_workers: int = 1, eps: float = 1e-6) -> None:
+        self.max_workers = max_workers
+        self.eps = eps
+        context = multiprocessing.get_context("spawn")
+        self._context = context
+        self._latest = context.Value("q", 0, lock=False)
+        self._progress = context.Array("d", 3, lock=False)
+        self._executor: ProcessPoolExecutor | None = None
+
+    @property
+    def generation(self) -> int:
+        return int(self._latest.value)
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=self._context,
+                initializer=_init_worker,
+                initargs=(self._latest, self._progress),
+            )
+        return self._executor
+
+    def _submit(self, config: NetworkConfig, generation: int | None) -> Future:
+        # Kopia: konfiguracja serializowana jest dopiero w wątku puli, a GUI może ją dalej edytować.
+        config = copy.deepcopy(config)
+        try:
+            return self._pool().submit(_solve, config, generation, self.eps)
+        except BrokenProcessPool:
+            # Proces roboczy zginął (np. zabrakło pamięci) – zaczynamy od nowej puli.
+            self._executor = None
+            return self._pool().submit(_solve, config, generation, self.eps)
+
+    def submit(self, config: NetworkConfig) -> Tuple[int, Future]:
+        generation = self.generation + 1
+        self._latest.value = generation
+        self._progress[:] = [generation, 0, float("nan")]
+        return generation, self._submit(config, generation)
+
+    def submit_background(self, config: NetworkConfig) -> Future:
+        return self._submit(config, None)
+
+    def cancel(self) -> None:
+        self._latest.value = self.generation + 1
+
+    def progress(self) -> SolveProgress:
+        generation, iteration, error = self._progress[:]
+        return SolveProgress(int(generation), int(iteration), error)
+
+    def shutdown(self) -> None:
+        self.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
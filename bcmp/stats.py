@@ -0,0 +1,50 @@
+"""Narzędzia statystyczne do analizy wyników symulacji.
+
+Moduł nie wymaga SciPy – kwantyle rozkładu t-Studenta wyznaczane są
+dokładnie dla 1 i 2 stopni swobody, a dla większych z rozwinięcia
+Cornisha–Fishera wokół rozkładu normalnego (błąd < 1% już dla 3 st. swobody).
+"""
+
+from __future__ import annotations
+
+import math
+from statistics import NormalDist
+from typing import Sequence, Tuple
+
+
+def student_t_quantile(probability: float, degrees_of_freedom: int) -> float:
+    """Zwraca kwantyl rzędu `probability` rozkładu t-Studenta."""
+
+    if not 0.0 < probability < 1.0:
+        raise ValueError("Rząd kwantyla musi leżeć w przedziale (0, 1)")
+    if degrees_of_freedom < 1:
+        raise ValueError("Liczba stopni swobody musi być dodatnia")
+
+    p = probability
+    v = float(degrees_of_freedom)
+    if degrees_of_freedom == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if degrees_of_freedom == 2:
+        return (2.0 * p - 1.0) / math.sqrt(2.0 * p * (1.0 - p))
+
+    z = NormalDist().inv_cdf(p)
+    g1 = (z**3 + z) / 4.0
+    g2 = (5 * z**5 + 16 * z**3 + 3 * z) / 96.0
+    g3 = (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / 384.0
+    g4 = (79 * z**9 + 776 * z**7 + 1482 * z**5 - 1920 * z**3 - 945 * z) / 92160.0
+    return z + g1 / v + g2 / v**2 + g3 / v**3 + g4 / v**4
+
+
+def mean_confidence_interval(values: Sequence[float], confidence: float = 0.95) -> Tuple[float, float]:
+    """Zwraca (średnia, połowa szerokości przedziału ufności) dla niezależnych prób."""
+
+    n = len(values)
+    if n == 0:
+        return 0.0, 0.0
+    mean = math.fsum(values) / n
+    if n == 1:
+        return mean, math.inf
+
+    variance = math.fsum((value - mean) ** 2 for value in values) / (n - 1)
+    quantile = student_t_quantile(0.5 + confidence / 2.0, n - 1)
+    return mean, quantile * math.sqrt(variance / n)
@@ -0,0 +1,226 @@
+"""Wykrywanie stanu ustalonego i kontrola długości przebiegu symulacji.
+
+Symulacja startuje z pustej sieci, więc średnie liczone od t=0 zawierają
+okres przejściowy. `SteadyStateMonitor` zbiera w trakcie przebiegu
+obserwacje okienkowe (średnie L i W w kolejnych oknach czasu), odrzuca
+początkowy fragment regułą MSER-5 i wyznacza przedziały ufności metodą
+średnich z partii (batch means). Liczba przechowywanych okien jest
+ograniczona – po zapełnieniu sąsiednie okna są scalane, a długość okna
+podwajana, więc pamięć nie rośnie z długością przebiegu.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from bcmp.stats import student_t_quantile
+
+
+@dataclass
+class SteadyStateEstimate:
+    """Estymata stanu ustalonego jednego węzła z przedziałami ufności."""
+
+    mean_system_length: float = 0.0  # L
+    system_length_half_width: float = math.inf
+    mean_system_time: float = 0.0  # W
+    system_time_half_width: float = math.inf
+    truncated_time: float = 0.0
+    observed_time: float = 0.0
+    completions: int = 0  # zakończenia obsługi po odrzuceniu okresu przejściowego
+
+    def relative_precision(self) -> float:
+        """Zwraca większą z względnych połówek szerokości przedziałów dla L i W.
+
+        Bez zakończeń obsługi W nie jest estymowalne – brana jest wtedy tylko L.
+        """
+
+        precision = _relative(self.system_length_half_width, self.mean_system_length)
+        if self.completions == 0:
+            return precision
+        return max(precision, _relative(self.system_time_half_width, self.mean_system_time))
+
+
+def _relative(half_width: float, mean: float) -> float:
+    if half_width == 0.0:
+        return 0.0
+    if mean == 0.0:
+        return math.inf
+    return half_width / abs(mean)
+
+
+def mser5_truncation(observations: Sequence[float]) -> int:
+    """Zwraca liczbę początkowych obserwacji do odrzucenia według reguły MSER-5.
+
+    Obserwacje grupowane są w partie po 5, a punkt obcięcia d wybierany jest
+    tak, aby zminimalizować (1/(n-d)^2) * Σ_{i>d} (Y_i - Ȳ_d)^2, przy czym
+    rozważane są jedynie obcięcia nie większe niż połowa danych.
+    """
+
+    values = np.asarray(observations, dtype=float)
+    batches = values[: (values.size // 5) * 5].reshape(-1, 5).mean(axis=1)
+    n = batches.size
+    if n < 2:
+        return 0
+
+    # Sumy od końca pozwalają policzyć wszystkie warianty w O(n).
+    tail_sum = np.cumsum(batches[::-1])[::-1]
+    tail_sq = np.cumsum((batches**2)[::-1])[::-1]
+    remaining = n - np.arange(n)
+    tail_var_sum = tail_sq - tail_sum**2 / remaining
+    criterion = tail_var_sum / remaining**2
+
+    limit = n // 2 + 1
+    best = int(np.argmin(criterion[:limit]))
+    return best * 5
+
+
+def batch_means_interval(
+    values: Sequence[float],
+    weights: Sequence[float] | None = None,
+    *,
+    batches: int = 20,
+    confidence: float = 0.95,
+) -> Tuple[float, float]:
+    """Wyznacza (średnia, połowa szerokości przedziału) metodą średnich z partii.
+
+    Gdy podano `weights`, `values` traktowane są jako sumy, a średnią partii
+    jest iloraz sumy wartości przez sumę wag (np. suma czasów przebywania
+    przez liczbę zakończeń).
+    """
+
+    sums = np.asarray(values, dtype=float)
+    counts = np.ones_like(sums) if weights is None else np.asarray(weights, dtype=float)
+    total_count = float(counts.sum())
+    if sums.size == 0 or total_count <= 0:
+        return 0.0, math.inf
+
+    overall = float(sums.sum()) / total_count
+    k = min(batches, sums.size)
+    if k < 2:
+        return overall, math.inf
+
+    size = sums.size // k
+    batch_sums = sums[: size * k].reshape(k, size).sum(axis=1)
+    batch_counts = counts[: size * k].reshape(k, size).sum(axis=1)
+    valid = batch_counts > 0
+    if int(valid.sum()) < 2:
+        return overall, math.inf
+
+    batch_means = batch_sums[valid] / batch_counts[valid]
+    k = batch_means.size
+    std_error = float(np.std(batch_means, ddof=1)) / math.sqrt(k)
+    return overall, student_t_quantile(0.5 + confidence / 2.0, k - 1) * std_error
+
+
+class SteadyStateMonitor:
+    """Zbiera obserwacje okienkowe L i W dla wszystkich węzłów.
+
+    Dla każdego okna o długości `window` sekund zapisywane są: pole pod
+    wykresem liczby zgłoszeń w węźle, suma czasów przebywania zakończonych
+    obsług oraz ich liczba.
+    """
+
+    def __init__(self, node_ids: Sequence[str], window: float = 1.0, max_windows: int = 512) -> None:
+        if window <= 0:
+            raise ValueError("Długość okna obserwacji musi być dodatnia")
+        if max_windows < 10 or max_windows % 2:
+            raise ValueError("Liczba okien musi być parzysta i nie mniejsza niż 10")
+
+        self.node_ids: List[str] = list(node_ids)
+        self.initial_window = window
+        self.max_windows = max_windows
+        size = len(self.node_ids)
+        self._area = np.zeros((max_windows, size))
+        self._time_sum = np.zeros((max_windows, size))
+        self._time_count = np.zeros((max_windows, size))
+        self._durations = np.zeros(max_windows)
+        self._current_area = np.zeros(size)
+        self._current_time_sum = np.zeros(size)
+        self._current_time_count = np.zeros(size)
+        self.reset()
+
+    def reset(self) -> None:
+        self.window = self.initial_window
+        self.windows = 0
+        self._current_duration = 0.0
+        self._current_area[:] = 0.0
+        self._current_time_sum[:] = 0.0
+        self._current_time_count[:] = 0.0
+
+    def record_areas(self, system_lengths: np.ndarray, elapsed: float) -> None:
+        """Dopisuje pole L·Δt dla wszystkich węzłów w bieżącym oknie."""
+
+        self._current_area += system_lengths * elapsed
+
+    def record_completions(self, node_index: int, system_time_sum: float, count: int) -> None:
+        self._current_time_sum[node_index] += system_time_sum
+        self._current_time_count[node_index] += count
+
+    def advance(self, elapsed: float) -> None:
+        """Przesuwa zegar okna; zamyka je po osiągnięciu zadanej długości."""
+
+        self._current_duration += elapsed
+        if self._current_duration >= self.window - 1e-12:
+            self._close_window()
+
+    def estimates(self, confidence: float = 0.95, batches: int = 20) -> Dict[str, SteadyStateEstimate]:
+        """Zwraca estymaty po odrzuceniu okresu przejściowego (MSER-5 na L)."""
+
+        n = self.windows
+        durations = self._durations[:n]
+        results: Dict[str, SteadyStateEstimate] = {}
+        for idx, node_id in enumerate(self.node_ids):
+            if n == 0:
+                results[node_id] = SteadyStateEstimate()
+                continue
+
+            levels = self._area[:n, idx] / durations
+            cut = mser5_truncation(levels)
+            kept = slice(cut, n)
+
+            mean_l, half_l = batch_means_interval(
+                self._area[kept, idx], durations[kept], batches=batches, confidence=confidence
+            )
+            mean_w, half_w = batch_means_interval(
+                self._time_sum[kept, idx], self._time_count[kept, idx], batches=batches, confidence=confidence
+            )
+            results[node_id] = SteadyStateEstimate(
+                mean_system_length=mean_l,
+                system_length_half_width=half_l,
+                mean_system_time=mean_w,
+                system_time_half_width=half_w,
+                truncated_time=float(durations[:cut].sum()),
+                observed_time=float(durations.sum()),
+                completions=int(self._time_count[kept, idx].sum()),
+            )
+        return results
+
+    def _close_window(self) -> None:
+        if self.windows == self.max_windows:
+            self._merge_pairs()
+
+        row = self.windows
+        self._area[row] = self._current_area
+        self._time_sum[row] = self._current_time_sum
+        self._time_count[row] = self._current_time_count
+        self._durations[row] = self._current_duration
+        self.windows += 1
+
+        self._current_duration = 0.0
+        self._current_area[:] = 0.0
+        self._current_time_sum[:] = 0.0
+        self._current_time_count[:] = 0.0
+
+    def _merge_pairs(self) -> None:
+        half = self.max_windows // 2
+        for array in (self._area, self._time_sum, self._time_count):
+            array[:half] = array[0::2] + array[1::2]
+            array[half:] = 0.0
+        self._durations[:half] = self._durations[0::2] + self._durations[1::2]
+        self._durations[half:] = 0.0
+        self.windows = half
+        self.window *= 2.0
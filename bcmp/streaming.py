@@ -0,0 +1,174 @@
+"""Strumieniowe akumulatory statystyk o stałej pamięci.
+
+- `QuantileDigest` – szkic kwantyli (scalający t-digest) o ograniczonej
+  liczbie centroidów, aktualizowany całymi blokami próbek,
+- `LatencyMatrix` – czasy oczekiwania/przebywania dla siatki kluczy
+  (np. węzeł × klasa): średnia, odchylenie i opcjonalnie p50, p95, p99.
+
+Próbki trafiają najpierw do bufora NumPy; dopiero jego opróżnienie
+aktualizuje momenty (wektorowo, wzorem Chana dla wszystkich kluczy naraz)
+i szkice kwantyli (jedno scalenie na klucz i blok). Koszt na próbkę to
+zapis do tablicy, a nie obliczenia w Pythonie, więc akumulatory nadają się
+do bardzo długich przebiegów symulacji.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, Sequence
+
+import numpy as np
+
+from bcmp.metrics import LatencyStats
+
+
+class QuantileDigest:
+    """Szkic kwantyli: posortowane centroidy (średnia, waga) scalane blokami.
+
+    Centroidy grupowane są według skali arcsinus (`compression` przedziałów),
+    więc na ogonach rozkładu (p95, p99) są znacznie drobniejsze niż w środku.
+    """
+
+    __slots__ = ("compression", "means", "weights")
+
+    def __init__(self, compression: int = 100) -> None:
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum())
+
+    def add_block(self, values: np.ndarray) -> None:
+        if values.shape[0] == 0:
+            return
+        means = np.concatenate((self.means, values))
+        weights = np.concatenate((self.weights, np.ones(values.shape[0])))
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+
+        total = weights.sum()
+        centers = (np.cumsum(weights) - weights / 2) / total
+        scale = np.arcsin(np.clip(2 * centers - 1, -1.0, 1.0)) / math.pi + 0.5
+        groups = np.minimum((scale * self.compression).astype(np.int64), self.compression)
+        group_weights = np.bincount(groups, weights=weights)
+        group_sums = np.bincount(groups, weights=weights * means)
+        present = group_weights > 0
+        self.weights = group_weights[present]
+        self.means = group_sums[present] / self.weights
+
+    def quantile(self, p: float) -> float:
+        if self.weights.shape[0] == 0:
+            return 0.0
+        centers = (np.cumsum(self.weights) - self.weights / 2) / self.weights.sum()
+        return float(np.interp(p, centers, self.means))
+
+
+class LatencyMatrix:
+    """Akumulatory czasów dla siatki `rows × columns` kluczy, zasilane blokami.
+
+    - `quantiles`: czy zbierać p50/p95/p99 (bez nich – tylko liczność,
+      średnia i odchylenie, a kwantyle w `summary` mają wartość NaN),
+    - `block_size`: pojemność bufora próbek opróżnianego jednym scaleniem.
+
+    Tablice `counts` i `means` są aktualne po `flush()`.
+    """
+
+    QUANTILES: Sequence[float] = (0.5, 0.95, 0.99)
+
+    def __init__(self, rows: int, columns: int, quantiles: bool = True, block_size: int = 4096) -> None:
+        if block_size <= 0:
+            raise ValueError("Rozmiar bloku próbek musi być dodatni")
+        self.rows = rows
+        self.columns = columns
+        self.quantiles = quantiles
+        self.block_size = block_size
+        self.counts = np.zeros((rows, columns), dtype=np.int64)
+        self.means = np.zeros((rows, columns))
+        self._m2 = np.zeros((rows, columns))
+        self._digests: Dict[int, QuantileDigest] = {}
+        self._allocate_buffer()
+
+    def _allocate_buffer(self) -> None:
+        self._keys = np.zeros(self.block_size, dtype=np.int64)
+        self._values = np.zeros(self.block_size)
+        self._pending = 0
+
+    def add(self, row: int, columns: np.ndarray, values: np.ndarray) -> None:
+        """Dopisuje próbki `values` dla kluczy (`row`, `columns[i]`)."""
+
+        count = values.shape[0]
+        if count == 0:
+            return
+        if self._pending + count > self.block_size:
+            self.flush()
+            if count > self.block_size:
+                self._merge(row * self.columns + np.asarray(columns, dtype=np.int64), np.asarray(values, dtype=float))
+                return
+        end = self._pending + count
+        self._keys[self._pending : end] = row * self.columns + columns
+        self._values[self._pending : end] = values
+        self._pending = end
+
+    def flush(self) -> None:
+        if self._pending:
+            pending, self._pending = self._pending, 0
+            self._merge(self._keys[:pending], self._values[:pending])
+
+    def _merge(self, keys: np.ndarray, values: np.ndarray) -> None:
+        size = self.rows * self.columns
+        block_counts = np.bincount(keys, minlength=size)
+        present = np.flatnonzero(block_counts)
+        block_means = np.bincount(keys, weights=values, minlength=size) / np.maximum(block_counts, 1)
+        deviations = values - block_means[keys]
+        block_m2 = np.bincount(keys, weights=deviations * deviations, minlength=size)
+
+        # Scalanie momentów (Chan i in.) dla wszystkich kluczy bloku naraz.
+        counts, means, m2 = self.counts.reshape(-1), self.means.reshape(-1), self._m2.reshape(-1)
+        old = counts[present].astype(float)
+        new = block_counts[present].astype(float)
+        total = old + new
+        delta = block_means[present] - means[present]
+        means[present] += delta * new / total
+        m2[present] += block_m2[present] + delta * delta * old * new / total
+        counts[present] += block_counts[present]
+
+        if self.quantiles:
+            order = np.argsort(keys, kind="stable")
+            ordered = values[order]
+            bounds = np.concatenate(([0], np.cumsum(block_counts[present])))
+            for key, start, stop in zip(present.tolist(), bounds[:-1].tolist(), bounds[1:].tolist()):
+                digest = self._digests.get(key)
+                if digest is None:
+                    digest = self._digests[key] = QuantileDigest()
+                digest.add_block(ordered[start:stop])
+
+    def clear(self) -> None:
+        self.counts[:] = 0
+        self.means[:] = 0.0
+        self._m2[:] = 0.0
+        self._digests.clear()
+        self._pending = 0
+
+    def summary(self, row: int, column: int) -> LatencyStats:
+        self.flush()
+        count = int(self.counts[row, column])
+        std = math.sqrt(self._m2[row, column] / (count - 1)) if count > 1 else 0.0
+        if self.quantiles:
+            digest = self._digests.get(row * self.columns + column, QuantileDigest())
+            p50, p95, p99 = (digest.quantile(p) for p in self.QUANTILES)
+        else:
+            p50 = p95 = p99 = math.nan
+        return LatencyStats(count=count, mean=float(self.means[row, column]), std=std, p50=p50, p95=p95, p99=p99)
+
+    def __getstate__(self) -> dict:
+        # Bufor nie trafia do punktu kontrolnego – jest wcześniej opróżniany.
+        self.flush()
+        state = self.__dict__.copy()
+        del state["_keys"], state["_values"], state["_pending"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._allocate_buffer()
@@ -7,10 +7,11 @@ wyznaczając przepustowości klas oraz średnie liczby klientów w węzłach.
 from __future__ import annotations
 
 import math
-from typing import Dict, List
+from typing import Callable, Dict, List
 
 import numpy as np
 
+from bcmp.config_schema import NetworkConfig
 from bcmp.metrics import (
     NetworkMetrics,
     NodeClassMetrics,
@@ -20,7 +21,26 @@ from bcmp.metrics import (
 from bcmp.network import BCMPNetwork
 
 
-def compute_network_metrics(network: BCMPNetwork, *, eps: float = 1e-6) -> None:
+ProgressCallback = Callable[[int, float], None]
+PROGRESS_EVERY = 10  # co ile iteracji wywoływany jest `progress`
+
+
+class SolveCancelled(RuntimeError):
+    """Zgłaszany przez `progress`, aby przerwać trwające obliczenia."""
+
+
+def compute_network_metrics(
+    network: BCMPNetwork,
+    *,
+    eps: float = 1e-6,
+    progress: ProgressCallback | None = None,
+) -> None:
+    """Rozwiązuje sieć metodą SUM i zapisuje wyniki w `network.metrics`.
+
+    `progress(iteracja, błąd względny)` wywoływany jest co `PROGRESS_EVERY`
+    iteracji; może przerwać obliczenia, zgłaszając `SolveCancelled`.
+    """
+
     node_ids = [node_config.id for node_config in network.config.nodes]
     class_ids = [cls.id for cls in network.config.classes]
 
@@ -37,7 +57,7 @@ def compute_network_metrics(network: BCMPNetwork, *, eps: float = 1e-6) -> None:
     relaxation = 0.1
     prev_error = float("inf")
 
-    for _ in range(max_iterations):
+    for iteration in range(max_iterations):
         lambda_i_totals = _total_arrivals_per_node(lambda_r, visits, node_ids, class_ids)
         mean_service_times = _mean_service_time_per_node(
             network, node_ids, class_ids, lambda_r, visits
@@ -77,6 +97,8 @@ def compute_network_metrics(network: BCMPNetwork, *, eps: float = 1e-6) -> None:
 
         if error < eps:
             break
+        if progress is not None and iteration % PROGRESS_EVERY == 0:
+            progress(iteration, error)
     else:
         raise RuntimeError("Metoda SUM nie zbiega się w zadanej liczbie iteracji")
 
@@ -153,6 +175,32 @@ def compute_network_metrics(network: BCMPNetwork, *, eps: float = 1e-6) -> None:
     _update_node_summaries(network, node_ids)
 
 
+def solve_metrics(
+    config: NetworkConfig,
+    *,
+    eps: float = 1e-6,
+    progress: ProgressCallback | None = None,
+) -> NetworkMetrics:
+    """Rozwiązuje sieć opisaną konfiguracją i zwraca metryki (np. w procesie roboczym)."""
+
+    network = BCMPNetwork(config=config)
+    compute_network_metrics(network, eps=eps, progress=progress)
+    return network.metrics
+
+
+def apply_metrics(network: BCMPNetwork, metrics: NetworkMetrics) -> None:
+    """Podstawia metryki obliczone poza `network` (wynik `solve_metrics`)."""
+
+    network.metrics = metrics
+    for node_id, node_metrics in metrics.per_node.items():
+        node = network.nodes.get(node_id)
+        if node is not None:
+            node.mean_customers_per_class = {
+                class_id: class_metrics.mean_customers
+                for class_id, class_metrics in node_metrics.per_class.items()
+            }
+
+
 def _validate_routing(network: BCMPNetwork, node_ids: List[str], class_ids: List[str]) -> None:
     for class_id in class_ids:
         rm = network.routing_matrices.get(class_id, {})
@@ -0,0 +1,168 @@
+"""Kolumnowy (struct-of-arrays) magazyn zgłoszeń symulacji.
+
+Zamiast osobnego obiektu na każde zgłoszenie przechowujemy jego atrybuty
+w tablicach NumPy indeksowanych identyfikatorem zgłoszenia. Kolejki węzłów
+trzymają wyłącznie liczby całkowite, dzięki czemu pamięć na zgłoszenie
+spada z kilkuset do kilkudziesięciu bajtów, a operacje na wszystkich
+obsługiwanych zgłoszeniach można wektoryzować.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+
+@dataclass(slots=True)
+class Ticket:
+    """Odczytany z magazynu stan pojedynczego zgłoszenia (tylko do podglądu)."""
+
+    id: int
+    class_id: str
+    current_node: str
+    remaining_service: float = 0.0
+    enqueued_at: float = 0.0
+    started_at: float = 0.0
+    waiting_since: float = 0.0
+    waited: float = 0.0
+    cycle_started_at: float = 0.0
+
+
+FIRST_ID = 1
+
+# Kolumny czasowe (float64) wspólne dla wszystkich zgłoszeń.
+TIME_COLUMNS = (
+    "remaining_service",
+    "enqueued_at",
+    "started_at",
+    "waiting_since",
+    "waited",
+    "cycle_started_at",
+)
+
+
+class TicketStore:
+    """Tablice atrybutów zgłoszeń indeksowane identyfikatorem (1..n).
+
+    Identyfikatory numerowane są od 1, jak w dziennikach i śladach
+    sprzed przejścia na kolumny – wiersz 0 pozostaje nieużywany.
+
+    Kolumny:
+    - `class_index` / `node_index`: indeks klasy i bieżącego węzła,
+    - `remaining_service`: pozostały czas obsługi (<= 0 – brak rozpoczętej obsługi),
+    - `enqueued_at`: chwila wejścia do bieżącego węzła,
+    - `started_at`: chwila rozpoczęcia bieżącej obsługi,
+    - `waiting_since`: początek bieżącego okresu oczekiwania w kolejce,
+    - `waited`: łączny czas oczekiwania w bieżącym węźle (także po wywłaszczeniach),
+    - `cycle_started_at`: chwila rozpoczęcia bieżącego cyklu (wejścia do INTAKE).
+    """
+
+    def __init__(self, class_ids: Sequence[str], node_ids: Sequence[str], capacity: int = 1024) -> None:
+        self.class_ids: List[str] = list(class_ids)
+        self.node_ids: List[str] = list(node_ids)
+        self.class_lookup: Dict[str, int] = {class_id: idx for idx, class_id in enumerate(self.class_ids)}
+        self.node_lookup: Dict[str, int] = {node_id: idx for idx, node_id in enumerate(self.node_ids)}
+
+        self.size = FIRST_ID  # następny wolny identyfikator
+        self.count_per_class = np.zeros(len(self.class_ids), dtype=np.int64)
+        self._allocate(max(FIRST_ID + 1, capacity))
+
+    def __len__(self) -> int:
+        return self.size - FIRST_ID
+
+    def _columns(self) -> List[np.ndarray]:
+        return [self.class_index, self.node_index] + [getattr(self, name) for name in TIME_COLUMNS]
+
+    def _allocate(self, capacity: int) -> None:
+        self.class_index = np.zeros(capacity, dtype=np.int16)
+        self.node_index = np.zeros(capacity, dtype=np.int32)
+        for name in TIME_COLUMNS:
+            setattr(self, name, np.zeros(capacity, dtype=np.float64))
+
+    @property
+    def capacity(self) -> int:
+        return int(self.class_index.shape[0])
+
+    def add(self, class_id: str, node_id: str) -> int:
+        """Dodaje zgłoszenie i zwraca jego identyfikator."""
+
+        return self.add_many(class_id, node_id, 1).start
+
+    def add_many(self, class_id: str, node_id: str, count: int) -> range:
+        """Dodaje `count` zgłoszeń jednej klasy naraz i zwraca zakres ich identyfikatorów."""
+
+        first = self.size
+        self.reserve(first + count)
+        last = first + count
+        class_idx = self.class_lookup[class_id]
+        self.class_index[first:last] = class_idx
+        self.node_index[first:last] = self.node_lookup[node_id]
+        for name in TIME_COLUMNS:
+            getattr(self, name)[first:last] = 0.0
+        self.count_per_class[class_idx] += count
+        self.size = last
+        return range(first, last)
+
+    def reserve(self, capacity: int) -> None:
+        """Rezerwuje miejsce z góry (np. przed wstrzyknięciem dużej populacji)."""
+
+        if capacity > self.capacity:
+            self._grow(max(capacity, self.capacity * 2))
+
+    def clear(self) -> None:
+        self.size = FIRST_ID
+        self.count_per_class[:] = 0
+
+    def class_of(self, ticket_id: int) -> str:
+        return self.class_ids[self.class_index[ticket_id]]
+
+    def node_of(self, ticket_id: int) -> str:
+        return self.node_ids[self.node_index[ticket_id]]
+
+    def ticket(self, ticket_id: int) -> Ticket:
+        """Zwraca migawkę zgłoszenia w postaci rekordu `Ticket`."""
+
+        if not FIRST_ID <= ticket_id < self.size:
+            raise IndexError(f"Nieznane zgłoszenie: {ticket_id}")
+        return Ticket(
+            id=ticket_id,
+            class_id=self.class_of(ticket_id),
+            current_node=self.node_of(ticket_id),
+            **{name: float(getattr(self, name)[ticket_id]) for name in TIME_COLUMNS},
+        )
+
+    def nbytes(self) -> int:
+        """Rozmiar zaalokowanych kolumn w bajtach."""
+
+        return int(sum(column.nbytes for column in self._columns()))
+
+    def __getstate__(self) -> dict:
+        # Do punktu kontrolnego trafia tylko zajęta część kolumn.
+        state = {
+            "class_ids": self.class_ids,
+            "node_ids": self.node_ids,
+            "size": self.size,
+            "count_per_class": self.count_per_class,
+        }
+        for name, column in zip(("class_index", "node_index") + TIME_COLUMNS, self._columns()):
+            state[name] = column[: self.size].copy()
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.class_ids = state["class_ids"]
+        self.node_ids = state["node_ids"]
+        self.class_lookup = {class_id: idx for idx, class_id in enumerate(self.class_ids)}
+        self.node_lookup = {node_id: idx for idx, node_id in enumerate(self.node_ids)}
+        self.size = state["size"]
+        self.count_per_class = state["count_per_class"]
+        self._allocate(max(1, self.size))
+        for name in ("class_index", "node_index") + TIME_COLUMNS:
+            getattr(self, name)[: self.size] = state[name]
+
+    def _grow(self, capacity: int) -> None:
+        old = self._columns()
+        self._allocate(capacity)
+        for source, target in zip(old, self._columns()):
+            target[: self.size] = source[: self.size]
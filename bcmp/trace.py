@@ -0,0 +1,193 @@
+"""Binarny zapis pełnego strumienia zdarzeń symulacji do pliku.
+
+Plik śladu ma postać:
+- nagłówek (`MAGIC`, wersja formatu, długość metadanych, liczba rekordów),
+- metadane JSON (identyfikatory klas i węzłów potrzebne do dekodowania),
+- ciąg rekordów o stałej szerokości w formacie `EVENT_DTYPE`.
+
+`TraceRecorder` gromadzi rekordy w buforze o stałym rozmiarze i po jego
+zapełnieniu dopisuje cały blok przez `numpy.memmap`, więc pamięć jest
+ograniczona do jednego bloku niezależnie od długości przebiegu.
+`TraceReader` udostępnia ślad jako tablicę strukturalną NumPy (mapowaną
+z pliku, bez wczytywania całości) oraz odtwarza z niego długości kolejek.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from bcmp.events import (
+    EVENT_CYCLE,
+    EVENT_DTYPE,
+    EVENT_PREEMPT,
+    EVENT_ROUTE,
+    EVENT_SPAWN,
+    EVENT_START,
+)
+
+
+MAGIC = b"BCMPTRC1"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sIIQ")  # magic, wersja, długość metadanych, liczba rekordów
+_ALIGNMENT = 8
+
+
+def _data_offset(metadata_length: int) -> int:
+    raw = _HEADER.size + metadata_length
+    return (raw + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+class TraceRecorder:
+    """Zapisuje zdarzenia blokami do pliku mapowanego w pamięci."""
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        class_ids: Sequence[str],
+        node_ids: Sequence[str],
+        chunk_records: int = 65_536,
+    ) -> None:
+        if chunk_records <= 0:
+            raise ValueError("Rozmiar bloku śladu musi być dodatni")
+
+        self.path = os.fspath(path)
+        self.count = 0
+        self._chunk = np.zeros(chunk_records, dtype=EVENT_DTYPE)
+        self._pending = 0
+        self._closed = False
+
+        metadata = json.dumps({"class_ids": list(class_ids), "node_ids": list(node_ids)}).encode("utf-8")
+        self._metadata_length = len(metadata)
+        self._data_offset = _data_offset(len(metadata))
+        with open(self.path, "wb") as handle:
+            handle.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(metadata), 0))
+            handle.write(metadata)
+            handle.write(b"\0" * (self._data_offset - _HEADER.size - len(metadata)))
+
+    def __enter__(self) -> "TraceRecorder":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _check_open(self) -> None:
+        if self._closed:
+            raise RuntimeError(f"Ślad {self.path} został zamknięty – nie można dopisywać zdarzeń")
+
+    def record(
+        self,
+        time: float,
+        kind: int,
+        ticket: int,
+        class_index: int,
+        from_node: int,
+        to_node: int,
+    ) -> None:
+        self._check_open()
+        self._chunk[self._pending] = (time, kind, ticket, class_index, from_node, to_node)
+        self._pending += 1
+        if self._pending == self._chunk.shape[0]:
+            self.flush()
+
+    def record_many(self, records: np.ndarray) -> None:
+        """Dopisuje tablicę rekordów `EVENT_DTYPE` (np. hurtowe wstrzyknięcie zgłoszeń)."""
+
+        self._check_open()
+        position = 0
+        while position < records.shape[0]:
+            take = min(records.shape[0] - position, self._chunk.shape[0] - self._pending)
+            self._chunk[self._pending : self._pending + take] = records[position : position + take]
+            self._pending += take
+            position += take
+            if self._pending == self._chunk.shape[0]:
+                self.flush()
+
+    def flush(self) -> None:
+        """Dopisuje zbuforowane rekordy do pliku i aktualizuje licznik w nagłówku."""
+
+        if self._pending == 0 or self._closed:
+            return
+
+        offset = self._data_offset + self.count * EVENT_DTYPE.itemsize
+        with open(self.path, "r+b") as handle:
+            handle.truncate(offset + self._pending * EVENT_DTYPE.itemsize)
+
+        target = np.memmap(self.path, dtype=EVENT_DTYPE, mode="r+", offset=offset, shape=(self._pending,))
+        target[:] = self._chunk[: self._pending]
+        target.flush()
+        del target
+
+        self.count += self._pending
+        self._pending = 0
+        with open(self.path, "r+b") as handle:
+            handle.write(_HEADER.pack(MAGIC, FORMAT_VERSION, self._metadata_length, self.count))
+
+    def close(self) -> None:
+        """Zapisuje resztę bufora; kolejne `record()` zgłaszają `RuntimeError`."""
+
+        self.flush()
+        self._closed = True
+
+
+class TraceReader:
+    """Odczyt pliku śladu jako tablicy strukturalnej NumPy (przez memmap)."""
+
+    def __init__(self, path: str | os.PathLike) -> None:
+        self.path = os.fspath(path)
+        with open(self.path, "rb") as handle:
+            magic, version, metadata_length, count = _HEADER.unpack(handle.read(_HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"Plik {self.path} nie jest śladem symulacji")
+            if version != FORMAT_VERSION:
+                raise ValueError(f"Nieobsługiwana wersja formatu śladu: {version}")
+            metadata = json.loads(handle.read(metadata_length).decode("utf-8"))
+
+        self.class_ids: List[str] = metadata["class_ids"]
+        self.node_ids: List[str] = metadata["node_ids"]
+        if count:
+            self.records = np.memmap(
+                self.path, dtype=EVENT_DTYPE, mode="r", offset=_data_offset(metadata_length), shape=(count,)
+            )
+        else:
+            self.records = np.zeros(0, dtype=EVENT_DTYPE)
+
+    def __len__(self) -> int:
+        return int(self.records.shape[0])
+
+    def queue_history(self, node_id: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Odtwarza długość kolejki węzła po każdym dotyczącym go zdarzeniu.
+
+        Kolejka rośnie przy wejściu do węzła (nowe zgłoszenie, przejście,
+        powrót do INTAKE) i po wywłaszczeniu, a maleje przy rozpoczęciu obsługi.
+        """
+
+        node = self.node_ids.index(node_id)
+        kind = self.records["kind"]
+        arrivals = np.isin(kind, (EVENT_SPAWN, EVENT_ROUTE, EVENT_CYCLE)) & (self.records["to_node"] == node)
+        returns = (kind == EVENT_PREEMPT) & (self.records["from_node"] == node)
+        departures = (kind == EVENT_START) & (self.records["from_node"] == node)
+
+        delta = arrivals.astype(np.int64) + returns - departures
+        relevant = delta != 0
+        return np.asarray(self.records["time"][relevant]), np.cumsum(delta[relevant])
+
+    def queue_histories(self, max_points: int | None = None) -> Dict[str, List[Tuple[float, int]]]:
+        """Zwraca historie kolejek wszystkich węzłów (opcjonalnie przerzedzone)."""
+
+        histories: Dict[str, List[Tuple[float, int]]] = {}
+        for node_id in self.node_ids:
+            times, lengths = self.queue_history(node_id)
+            if max_points is not None and times.shape[0] > max_points:
+                indices = np.linspace(0, times.shape[0] - 1, max_points).astype(np.int64)
+                times, lengths = times[indices], lengths[indices]
+            histories[node_id] = list(zip(times.tolist(), lengths.tolist()))
+        return histories
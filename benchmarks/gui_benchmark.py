@@ -0,0 +1,336 @@
+"""Benchmark wydajności GUI na platformie Qt „offscreen”.
+
+Dla syntetycznych sieci o rosnącej liczbie węzłów skrypt buduje pełne
+`MainWindow` (bez wyświetlacza) i mierzy:
+
+- czas konstrukcji okna (z pierwszym narysowaniem) i przyrost pamięci RSS,
+- czas `MainWindow.refresh_views`,
+- czas `SimulationView.refresh` po jednym kroku symulacji przy różnych
+  długościach zgromadzonej historii kolejek oraz przyrost RSS (od chwili
+  przed konstrukcją okna) po jej zgromadzeniu.
+
+Każdy rozmiar sieci mierzony jest w osobnym procesie (`spawn`), po
+rozgrzewce na małej sieci – jednorazowe koszty inicjalizacji Qt i pamięć
+zwolniona przez poprzednie pomiary nie zaburzają wyników.
+
+Wyniki zapisywane są jako JSON i porównywane z zapisaną linią bazową
+(`benchmarks/gui_baseline.json`); czas lub pamięć gorsze od bazowych
+o więcej niż `--tolerance` oznaczane są jako regresja, a skrypt kończy się
+kodem 1. Linia bazowa zależy od maszyny – po zmianie sprzętu należy ją
+odświeżyć opcją `--update-baseline`.
+
+Uruchomienie (z katalogu głównego repozytorium):
+
+    python benchmarks/gui_benchmark.py
+    python benchmarks/gui_benchmark.py --sizes 5 50 --output wyniki.json
+    python benchmarks/gui_benchmark.py --update-baseline
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+from PyQt6.QtCore import PYQT_VERSION_STR, QT_VERSION_STR
+from PyQt6.QtWidgets import QApplication
+
+from bcmp import sum
+from bcmp.config_schema import ClassConfig, NetworkConfig, RoutingEntry, ServiceCenterConfig
+from bcmp.network import BCMPNetwork
+from bcmp.simulation import ENTRY_NODE, TicketSimulation
+from gui.controllers import NetworkController
+from gui.main_window import MainWindow
+
+
+BASELINE_PATH = Path(__file__).with_name("gui_baseline.json")
+NODE_TYPES = ("FCFS", "PS", "IS", "LCFS_PR")
+TIME_STEP = 0.1
+# Historia trafia do widoku porcjami – mniejszymi niż bufor surowych próbek symulacji.
+FILL_CHUNK = 1000
+# Różnice poniżej tych progów traktowane są jako szum pomiaru.
+MIN_TIME_DELTA_MS = 1.0
+MIN_MEMORY_DELTA_MB = 5.0
+
+
+def synthetic_config(nodes: int, classes: int = 2, degree: int = 4, seed: int = 0) -> NetworkConfig:
+    """Losowa, ale powtarzalna sieć: `nodes` węzłów, `degree` krawędzi wychodzących na węzeł i klasę.
+
+    Pierwszym węzłem jest węzeł wejściowy symulacji; każdy węzeł kieruje do
+    następnego (cykl gwarantuje nieredukowalność routingu) oraz do losowych.
+    """
+
+    if nodes < 2:
+        raise ValueError("Sieć syntetyczna musi mieć co najmniej dwa węzły")
+
+    rng = np.random.default_rng(seed)
+    node_ids = [ENTRY_NODE] + [f"N{index:04d}" for index in range(1, nodes)]
+    class_configs = [
+        ClassConfig(id=f"K{index}", name=f"Klasa {index}", population=5 + nodes // 20, priority=index + 1)
+        for index in range(classes)
+    ]
+    node_configs = []
+    for index, node_id in enumerate(node_ids):
+        node_type = NODE_TYPES[index % len(NODE_TYPES)]
+        node_configs.append(
+            ServiceCenterConfig(
+                id=node_id,
+                name=f"Węzeł {index}",
+                node_type=node_type,
+                servers=None if node_type == "IS" else 1 + index % 3,
+                service_rates_per_class={
+                    class_config.id: round(float(rng.uniform(2.0, 10.0)), 3) for class_config in class_configs
+                },
+            )
+        )
+
+    routing_per_class: Dict[str, List[RoutingEntry]] = {}
+    for class_config in class_configs:
+        entries = []
+        for index, node_id in enumerate(node_ids):
+            following = (index + 1) % nodes
+            others = [int(target) for target in rng.permutation(nodes) if target not in (index, following)]
+            targets = [following] + others[: max(0, min(degree, nodes) - 1)]
+            weights = rng.uniform(0.5, 1.5, len(targets))
+            weights /= weights.sum()
+            entries += [
+                RoutingEntry(node_id, node_ids[target], float(weight)) for target, weight in zip(targets, weights)
+            ]
+        routing_per_class[class_config.id] = entries
+
+    return NetworkConfig(nodes=node_configs, classes=class_configs, routing_per_class=routing_per_class)
+
+
+def _rss_mb() -> float:
+    """Bieżąca pamięć rezydentna procesu [MB] (Linux: /proc/self/statm)."""
+
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        # Awaryjnie: szczytowe RSS (na Linuksie w KiB).
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _drain(app: QApplication) -> None:
+    """Przetwarza zaległe zdarzenia (m.in. rysowanie) aż do opróżnienia kolejki."""
+
+    app.sendPostedEvents()
+    app.processEvents()
+
+
+def _timed(app: QApplication, action: Callable[[], None], repeat: int, prepare: Callable[[], None] | None = None):
+    samples = []
+    for _ in range(repeat):
+        if prepare is not None:
+            prepare()
+        started = time.perf_counter()
+        action()
+        _drain(app)
+        samples.append((time.perf_counter() - started) * 1000)
+    return {"median": round(statistics.median(samples), 3), "min": round(min(samples), 3)}
+
+
+def _step(window: MainWindow, steps: int) -> None:
+    simulation = window.simulation
+    with window.simulation_view.worker.lock:
+        simulation.start()
+        for _ in range(steps):
+            simulation.step(TIME_STEP)
+        simulation.stop()
+
+
+def bench_size(
+    app: QApplication,
+    nodes: int,
+    histories: Sequence[int],
+    repeat: int,
+    max_points: int,
+) -> dict:
+    """Mierzy jedną sieć syntetyczną; zwraca słownik metryk (czasy w ms, pamięć w MB)."""
+
+    network = BCMPNetwork(synthetic_config(nodes))
+    started = time.perf_counter()
+    sum.compute_network_metrics(network)
+    sum_ms = (time.perf_counter() - started) * 1000
+
+    gc.collect()
+    rss_before = _rss_mb()
+    started = time.perf_counter()
+    simulation = TicketSimulation(network, seed=1)
+    controller = NetworkController(network, simulation, speculate=False)
+    window = MainWindow(network, controller, simulation)
+    window.show()
+    _drain(app)
+    construction_ms = (time.perf_counter() - started) * 1000
+    window_mb = _rss_mb() - rss_before
+
+    view = window.simulation_view
+    # Pomiar bez wątku roboczego i bez adaptacji szczegółowości – klatki publikowane są tylko na żądanie.
+    view.worker.stop_and_wait()
+    view.frame_budget.set_adaptive(False)
+
+    result = {
+        "nodes": nodes,
+        "sum_ms": round(sum_ms, 3),
+        "construction_ms": round(construction_ms, 3),
+        "window_mb": round(window_mb, 1),
+        "refresh_views_ms": _timed(app, window.refresh_views, repeat),
+        "simulation_refresh": {},
+    }
+
+    for history in sorted(histories):
+        if nodes * history > max_points:
+            continue
+        while simulation.history.total < history:
+            _step(window, min(FILL_CHUNK, history - simulation.history.total))
+            view.refresh()
+            _drain(app)
+        result["simulation_refresh"][str(history)] = {
+            "refresh_ms": _timed(app, view.refresh, repeat, prepare=lambda: _step(window, 1)),
+            "memory_mb": round(_rss_mb() - rss_before, 1),
+        }
+
+    window.close()
+    window.deleteLater()
+    _drain(app)
+    gc.collect()
+    return result
+
+
+def _bench_process(nodes: int, histories: Sequence[int], repeat: int, max_points: int) -> dict:
+    app = QApplication.instance() or QApplication([])
+    # Rozgrzewka: pierwsze okno ponosi koszty jednorazowe (wtyczki Qt, czcionki, importy leniwe).
+    bench_size(app, 5, [], 1, max_points)
+    return bench_size(app, nodes, histories, repeat, max_points)
+
+
+def run(sizes: Sequence[int], histories: Sequence[int], repeat: int, max_points: int) -> dict:
+    results = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "qt": QT_VERSION_STR,
+            "pyqt": PYQT_VERSION_STR,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": repeat,
+        },
+        "sizes": {},
+    }
+    context = multiprocessing.get_context("spawn")
+    for nodes in sizes:
+        print(f"Sieć {nodes} węzłów…", file=sys.stderr)
+        with context.Pool(processes=1) as pool:
+            results["sizes"][str(nodes)] = pool.apply(_bench_process, (nodes, histories, repeat, max_points))
+    return results
+
+
+def _flatten(results: dict) -> Dict[str, float]:
+    """Metryki porównywane z linią bazową: mediany czasów [ms] i pamięć [MB]."""
+
+    flat: Dict[str, float] = {}
+    for nodes, size in results.get("sizes", {}).items():
+        prefix = f"{nodes} węzłów"
+        flat[f"{prefix} · konstrukcja [ms]"] = size["construction_ms"]
+        flat[f"{prefix} · pamięć okna [MB]"] = size["window_mb"]
+        flat[f"{prefix} · refresh_views [ms]"] = size["refresh_views_ms"]["median"]
+        for history, sample in size["simulation_refresh"].items():
+            flat[f"{prefix} · historia {history} · refresh [ms]"] = sample["refresh_ms"]["median"]
+            flat[f"{prefix} · historia {history} · pamięć [MB]"] = sample["memory_mb"]
+    return flat
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> List[dict]:
+    """Zestawia metryki z linią bazową; `regression` = gorzej o więcej niż `tolerance` (względnie)."""
+
+    current, reference = _flatten(results), _flatten(baseline)
+    rows = []
+    for name, value in current.items():
+        base = reference.get(name)
+        if base is None:
+            continue
+        floor = MIN_MEMORY_DELTA_MB if name.endswith("[MB]") else MIN_TIME_DELTA_MS
+        ratio = value / base if base > 0 else float("inf") if value > 0 else 1.0
+        rows.append(
+            {
+                "metric": name,
+                "baseline": base,
+                "current": value,
+                "ratio": round(ratio, 3),
+                "regression": value - base > floor and ratio > 1.0 + tolerance,
+            }
+        )
+    return rows
+
+
+def _print_comparison(rows: List[dict]) -> None:
+    width = max((len(row["metric"]) for row in rows), default=10)
+    for row in rows:
+        flag = "  REGRESJA" if row["regression"] else ""
+        print(
+            f"{row['metric']:<{width}}  {row['baseline']:>10.2f}  {row['current']:>10.2f}  ×{row['ratio']:.2f}{flag}",
+            file=sys.stderr,
+        )
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark GUI na platformie Qt offscreen")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 50, 200, 1000], help="liczby węzłów sieci")
+    parser.add_argument(
+        "--histories", type=int, nargs="+", default=[1_000, 10_000, 50_000], help="długości historii (kroki symulacji)"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="liczba powtórzeń każdego pomiaru czasu")
+    parser.add_argument(
+        "--max-points",
+        type=int,
+        default=2_000_000,
+        help="pomija historie, dla których węzły × kroki przekraczają ten limit",
+    )
+    parser.add_argument("--output", type=Path, help="plik wynikowy JSON (domyślnie standardowe wyjście)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="linia bazowa do porównania")
+    parser.add_argument("--update-baseline", action="store_true", help="zapisuje wyniki jako nową linię bazową")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="dopuszczalne względne pogorszenie")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.histories, args.repeat, args.max_points)
+
+    regressions = 0
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"Zapisano linię bazową: {args.baseline}", file=sys.stderr)
+    elif args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        rows = compare(results, baseline, args.tolerance)
+        results["comparison"] = {"baseline": str(args.baseline), "tolerance": args.tolerance, "metrics": rows}
+        _print_comparison(rows)
+        regressions = len([row for row in rows if row["regression"]])
+    else:
+        print(f"Brak linii bazowej {args.baseline} – pomijam porównanie", file=sys.stderr)
+
+    text = json.dumps(results, indent=2, ensure_ascii=False) + "\n"
+    if args.output is not None:
+        args.output.write_text(text, encoding="utf-8")
+    else:
+        sys.stdout.write(text)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,20 +7,97 @@ Tutaj można umieścić funkcje/kontrolery, które:
 - informują widoki o konieczności odświeżenia.
 """
 
+from concurrent.futures import Future
+from contextlib import nullcontext
+from typing import ContextManager
+
+from PyQt6.QtCore import QObject, Qt, QTimer, pyqtSignal
+
 from bcmp.network import BCMPNetwork
 from bcmp import sum
+from bcmp.replications import ReplicationResults, submit_replications
+from bcmp.scenarios import MetricsCache, config_fingerprint
 from bcmp.simulation import TicketSimulation
+from bcmp.solver_pool import SolveProgress, SolverPool
+from gui.speculation import SpeculativeSolver
 
 
-class NetworkController:
+class NetworkController(QObject):
     """Kontroler łączący GUI z modelem sieci BCMP.
+
+    Przeliczenie SUM wykonywane jest w procesie roboczym (`SolverPool`):
+    interfejs nie zamiera, a do czasu nadejścia nowego wyniku widoki
+    pokazują ostatni poprawny. Nowsze zlecenie (lub edycja w trybie
+    automatycznym) przerywa poprzednie; w trybie automatycznym edycje
+    zgłaszane przez `config_edited()` są grupowane (debounce) i przeliczenie
+    startuje dopiero `debounce_ms` po ostatniej z nich.
+
+    Sygnały `solve_started`, `solve_progress`, `solve_finished` i
+    `solve_failed` pozwalają pokazać postęp i błędy (np. brak zbieżności).
+    Replikacje symulacji również liczone są w tle (`replications_*`).
+
+    Wyniki trafiają do `cache` (odcisk konfiguracji → metryki). Po każdym
+    nowym wyniku `SpeculativeSolver` przelicza w tle scenariusze sąsiednie
+    (±1 serwer, ±10% intensywności, ±1 klient), więc przeliczenie
+    konfiguracji już obecnej w pamięci podręcznej jest natychmiastowe
+    (`last_from_cache`), a w trybie automatycznym edycja trafiająca w taki
+    scenariusz pomija debounce.
     """
 
-    def __init__(self, network: BCMPNetwork, simulation: TicketSimulation | None = None) -> None:
+    solve_started = pyqtSignal(int)
+    solve_progress = pyqtSignal(object)
+    solve_finished = pyqtSignal(int)
+    solve_failed = pyqtSignal(int, str)
+    _solve_done = pyqtSignal(int, object)
+    replications_started = pyqtSignal()
+    replications_finished = pyqtSignal(object)
+    replications_failed = pyqtSignal(str)
+    _replications_done = pyqtSignal(object)
+
+    def __init__(
+        self,
+        network: BCMPNetwork,
+        simulation: TicketSimulation | None = None,
+        debounce_ms: int = 400,
+        progress_interval_ms: int = 100,
+        speculate: bool = True,
+        idle_delay_ms: int = 1000,
+    ) -> None:
+        super().__init__()
         self.network = network
         self.simulation = simulation
+        self.replication_results: ReplicationResults | None = None
+        self._replications: Future | None = None
         self._listeners = []
 
+        self.solver = SolverPool()
+        self.auto_recompute = False
+        self.last_error: str | None = None
+        self.last_from_cache = False
+        self._pending_generation: int | None = None
+        self._pending_fingerprint: str | None = None
+        self._rho_request: tuple[dict[str, float], ContextManager | None] | None = None
+        # Kolejkowane zawsze – także gdy zlecenie zakończyło się, zanim dodano wywołanie zwrotne.
+        self._solve_done.connect(self._on_solve_done, Qt.ConnectionType.QueuedConnection)
+        self._replications_done.connect(self._on_replications_done, Qt.ConnectionType.QueuedConnection)
+
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(debounce_ms)
+        self._debounce.timeout.connect(self.recompute_metrics)
+
+        self._progress_timer = QTimer(self)
+        self._progress_timer.setInterval(progress_interval_ms)
+        self._progress_timer.timeout.connect(self._poll_progress)
+
+        self.cache = MetricsCache()
+        self.speculate = speculate
+        self.speculation = SpeculativeSolver(self.cache, parent=self)
+        if network.metrics.per_node:
+            # Metryki policzone przed startem GUI – spekulację zaczynamy, gdy interfejs będzie bezczynny.
+            self.cache.put(config_fingerprint(network.config), network.metrics)
+            QTimer.singleShot(idle_delay_ms, self._start_speculation)
+
     def add_listener(self, callback) -> None:
         """Rejestruje funkcję wywoływaną po aktualizacji modelu."""
 
@@ -30,18 +107,139 @@ class NetworkController:
         for callback in self._listeners:
             callback()
 
-    def recompute_metrics(self) -> None:
-        """Przelicza metryki sieci i aktualizuje model.
+    # --- Przeliczanie SUM ------------------------------------------------------
+    @property
+    def solving(self) -> bool:
+        return self._pending_generation is not None
+
+    def recompute_metrics(self) -> int:
+        """Zleca przeliczenie metryk sieci w tle i zwraca numer zlecenia.
+
+        Wynik trafia do modelu (i do słuchaczy) dopiero po zakończeniu
+        obliczeń; zlecenie wcześniejsze od najnowszego jest porzucane.
         """
-        sum.compute_network_metrics(self.network)
+
+        self._debounce.stop()
+        fingerprint = config_fingerprint(self.network.config)
+        cached = self.cache.get(fingerprint)
+        if cached is not None:
+            self.solver.cancel()
+            self._finish_pending()
+            self._apply_result(self.solver.generation, cached, from_cache=True)
+            return self.solver.generation
+
+        self.speculation.cancel()
+        generation, future = self.solver.submit(self.network.config)
+        self._pending_generation = generation
+        self._pending_fingerprint = fingerprint
+        self._progress_timer.start()
+        self.solve_started.emit(generation)
+        future.add_done_callback(lambda done, gen=generation: self._solve_done.emit(gen, done))
+        return generation
+
+    def config_edited(self) -> None:
+        """Informuje o edycji konfiguracji; w trybie automatycznym planuje przeliczenie."""
+
+        # Scenariusze sąsiednie dotyczą konfiguracji sprzed edycji.
+        self.speculation.cancel()
+        if not self.auto_recompute:
+            return
+        if config_fingerprint(self.network.config) in self.cache:
+            self.recompute_metrics()
+            return
+        if self.solving:
+            self.solver.cancel()
+        self._debounce.start()
+
+    def set_auto_recompute(self, enabled: bool) -> None:
+        self.auto_recompute = enabled
+        if not enabled:
+            self._debounce.stop()
+
+    def shutdown(self) -> None:
+        self._debounce.stop()
+        self._progress_timer.stop()
+        self.speculation.shutdown()
+        self.solver.shutdown()
+        if self._replications is not None:
+            self._replications.cancel()
+            self._replications = None
+
+    def _poll_progress(self) -> None:
+        progress: SolveProgress = self.solver.progress()
+        if progress.generation == self._pending_generation:
+            self.solve_progress.emit(progress)
+
+    def _finish_pending(self) -> None:
+        self._pending_generation = None
+        self._progress_timer.stop()
+
+    def _on_solve_done(self, generation: int, future: Future) -> None:
+        if generation != self._pending_generation:
+            return
+        self._finish_pending()
+        if future.cancelled():
+            return
+
+        error = future.exception()
+        if isinstance(error, sum.SolveCancelled):
+            return
+        if error is not None:
+            self._rho_request = None
+            self.last_error = str(error) or type(error).__name__
+            self.solve_failed.emit(generation, self.last_error)
+            return
+
+        metrics = future.result()
+        self.cache.put(self._pending_fingerprint, metrics)
+        self._apply_result(generation, metrics, from_cache=False)
+
+    def _apply_result(self, generation: int, metrics, from_cache: bool) -> None:
+        self.last_error = None
+        self.last_from_cache = from_cache
+        sum.apply_metrics(self.network, metrics)
+        self.solve_finished.emit(generation)
         self._notify_listeners()
+        request, self._rho_request = self._rho_request, None
+        if request is not None and metrics.visit_ratios:
+            self.tune_service_rates_for_rho(*request)
+            return
+        self._start_speculation()
 
-    def tune_service_rates_for_rho(self, targets: dict[str, float]) -> None:
-        """Skaluje stawki obsługi, aby zbliżyć się do docelowych wartości ρ."""
+    def _start_speculation(self) -> None:
+        if not self.speculate or self.solving:
+            return
+        # Najpierw węzły najbardziej obciążone – to je najczęściej się poprawia.
+        per_node = self.network.metrics.per_node
+        order = sorted(
+            per_node,
+            key=lambda node_id: -(per_node[node_id].summary.utilization if per_node[node_id].summary else 0.0),
+        )
+        self.speculation.start(self.network.config, order)
+
+    def tune_service_rates_for_rho(self, targets: dict[str, float], lock: ContextManager | None = None) -> bool:
+        """Skaluje stawki obsługi, aby zbliżyć się do docelowych wartości ρ.
+
+        Skalowanie korzysta ze współczynników odwiedzin ostatniego wyniku SUM.
+        Gdy jeszcze ich nie ma, przeliczenie zlecane jest w tle, a stawki
+        zostaną dopasowane po jego nadejściu (zwraca wtedy False). Stawki
+        zmieniane są pod blokadą `lock` (np. blokadą wątku symulacji),
+        przeliczenie po zmianie – już poza nią.
+        """
 
         if not self.network.metrics.visit_ratios:
-            sum.compute_network_metrics(self.network)
+            self._rho_request = (dict(targets), lock)
+            if not self.solving:
+                self.recompute_metrics()
+            return False
+
+        with lock if lock is not None else nullcontext():
+            self._scale_service_rates(targets)
+        self._notify_listeners()
+        self.recompute_metrics()
+        return True
 
+    def _scale_service_rates(self, targets: dict[str, float]) -> None:
         node_index = {node.id: idx for idx, node in enumerate(self.network.config.nodes)}
         visits = self.network.metrics.visit_ratios
 
@@ -77,9 +275,6 @@ class NetworkController:
                     for class_id, mu in node.config.service_rates_per_class.items():
                         config_node.service_rates_per_class[class_id] = mu
 
-        sum.compute_network_metrics(self.network)
-        self._notify_listeners()
-
     # --- Symulacja -----------------------------------------------------------
     def toggle_simulation(self) -> None:
         if self.simulation is not None:
@@ -88,3 +283,36 @@ class NetworkController:
     def reset_simulation(self) -> None:
         if self.simulation is not None:
             self.simulation.reset()
+
+    @property
+    def replications_running(self) -> bool:
+        return self._replications is not None
+
+    def run_replications(self, replications: int = 8, **kwargs) -> bool:
+        """Zleca w tle niezależne replikacje symulacji bieżącej konfiguracji.
+
+        Wynik nadchodzi sygnałem `replications_finished` (albo
+        `replications_failed`); zwraca False, gdy poprzednia seria jeszcze trwa.
+        """
+
+        if self._replications is not None:
+            return False
+        future = submit_replications(self.network.config, replications, **kwargs)
+        self._replications = future
+        self.replications_started.emit()
+        future.add_done_callback(self._replications_done.emit)
+        return True
+
+    def _on_replications_done(self, future: Future) -> None:
+        if future is not self._replications:
+            return
+        self._replications = None
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            self.replications_failed.emit(str(error) or type(error).__name__)
+            return
+        self.replication_results = future.result()
+        self._notify_listeners()
+        self.replications_finished.emit(self.replication_results)
@@ -0,0 +1,89 @@
+"""Przerzedzanie serii danych do rozdzielczości wykresu.
+
+Wykres nie pokaże więcej punktów niż ma pikseli szerokości, więc długie
+historie kolejek przed przekazaniem do Qt redukowane są do rozmiaru
+rzędu szerokości wykresu:
+
+- `minmax_downsample`: w każdym przedziale zachowuje minimum i maksimum
+  (szybkie, wektorowe, nie gubi pików),
+- `lttb_downsample`: Largest-Triangle-Three-Buckets (wierniejszy kształt
+  przy niewielkiej liczbie punktów, wolniejszy),
+- `bucket_extrema`: minimum i maksimum w przedziałach czasu o stałej
+  szerokości wyrównanych do zera – ta sama próbka zawsze trafia do tego
+  samego przedziału, więc nowe dane można dopisywać bez ponownego
+  przerzedzania całej serii.
+"""
+
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+
+
+Series = Tuple[np.ndarray, np.ndarray]
+
+
+def minmax_downsample(x: np.ndarray, y: np.ndarray, max_points: int) -> Series:
+    """Redukuje serię do co najwyżej `max_points` punktów (min i max w każdym przedziale)."""
+
+    count = x.shape[0]
+    if count <= max_points or max_points < 4:
+        return x, y
+
+    buckets = max_points // 2
+    size = -(-count // buckets)
+    padded = buckets * size
+    values = np.empty(padded, dtype=np.float64)
+    values[:count] = y
+    values[count:] = y[-1]
+    grid = values.reshape(buckets, size)
+
+    base = np.arange(buckets) * size
+    low = base + grid.argmin(axis=1)
+    high = base + grid.argmax(axis=1)
+    indices = np.minimum(np.column_stack([np.minimum(low, high), np.maximum(low, high)]).ravel(), count - 1)
+    indices = indices[np.concatenate(([True], np.diff(indices) != 0))]
+    return x[indices], y[indices]
+
+
+def lttb_downsample(x: np.ndarray, y: np.ndarray, max_points: int) -> Series:
+    """Redukuje serię algorytmem Largest-Triangle-Three-Buckets."""
+
+    count = x.shape[0]
+    if count <= max_points or max_points < 3:
+        return x, y
+
+    edges = np.linspace(1, count - 1, max_points - 1).astype(np.int64)
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = count - 1
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_stop = edges[bucket + 2] if bucket + 2 < edges.shape[0] else count
+        next_x = x[stop:next_stop].mean() if next_stop > stop else x[-1]
+        next_y = y[stop:next_stop].mean() if next_stop > stop else y[-1]
+
+        candidates_x = x[start:stop]
+        candidates_y = y[start:stop]
+        areas = np.abs(
+            (x[previous] - next_x) * (candidates_y - y[previous])
+            - (x[previous] - candidates_x) * (next_y - y[previous])
+        )
+        previous = start + int(areas.argmax())
+        selected[bucket + 1] = previous
+
+    return x[selected], y[selected]
+
+
+def bucket_extrema(
+    times: np.ndarray, minimum: np.ndarray, maximum: np.ndarray, width: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Zwraca (indeksy przedziałów `floor(t / width)`, minima, maksima) dla rosnących `times`."""
+
+    if times.shape[0] == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+    buckets = np.floor(times / width).astype(np.int64)
+    starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+    return buckets[starts], np.minimum.reduceat(minimum, starts), np.maximum.reduceat(maximum, starts)
@@ -0,0 +1,186 @@
+"""Pomiar czasu klatek widoku symulacji i adaptacja rytmu odświeżania.
+
+Klatką jest jedna aktualizacja widoku po opublikowaniu migawki. Dla każdej
+klatki zbierane są:
+
+- czas kroków symulacji od poprzedniej klatki (wątek roboczy),
+- czas pobrania migawki (wątek roboczy),
+- czas aktualizacji poszczególnych widżetów w wątku GUI (`measure`),
+- czas rysowania widżetów (`PaintTimingMixin`, zliczany do następnej klatki).
+
+`FrameBudget` porównuje wygładzony koszt klatki w wątku GUI z budżetem:
+po przekroczeniu najpierw obniża poziom szczegółowości (mniej punktów
+wykresu, rzadsze przerysowanie, krótszy przyrost dziennika), a gdy to nie
+wystarcza – wydłuża odstęp między klatkami. Gdy koszt spada wyraźnie
+poniżej budżetu, zmiany są wycofywane w odwrotnej kolejności.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterator
+
+
+@dataclass(frozen=True)
+class DetailLevel:
+    """Parametry jednego poziomu szczegółowości widoku."""
+
+    chart_scale: float  # mnożnik docelowej liczby punktów serii
+    chart_every: int  # przerysowanie wykresu co tyle klatek
+    log_lines: int  # maksymalny przyrost dziennika na klatkę
+
+
+DETAIL_LEVELS = (
+    DetailLevel(chart_scale=1.0, chart_every=1, log_lines=500),
+    DetailLevel(chart_scale=0.5, chart_every=2, log_lines=100),
+    DetailLevel(chart_scale=0.25, chart_every=4, log_lines=20),
+)
+
+
+@dataclass
+class FrameTiming:
+    """Czasy jednej klatki [s]."""
+
+    frame: int
+    interval: float
+    level: int
+    step: float = 0.0
+    steps: int = 0
+    snapshot: float = 0.0
+    widgets: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def gui(self) -> float:
+        """Czas wątku GUI: aktualizacje i rysowanie widżetów."""
+
+        return sum(self.widgets.values())
+
+    @property
+    def total(self) -> float:
+        return self.step + self.snapshot + self.gui
+
+    def summary(self) -> str:
+        parts = [f"kroki {self.step * 1000:.1f} ms ({self.steps})", f"migawka {self.snapshot * 1000:.1f} ms"]
+        parts += [f"{name} {seconds * 1000:.1f} ms" for name, seconds in self.widgets.items()]
+        return f"klatka {self.total * 1000:.1f} ms: " + " · ".join(parts)
+
+
+class FrameBudget:
+    """Zbiera czasy klatek i dobiera odstęp klatek oraz poziom szczegółowości.
+
+    - `budget`: docelowy czas pracy wątku GUI na klatkę [s],
+    - `base_interval` / `max_interval`: zakres odstępu między klatkami [s],
+    - `history`: liczba ostatnich klatek przechowywanych do podglądu.
+    """
+
+    def __init__(
+        self,
+        budget: float = 0.025,
+        base_interval: float = 0.1,
+        max_interval: float = 1.0,
+        history: int = 300,
+        smoothing: float = 0.2,
+        cooldown: int = 10,
+    ) -> None:
+        if budget <= 0 or base_interval <= 0 or max_interval < base_interval:
+            raise ValueError("Budżet i odstępy klatek muszą być dodatnie (max ≥ bazowy)")
+        self.budget = budget
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self.smoothing = smoothing
+        self.cooldown = cooldown
+        self.adaptive = True
+
+        self.interval = base_interval
+        self.level = 0
+        self.frames = 0
+        self.average = 0.0
+        self.history: Deque[FrameTiming] = deque(maxlen=history)
+        self._current: Dict[str, float] = {}
+        self._paint: Dict[str, float] = {}
+        self._frames_since_change = 0
+
+    @property
+    def detail(self) -> DetailLevel:
+        return DETAIL_LEVELS[self.level]
+
+    @contextmanager
+    def measure(self, name: str) -> Iterator[None]:
+        """Dolicza czas bloku do pozycji `name` bieżącej klatki."""
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._current[name] = self._current.get(name, 0.0) + time.perf_counter() - start
+
+    def add_paint(self, name: str, seconds: float) -> None:
+        self._paint[name] = self._paint.get(name, 0.0) + seconds
+
+    def end_frame(self, step: float = 0.0, steps: int = 0, snapshot: float = 0.0) -> FrameTiming:
+        """Zamyka klatkę, zapisuje jej czasy i ewentualnie zmienia odstęp lub poziom."""
+
+        widgets = dict(self._current)
+        # Qt rysuje widżety po aktualizacji, między klatkami – ten czas raportuje klatka następna.
+        for name, seconds in self._paint.items():
+            widgets[f"{name} (rysowanie)"] = seconds
+        self._current.clear()
+        self._paint.clear()
+
+        timing = FrameTiming(self.frames, self.interval, self.level, step, steps, snapshot, widgets)
+        self.history.append(timing)
+        self.frames += 1
+        self.average += self.smoothing * (timing.gui - self.average) if self.frames > 1 else timing.gui
+        if self.adaptive:
+            self._adapt()
+        return timing
+
+    def _adapt(self) -> None:
+        self._frames_since_change += 1
+        if self._frames_since_change < self.cooldown:
+            return
+
+        if self.average > self.budget:
+            if self.level < len(DETAIL_LEVELS) - 1:
+                self.level += 1
+            elif self.interval < self.max_interval:
+                self.interval = min(self.max_interval, self.interval * 1.25)
+            else:
+                return
+        elif self.average < self.budget / 2:
+            if self.interval > self.base_interval:
+                self.interval = max(self.base_interval, self.interval / 1.25)
+            elif self.level > 0:
+                self.level -= 1
+            else:
+                return
+        else:
+            return
+        self._frames_since_change = 0
+
+    def set_adaptive(self, enabled: bool) -> None:
+        self.adaptive = enabled
+        if not enabled:
+            self.interval = self.base_interval
+            self.level = 0
+
+    def slowest(self) -> FrameTiming | None:
+        return max(self.history, key=lambda timing: timing.gui, default=None)
+
+
+class PaintTimingMixin:
+    """Domieszka do widżetów Qt zliczająca czas `paintEvent` w `FrameBudget`."""
+
+    paint_budget: FrameBudget | None = None
+    paint_name: str = ""
+
+    def paintEvent(self, event) -> None:
+        if self.paint_budget is None:
+            super().paintEvent(event)
+            return
+        start = time.perf_counter()
+        super().paintEvent(event)
+        self.paint_budget.add_paint(self.paint_name, time.perf_counter() - start)
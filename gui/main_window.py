@@ -6,10 +6,14 @@ To okno ma spinać poszczególne widoki:
 - ewentualnie panel do modyfikacji parametrów i ponownego przeliczenia.
 """
 
+import math
+
 from PyQt6.QtGui import QAction
-from PyQt6.QtWidgets import QMainWindow, QTabWidget
+from PyQt6.QtWidgets import QLabel, QMainWindow, QProgressBar, QTabWidget
 
 from bcmp.network import BCMPNetwork
+from bcmp.replications import ReplicationResults
+from bcmp.solver_pool import SolveProgress
 
 from gui.controllers import NetworkController
 from gui.network_view import NetworkView
@@ -32,25 +36,43 @@ class MainWindow(QMainWindow):
 
         self._setup_actions()
         self._setup_central_widget()
+        self._setup_status_bar()
 
         self.controller.add_listener(self.refresh_views)
+        self.controller.solve_started.connect(self._on_solve_started)
+        self.controller.solve_progress.connect(self._on_solve_progress)
+        self.controller.solve_finished.connect(self._on_solve_finished)
+        self.controller.solve_failed.connect(self._on_solve_failed)
+        self.controller.replications_started.connect(self._on_replications_started)
+        self.controller.replications_finished.connect(self._on_replications_finished)
+        self.controller.replications_failed.connect(self._on_replications_failed)
 
     def _setup_actions(self) -> None:
         recompute_action = QAction("Recompute", self)
         recompute_action.triggered.connect(self.recompute_metrics)
 
+        self.auto_recompute_action = QAction("Przeliczaj automatycznie", self)
+        self.auto_recompute_action.setCheckable(True)
+        self.auto_recompute_action.toggled.connect(self.controller.set_auto_recompute)
+
+        self.replications_action = QAction("Replikacje symulacji", self)
+        self.replications_action.triggered.connect(self.run_replications)
+
         menubar = self.menuBar()
         compute_menu = menubar.addMenu("Compute")
         compute_menu.addAction(recompute_action)
+        compute_menu.addAction(self.auto_recompute_action)
+        compute_menu.addAction(self.replications_action)
 
         toolbar = self.addToolBar("Actions")
         toolbar.addAction(recompute_action)
+        toolbar.addAction(self.auto_recompute_action)
 
     def _setup_central_widget(self) -> None:
         tabs = QTabWidget()
 
         self.simulation_view = SimulationView(self.network, self.simulation)
-        self.network_view = NetworkView(self.network, self.controller)
+        self.network_view = NetworkView(self.network, self.controller, lock=self.simulation_view.worker.lock)
         self.results_view = ResultsView(self.network, self.simulation)
 
         tabs.addTab(self.simulation_view, "Symulacja")
@@ -59,11 +81,71 @@ class MainWindow(QMainWindow):
 
         self.setCentralWidget(tabs)
 
+    def _setup_status_bar(self) -> None:
+        self.solve_label = QLabel()
+        self.solve_progress = QProgressBar()
+        self.solve_progress.setRange(0, 100)
+        self.solve_progress.setMaximumWidth(160)
+        self.solve_progress.setVisible(False)
+        self.statusBar().addPermanentWidget(self.solve_label)
+        self.statusBar().addPermanentWidget(self.solve_progress)
+
     def recompute_metrics(self) -> None:
-        """Wywołuje przeliczenie sieci i odświeża widoki."""
+        """Zleca przeliczenie sieci; widoki odświeżą się po nadejściu wyniku."""
 
         self.controller.recompute_metrics()
 
+    def _on_solve_started(self, generation: int) -> None:
+        self.solve_label.setText("Przeliczanie SUM… (widoczny poprzedni wynik)")
+        self.solve_progress.setValue(0)
+        self.solve_progress.setVisible(True)
+
+    def _on_solve_progress(self, progress: SolveProgress) -> None:
+        # Postęp mierzony zbieżnością: błąd względny maleje od ~1 do eps.
+        if progress.error > 0 and math.isfinite(progress.error):
+            target = -math.log10(self.controller.solver.eps)
+            fraction = min(max(-math.log10(progress.error) / target, 0.0), 1.0)
+            self.solve_progress.setValue(int(fraction * 100))
+        self.solve_label.setText(f"Przeliczanie SUM… iteracja {progress.iteration}")
+
+    def _on_solve_finished(self, generation: int) -> None:
+        self.solve_progress.setVisible(False)
+        self.solve_label.clear()
+        if self.controller.last_from_cache:
+            self.statusBar().showMessage("Wynik ze scenariusza przeliczonego wcześniej w tle", 3000)
+
+    def _on_solve_failed(self, generation: int, message: str) -> None:
+        self.solve_progress.setVisible(False)
+        self.solve_label.setText("Błąd SUM – widoczny ostatni poprawny wynik")
+        self.statusBar().showMessage(f"Przeliczenie nie powiodło się: {message}", 10000)
+
+    def run_replications(self) -> None:
+        """Zleca replikacje symulacji; wyniki pojawią się obok SUM po ich zakończeniu."""
+
+        self.controller.run_replications()
+
+    def _on_replications_started(self) -> None:
+        self.replications_action.setEnabled(False)
+        self.statusBar().showMessage("Trwają replikacje symulacji…")
+
+    def _on_replications_finished(self, results: ReplicationResults) -> None:
+        self.replications_action.setEnabled(True)
+        self.statusBar().showMessage(
+            f"Zakończono {results.replications} replikacji (przedziały ufności {results.confidence:.0%})",
+            5000,
+        )
+
+    def _on_replications_failed(self, message: str) -> None:
+        self.replications_action.setEnabled(True)
+        self.statusBar().showMessage(f"Replikacje nie powiodły się: {message}", 10000)
+
     def refresh_views(self) -> None:
         self.network_view.refresh()
-        self.results_view.refresh()
+        self.results_view.set_replication_results(self.controller.replication_results)
+        with self.simulation_view.worker.lock:
+            self.results_view.refresh()
+
+    def closeEvent(self, event) -> None:
+        self.controller.shutdown()
+        self.simulation_view.shutdown()
+        super().closeEvent(event)
@@ -3,31 +3,43 @@
 Np. tabele/listy węzłów i klas, prosty graficzny rysunek sieci, itp.
 """
 
-from typing import Dict, List
+import threading
+from typing import ContextManager, Dict, List, Set
 
-from PyQt6.QtCore import Qt
+import numpy as np
+from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtWidgets import (
+    QCompleter,
+    QHBoxLayout,
     QLabel,
+    QLineEdit,
     QTabWidget,
-    QTableWidget,
-    QTableWidgetItem,
+    QTableView,
     QVBoxLayout,
     QWidget,
     QPushButton,
 )
 
-from bcmp.config_schema import RoutingEntry
 from bcmp.network import BCMPNetwork
-from bcmp.routing import build_routing_matrix
+from bcmp.routing import SparseRouting
+from gui.table_models import ArrayTableModel, RoutingTableModel
+
+
+DEFAULT_RHO_TARGET = 0.80
 
 
 class NetworkView(QWidget):
-    """Widok prezentujący aktualną konfigurację sieci."""
+    """Widok prezentujący aktualną konfigurację sieci.
 
-    def __init__(self, network: BCMPNetwork, controller=None) -> None:
+    Edycje zmieniają żywe struktury sieci czytane przez wątek symulacji,
+    dlatego wykonywane są pod blokadą `lock` (blokadą `SimulationWorker`).
+    """
+
+    def __init__(self, network: BCMPNetwork, controller=None, lock: ContextManager | None = None) -> None:
         super().__init__()
         self.network = network
         self.controller = controller
+        self.lock = lock if lock is not None else threading.RLock()
         self._loading = False
 
         self.node_ids: List[str] = [node.id for node in self.network.config.nodes]
@@ -52,10 +64,18 @@ class NetworkView(QWidget):
         tab_layout = QVBoxLayout()
         container.setLayout(tab_layout)
 
-        self.class_table = QTableWidget()
-        self.class_table.setColumnCount(3)
-        self.class_table.setHorizontalHeaderLabels(["ID", "Name", "Population"])
-        self.class_table.cellChanged.connect(self._on_class_changed)
+        self.class_model = ArrayTableModel(
+            ["ID", "Name"],
+            ["Population"],
+            value_format="{:.0f}",
+            editable_columns=[0],
+            on_edit=self._on_population_edited,
+            editable_labels=[1],
+            on_label_edit=self._on_class_name_edited,
+            parent=self,
+        )
+        self.class_table = QTableView()
+        self.class_table.setModel(self.class_model)
 
         tab_layout.addWidget(QLabel("Customer classes"))
         tab_layout.addWidget(self.class_table)
@@ -67,13 +87,29 @@ class NetworkView(QWidget):
         tab_layout = QVBoxLayout()
         container.setLayout(tab_layout)
 
-        self.node_table = QTableWidget()
-        self.node_table.setColumnCount(4)
-        self.node_table.setHorizontalHeaderLabels(["ID", "Name", "Type", "Servers"])
-        self.node_table.cellChanged.connect(self._on_node_changed)
-
-        self.service_rate_table = QTableWidget()
-        self.service_rate_table.cellChanged.connect(self._on_service_rate_changed)
+        self.node_model = ArrayTableModel(
+            ["ID", "Name", "Type"],
+            ["Servers"],
+            value_format="{:.0f}",
+            editable_columns=[0],
+            on_edit=self._on_servers_edited,
+            editable_labels=[1, 2],
+            on_label_edit=self._on_node_label_edited,
+            parent=self,
+        )
+        self.node_table = QTableView()
+        self.node_table.setModel(self.node_model)
+
+        self.service_rate_model = ArrayTableModel(
+            ["Node "],
+            self.class_ids,
+            value_format="{}",
+            editable_columns=range(len(self.class_ids)),
+            on_edit=self._on_service_rate_edited,
+            parent=self,
+        )
+        self.service_rate_table = QTableView()
+        self.service_rate_table.setModel(self.service_rate_model)
 
         tab_layout.addWidget(QLabel("Service centers"))
         tab_layout.addWidget(self.node_table)
@@ -88,9 +124,16 @@ class NetworkView(QWidget):
         container.setLayout(tab_layout)
 
         tab_layout.addWidget(QLabel("Docelowe wykorzystanie ρ – dopasowywanie stawek obsługi"))
-        self.rho_table = QTableWidget()
-        self.rho_table.setColumnCount(3)
-        self.rho_table.setHorizontalHeaderLabels(["Node", "Aktualne ρ", "Cel ρ"])
+        self._rho_targets: Dict[str, float] = {}
+        self.rho_model = ArrayTableModel(
+            ["Node"],
+            ["Aktualne ρ", "Cel ρ"],
+            editable_columns=[1],
+            on_edit=self._on_rho_target_edited,
+            parent=self,
+        )
+        self.rho_table = QTableView()
+        self.rho_table.setModel(self.rho_model)
         tab_layout.addWidget(self.rho_table)
 
         self.apply_rho_button = QPushButton("Dostosuj stawki obsługi")
@@ -101,17 +144,54 @@ class NetworkView(QWidget):
 
     def _init_routing_tab(self) -> None:
         self.routing_tab = QTabWidget()
-        self.routing_tables: Dict[str, QTableWidget] = {}
+        self.routing_models: Dict[str, RoutingTableModel] = {}
+        self.routing_tables: Dict[str, QTableView] = {}
+        self.routing_status: Dict[str, QLabel] = {}
+        self._routing_invalid: Dict[str, Dict[str, float]] = {}
+        self._routing_dirty: Dict[str, Set[str]] = {}
+
+        # Walidacja i zgłoszenie zmiany raz na partię edycji (po powrocie do pętli zdarzeń).
+        self._routing_validation = QTimer(self)
+        self._routing_validation.setSingleShot(True)
+        self._routing_validation.setInterval(0)
+        self._routing_validation.timeout.connect(self._validate_routing_batch)
+
+        completer = QCompleter(self.node_ids, self)
+        completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
 
         for class_id in self.class_ids:
-            table = QTableWidget()
-            table.cellChanged.connect(lambda row, col, cid=class_id: self._on_routing_changed(cid, row, col))
+            table = QTableView()
             self.routing_tables[class_id] = table
+
+            from_edit = QLineEdit()
+            from_edit.setPlaceholderText("Z węzła")
+            from_edit.setCompleter(completer)
+            to_edit = QLineEdit()
+            to_edit.setPlaceholderText("Do węzła")
+            to_edit.setCompleter(completer)
+            probability_edit = QLineEdit()
+            probability_edit.setPlaceholderText("p (0 usuwa)")
+            set_button = QPushButton("Ustaw krawędź")
+            set_button.clicked.connect(
+                lambda _checked=False, cid=class_id, src=from_edit, dst=to_edit, prob=probability_edit: (
+                    self._set_routing_edge(cid, src.text().strip(), dst.text().strip(), prob.text())
+                )
+            )
+            form_layout = QHBoxLayout()
+            for widget in (from_edit, to_edit, probability_edit, set_button):
+                form_layout.addWidget(widget)
+
+            status = QLabel()
+            status.setWordWrap(True)
+            self.routing_status[class_id] = status
+
             wrapper = QWidget()
             wrapper_layout = QVBoxLayout()
             wrapper.setLayout(wrapper_layout)
-            wrapper_layout.addWidget(QLabel(f"Routing for class {class_id}"))
+            wrapper_layout.addWidget(QLabel(f"Routing for class {class_id} (niezerowe krawędzie)"))
             wrapper_layout.addWidget(table)
+            wrapper_layout.addLayout(form_layout)
+            wrapper_layout.addWidget(status)
             self.routing_tab.addTab(wrapper, class_id)
 
         self.tabs.addTab(self.routing_tab, "Routing")
@@ -130,196 +210,207 @@ class NetworkView(QWidget):
 
     def _refresh_classes(self) -> None:
         classes = self.network.config.classes
-        self.class_table.setRowCount(len(classes))
-
-        for row, cls in enumerate(classes):
-            for col, value in enumerate([cls.id, cls.name, str(cls.population)]):
-                item = QTableWidgetItem(value)
-                if col == 0:
-                    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                self.class_table.setItem(row, col, item)
-
-        self.class_table.resizeColumnsToContents()
+        populations = np.array([cls.population for cls in classes], dtype=np.float64)
+        if self.class_model.set_data([(cls.id, cls.name) for cls in classes], populations):
+            self.class_table.resizeColumnsToContents()
 
     def _refresh_nodes(self) -> None:
         nodes = self.network.config.nodes
-        self.node_table.setRowCount(len(nodes))
-
-        for row, node in enumerate(nodes):
-            values = [node.id, node.name, node.node_type, str(node.servers or "")]
-
-            for col, value in enumerate(values):
-                item = QTableWidgetItem(value)
-                if col == 0:
-                    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                self.node_table.setItem(row, col, item)
-
-        self.node_table.resizeColumnsToContents()
+        # Brak liczby serwerów (np. węzeł IS) to NaN – pusta komórka.
+        servers = np.array([node.servers or np.nan for node in nodes], dtype=np.float64)
+        if self.node_model.set_data([(node.id, node.name, node.node_type) for node in nodes], servers):
+            self.node_table.resizeColumnsToContents()
 
     def _refresh_service_rates(self) -> None:
         nodes = self.network.config.nodes
         classes = self.network.config.classes
 
-        self.service_rate_table.setColumnCount(len(classes) + 1)
-        headers = ["Node "] + [cls.id for cls in classes]
-        self.service_rate_table.setHorizontalHeaderLabels(headers)
-        self.service_rate_table.setRowCount(len(nodes))
-
-        for row, node in enumerate(nodes):
-            node_id_item = QTableWidgetItem(node.id)
-            node_id_item.setFlags(node_id_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-            self.service_rate_table.setItem(row, 0, node_id_item)
-
-            for col, cls in enumerate(classes, start=1):
-                rate = node.service_rates_per_class.get(cls.id, 0.0)
-                item = QTableWidgetItem(str(rate))
-                self.service_rate_table.setItem(row, col, item)
-
-        self.service_rate_table.resizeColumnsToContents()
+        self.service_rate_model.set_value_headers([cls.id for cls in classes])
+        rates = np.array(
+            [[node.service_rates_per_class.get(cls.id, 0.0) for cls in classes] for node in nodes],
+            dtype=np.float64,
+        )
+        if self.service_rate_model.set_data([(node.id,) for node in nodes], rates):
+            self.service_rate_table.resizeColumnsToContents()
 
     def _refresh_rho_targets(self) -> None:
         nodes = self.network.config.nodes
-        self.rho_table.setRowCount(len(nodes))
-
+        values = np.empty((len(nodes), 2))
         for row, node in enumerate(nodes):
             current_rho = self.network.metrics.per_node.get(node.id)
             summary = current_rho.summary if current_rho else None
-            rho_value = summary.utilization if summary else 0.0
-
-            item_node = QTableWidgetItem(node.id)
-            item_node.setFlags(item_node.flags() & ~Qt.ItemFlag.ItemIsEditable)
-            self.rho_table.setItem(row, 0, item_node)
-            self.rho_table.setItem(row, 1, QTableWidgetItem(f"{rho_value:.4f}"))
-
-            target_item = self.rho_table.item(row, 2)
-            if target_item is None:
-                target_item = QTableWidgetItem("0.80")
-            self.rho_table.setItem(row, 2, target_item)
-
-        self.rho_table.resizeColumnsToContents()
+            values[row, 0] = summary.utilization if summary else 0.0
+            values[row, 1] = self._rho_targets.get(node.id, DEFAULT_RHO_TARGET)
+        if self.rho_model.set_data([(node.id,) for node in nodes], values):
+            self.rho_table.resizeColumnsToContents()
 
     def _refresh_routing(self) -> None:
-        nodes = self.node_ids
-
+        # Modele działają na żywych strukturach konfiguracji – przebudowa tylko po ich podmianie.
         for class_id, table in self.routing_tables.items():
-            table.blockSignals(True)
-            table.setRowCount(len(nodes))
-            table.setColumnCount(len(nodes))
-            table.setHorizontalHeaderLabels(nodes)
-            table.setVerticalHeaderLabels(nodes)
-
-            routing_matrix = self.network.routing_matrices.get(class_id, {})
-            for row, from_node in enumerate(nodes):
-                outgoing = routing_matrix.get(from_node, {})
-                for col, to_node in enumerate(nodes):
-                    value = outgoing.get(to_node, 0.0)
-                    table.setItem(row, col, QTableWidgetItem(str(value)))
-            table.resizeColumnsToContents()
-            table.blockSignals(False)
+            entries = self.network.config.routing_per_class.setdefault(class_id, [])
+            model = self.routing_models.get(class_id)
+            if model is not None and model.routing.entries is entries:
+                continue
+
+            with self.lock:
+                # SparseRouting przebudowuje żywą macierz czytaną przez wątek symulacji.
+                matrix = self.network.routing_matrices.setdefault(class_id, {})
+                routing = SparseRouting(entries, matrix)
+            if model is None:
+                model = RoutingTableModel(routing, lock=self.lock, parent=self)
+                model.edited.connect(lambda node_id, cid=class_id: self._on_routing_edited(cid, node_id))
+                self.routing_models[class_id] = model
+                table.setModel(model)
+            else:
+                model.reset(routing)
+            self._routing_invalid[class_id] = routing.invalid_rows(list(matrix))
+            self._update_routing_status(class_id)
 
     # --- Change handlers --------------------------------------------------------
-    def _on_class_changed(self, row: int, column: int) -> None:
-        if self._loading or column != 2:
-            return
-        try:
-            population = int(self.class_table.item(row, column).text())
-        except ValueError:
-            return
+    def _on_population_edited(self, row: int, column: int, text: str) -> bool:
+        population = _parse_count(text)
+        if population is None or population < 0:
+            return False
 
         cls_config = self.network.config.classes[row]
-        cls_config.population = population
-        self.network.classes[cls_config.id].config.population = population
+        with self.lock:
+            cls_config.population = population
+            self.network.classes[cls_config.id].config.population = population
+        self._config_edited()
+        return True
 
-    def _on_node_changed(self, row: int, column: int) -> None:
-        if self._loading:
-            return
+    def _on_class_name_edited(self, row: int, column: int, text: str) -> bool:
+        cls_config = self.network.config.classes[row]
+        with self.lock:
+            cls_config.name = text
+            self.network.classes[cls_config.id].config.name = text
+        return True
 
-        node_config = self.network.config.nodes[row]
-        item = self.node_table.item(row, column)
-        if item is None:
-            return
+    def _on_servers_edited(self, row: int, column: int, text: str) -> bool:
+        servers = _parse_count(text) if text.strip() else None
+        if text.strip() and (servers is None or servers < 1):
+            return False
 
-        text = item.text()
-        if column == 1:
-            node_config.name = text
-        elif column == 2:
-            node_config.node_type = text  # free-form to keep editing simple
-        elif column == 3:
-            try:
-                node_config.servers = int(text) if text else None
-            except ValueError:
-                return
-        self.network.nodes[node_config.id].config = node_config
-
-    def _on_service_rate_changed(self, row: int, column: int) -> None:
-        if self._loading or column == 0:
-            return
+        node_config = self.network.config.nodes[row]
+        with self.lock:
+            node_config.servers = servers
+            self.network.nodes[node_config.id].config = node_config
+        self._config_edited()
+        return True
 
-        node_id_item = self.service_rate_table.item(row, 0)
-        if node_id_item is None:
-            return
+    def _on_node_label_edited(self, row: int, column: int, text: str) -> bool:
+        node_config = self.network.config.nodes[row]
+        with self.lock:
+            if column == 1:
+                node_config.name = text
+            else:
+                node_config.node_type = text  # free-form to keep editing simple
+            self.network.nodes[node_config.id].config = node_config
+        self._config_edited()
+        return True
+
+    def _on_service_rate_edited(self, row: int, column: int, text: str) -> bool:
+        if self._loading:
+            return False
 
-        node_id = node_id_item.text()
-        class_id = self.service_rate_table.horizontalHeaderItem(column).text()
+        node_id = self.service_rate_model.labels[row][0]
+        class_id = self.service_rate_model.value_headers[column]
 
         try:
-            value = float(self.service_rate_table.item(row, column).text())
+            value = float(text)
         except (TypeError, ValueError):
+            return False
+
+        with self.lock:
+            node = self.network.nodes.get(node_id)
+            if node:
+                node.config.service_rates_per_class[class_id] = value
+
+            for config_node in self.network.config.nodes:
+                if config_node.id == node_id:
+                    config_node.service_rates_per_class[class_id] = value
+        self._config_edited()
+        return True
+
+    def _set_routing_edge(self, class_id: str, from_node: str, to_node: str, text: str) -> None:
+        status = self.routing_status[class_id]
+        if from_node not in self.network.nodes or to_node not in self.network.nodes:
+            status.setText(f"Nieznany węzeł: {from_node if from_node not in self.network.nodes else to_node}")
+            return
+        try:
+            probability = float(text)
+        except ValueError:
+            status.setText(f"Niepoprawne prawdopodobieństwo: {text}")
+            return
+        if probability < 0:
+            status.setText("Prawdopodobieństwo nie może być ujemne")
             return
 
-        node = self.network.nodes.get(node_id)
-        if node:
-            node.config.service_rates_per_class[class_id] = value
-
-        for config_node in self.network.config.nodes:
-            if config_node.id == node_id:
-                config_node.service_rates_per_class[class_id] = value
+        model = self.routing_models[class_id]
+        row = model.set_edge(from_node, to_node, probability)
+        if row is not None:
+            model.ensure_loaded(row)
+            self.routing_tables[class_id].scrollTo(model.index(row, 2))
 
-    def _on_routing_changed(self, class_id: str, row: int, column: int) -> None:
+    def _on_routing_edited(self, class_id: str, node_id: str) -> None:
         if self._loading:
             return
-
-        table = self.routing_tables[class_id]
-        from_node = self.node_ids[row]
-        to_node = self.node_ids[column]
-
+        self._routing_dirty.setdefault(class_id, set()).add(node_id)
+        self._routing_validation.start()
+
+    def _validate_routing_batch(self) -> None:
+        dirty, self._routing_dirty = self._routing_dirty, {}
+        for class_id, node_ids in dirty.items():
+            invalid = self._routing_invalid.setdefault(class_id, {})
+            for node_id in node_ids:
+                invalid.pop(node_id, None)
+            invalid.update(self.routing_models[class_id].routing.invalid_rows(node_ids))
+            self._update_routing_status(class_id)
+        if dirty:
+            self._config_edited()
+
+    def _update_routing_status(self, class_id: str, shown: int = 5) -> None:
+        invalid = self._routing_invalid.get(class_id, {})
+        model = self.routing_models[class_id]
+        text = f"Krawędzi: {len(model.routing)}"
+        if invalid:
+            listed = ", ".join(f"{node_id}={total:.3f}" for node_id, total in list(invalid.items())[:shown])
+            more = f" (+{len(invalid) - shown})" if len(invalid) > shown else ""
+            text += f" · suma wyjść ≠ 1: {listed}{more}"
+        self.routing_status[class_id].setText(text)
+
+    def _config_edited(self) -> None:
+        if self.controller is not None:
+            self.controller.config_edited()
+
+    def _on_rho_target_edited(self, row: int, column: int, text: str) -> bool:
         try:
-            probability = float(table.item(row, column).text())
+            target = float(text)
         except (TypeError, ValueError):
-            probability = 0.0
-
-        # Aktualizacja konfiguracji
-        entries = self.network.config.routing_per_class.get(class_id, [])
-        updated: Dict[str, Dict[str, float]] = {}
-        for entry in entries:
-            updated.setdefault(entry.from_node_id, {})[entry.to_node_id] = entry.probability
-
-        updated.setdefault(from_node, {})[to_node] = probability
-
-        new_entries: List[RoutingEntry] = []
-        for f_node, outgoing in updated.items():
-            for t_node, prob in outgoing.items():
-                new_entries.append(RoutingEntry(f_node, t_node, prob))
-
-        self.network.config.routing_per_class[class_id] = new_entries
-        self.network.routing_matrices[class_id] = build_routing_matrix(new_entries)
+            return False
+        if target < 0:
+            return False
+        self._rho_targets[self.rho_model.labels[row][0]] = target
+        return True
 
     def _apply_rho_targets(self) -> None:
         if self.controller is None or self._loading:
             return
 
-        targets: Dict[str, float] = {}
-        for row in range(self.rho_table.rowCount()):
-            node_item = self.rho_table.item(row, 0)
-            target_item = self.rho_table.item(row, 2)
-            if node_item is None or target_item is None:
-                continue
-            try:
-                target_value = float(target_item.text())
-            except ValueError:
-                continue
-            if target_value > 0:
-                targets[node_item.text()] = target_value
-
+        targets: Dict[str, float] = {
+            label[0]: float(target)
+            for label, target in zip(self.rho_model.labels, self.rho_model.values[:, 1])
+            if target > 0
+        }
         if targets:
-            self.controller.tune_service_rates_for_rho(targets)
+            self.controller.tune_service_rates_for_rho(targets, lock=self.lock)
+
+
+def _parse_count(text: str) -> int | None:
+    """Liczba całkowita z tekstu komórki („3” lub „3.0”); None, gdy niepoprawna."""
+
+    try:
+        value = float(text)
+    except (TypeError, ValueError):
+        return None
+    return int(value) if value.is_integer() else None
@@ -1,78 +1,85 @@
 """Widoki do prezentacji wyników obliczeń MVA (metoda SUM)."""
 
-from PyQt6.QtWidgets import QLabel, QTableWidget, QTableWidgetItem, QVBoxLayout, QWidget
+import numpy as np
+from PyQt6.QtWidgets import QLabel, QTableView, QVBoxLayout, QWidget
 
 from bcmp.network import BCMPNetwork
+from bcmp.replications import ReplicationResults
 from bcmp.simulation import TicketSimulation
+from gui.table_models import ArrayTableModel
+
+
+SUMMARY_FIELDS = ["mean_queue_length", "mean_system_length", "mean_waiting_time", "mean_system_time", "utilization"]
 
 
 class ResultsView(QWidget):
-    """Widok prezentujący wyniki obliczeń sieci BCMP."""
+    """Widok prezentujący wyniki obliczeń sieci BCMP.
+
+    Tabele są widokami `QTableView` nad modelami `ArrayTableModel`, więc
+    odświeżenie przekazuje jedynie nowe tablice wartości.
+    """
 
     def __init__(self, network: BCMPNetwork, simulation: TicketSimulation | None = None) -> None:
         super().__init__()
         self.network = network
         self.simulation = simulation
+        self.replication_results: ReplicationResults | None = None
 
         layout = QVBoxLayout()
         self.setLayout(layout)
 
         layout.addWidget(QLabel("Throughput per class (wyniki SUM)"))
-        self.throughput_table = QTableWidget()
-        self.throughput_table.setColumnCount(2)
-        self.throughput_table.setHorizontalHeaderLabels(["Class", "Throughput (SUM)"])
+        self.throughput_model = ArrayTableModel(["Class"], ["Throughput (SUM)"], parent=self)
+        self.throughput_table = _table_view(self.throughput_model)
         layout.addWidget(self.throughput_table)
 
         layout.addWidget(QLabel("Metryki węzłów (SUM – średnie wartości per klasa)"))
-        self.node_table = QTableWidget()
-        self.node_table.setColumnCount(7)
-        self.node_table.setHorizontalHeaderLabels(
-            [
-                "Node",
-                "Class",
-                "L",
-                "Lq",
-                "W",
-                "Wq",
-                "ρ",
-            ]
-        )
+        self.node_model = ArrayTableModel(["Node", "Class"], ["L", "Lq", "W", "Wq", "ρ"], parent=self)
+        self.node_table = _table_view(self.node_model)
         layout.addWidget(self.node_table)
 
         layout.addWidget(QLabel("Metryki kolejki – analiza SUM vs symulacja"))
-        self.queue_table = QTableWidget()
-        self.queue_table.setColumnCount(7)
-        self.queue_table.setHorizontalHeaderLabels(
-            ["Źródło (SUM/symulacja)", "Węzeł", "Lq", "L", "Wq", "W", "ρ"]
+        self.queue_model = ArrayTableModel(
+            ["Źródło (SUM/symulacja)", "Węzeł"], ["Lq", "L", "Wq", "W", "ρ"], parent=self
         )
+        self.queue_table = _table_view(self.queue_model)
         layout.addWidget(self.queue_table)
 
+        layout.addWidget(QLabel("Metryki węzłów – symulacja per klasa (z kwantylami W)"))
+        self.class_model = ArrayTableModel(
+            ["Node", "Class"], ["L", "Lq", "W", "Wq", "ρ", "W p95", "W p99"], parent=self
+        )
+        self.class_table = _table_view(self.class_model)
+        layout.addWidget(self.class_table)
+
         self.refresh()
 
+    def set_replication_results(self, results: ReplicationResults | None) -> None:
+        self.replication_results = results
+
     def refresh(self) -> None:
         self._refresh_throughput()
         self._refresh_nodes()
         self._refresh_queue_summaries()
+        self._refresh_class_statistics()
 
     def _refresh_throughput(self) -> None:
         metrics = self.network.metrics.throughput_per_class
-        self.throughput_table.setRowCount(len(metrics))
-
-        for row, (class_id, throughput) in enumerate(metrics.items()):
-            self.throughput_table.setItem(row, 0, QTableWidgetItem(class_id))
-            self.throughput_table.setItem(row, 1, QTableWidgetItem(f"{throughput:.4f}"))
-
-        self.throughput_table.resizeColumnsToContents()
+        _update(
+            self.throughput_table,
+            self.throughput_model,
+            [(class_id,) for class_id in metrics],
+            np.fromiter(metrics.values(), dtype=np.float64, count=len(metrics)),
+        )
 
     def _refresh_nodes(self) -> None:
-        metrics = self.network.metrics.per_node
-        rows = []
-        for node_id, node_metrics in metrics.items():
+        labels = []
+        values = []
+        for node_id, node_metrics in self.network.metrics.per_node.items():
             for class_id, class_metrics in node_metrics.per_class.items():
-                rows.append(
+                labels.append((node_id, class_id))
+                values.append(
                     (
-                        node_id,
-                        class_id,
                         class_metrics.mean_customers,
                         class_metrics.mean_queue_length,
                         class_metrics.mean_response_time,
@@ -80,40 +87,76 @@ class ResultsView(QWidget):
                         class_metrics.utilization,
                     )
                 )
-
-        self.node_table.setRowCount(len(rows))
-        for row_idx, (node_id, class_id, mean_customers, mean_queue, mean_response, mean_waiting, utilization) in enumerate(rows):
-            self.node_table.setItem(row_idx, 0, QTableWidgetItem(node_id))
-            self.node_table.setItem(row_idx, 1, QTableWidgetItem(class_id))
-            self.node_table.setItem(row_idx, 2, QTableWidgetItem(f"{mean_customers:.4f}"))
-            self.node_table.setItem(row_idx, 3, QTableWidgetItem(f"{mean_queue:.4f}"))
-            self.node_table.setItem(row_idx, 4, QTableWidgetItem(f"{mean_response:.4f}"))
-            self.node_table.setItem(row_idx, 5, QTableWidgetItem(f"{mean_waiting:.4f}"))
-            self.node_table.setItem(row_idx, 6, QTableWidgetItem(f"{utilization:.4f}"))
-
-        self.node_table.resizeColumnsToContents()
+        _update(self.node_table, self.node_model, labels, np.array(values, dtype=np.float64))
 
     def _refresh_queue_summaries(self) -> None:
-        analytic_rows = []
+        rows = []
         for node_id, node_metrics in self.network.metrics.per_node.items():
             if node_metrics.summary:
-                analytic_rows.append(("Analiza", node_id, node_metrics.summary))
+                rows.append(("Analiza", node_id, node_metrics.summary, None))
 
-        empirical_rows = []
         if self.simulation is not None:
             for node_id, summary in self.simulation.empirical_performance().items():
-                empirical_rows.append(("Symulacja", node_id, summary))
+                rows.append(("Symulacja", node_id, summary, None))
+
+        results = self.replication_results
+        if results is not None:
+            source = f"Replikacje (n={results.replications}, ±{results.confidence:.0%})"
+            for node_id, summary in results.means.items():
+                rows.append((source, node_id, summary, results.half_widths.get(node_id)))
+
+        values = np.array(
+            [[getattr(summary, name) for name in SUMMARY_FIELDS] for _, _, summary, _ in rows], dtype=np.float64
+        )
+        errors = np.array(
+            [
+                [getattr(half_width, name) if half_width is not None else np.nan for name in SUMMARY_FIELDS]
+                for _, _, _, half_width in rows
+            ],
+            dtype=np.float64,
+        )
+        _update(
+            self.queue_table,
+            self.queue_model,
+            [(source, node_id) for source, node_id, _, _ in rows],
+            values,
+            errors,
+        )
+
+    def _refresh_class_statistics(self) -> None:
+        if self.simulation is None:
+            _update(self.class_table, self.class_model, [], np.zeros((0, 7)))
+            return
+
+        class_metrics = self.simulation.empirical_class_metrics()
+        latencies = self.simulation.class_latency_statistics()
+        labels = []
+        values = []
+        for node_id, per_class in class_metrics.items():
+            for class_id, metrics in per_class.items():
+                response = latencies[node_id][class_id].response
+                labels.append((node_id, class_id))
+                values.append(
+                    (
+                        metrics.mean_customers,
+                        metrics.mean_queue_length,
+                        metrics.mean_response_time,
+                        metrics.mean_waiting_time,
+                        metrics.utilization,
+                        response.p95,
+                        response.p99,
+                    )
+                )
+        _update(self.class_table, self.class_model, labels, np.array(values, dtype=np.float64))
+
 
-        rows = analytic_rows + empirical_rows
-        self.queue_table.setRowCount(len(rows))
+def _table_view(model: ArrayTableModel) -> QTableView:
+    view = QTableView()
+    view.setModel(model)
+    return view
 
-        for row_idx, (source, node_id, summary) in enumerate(rows):
-            self.queue_table.setItem(row_idx, 0, QTableWidgetItem(source))
-            self.queue_table.setItem(row_idx, 1, QTableWidgetItem(node_id))
-            self.queue_table.setItem(row_idx, 2, QTableWidgetItem(f"{summary.mean_queue_length:.4f}"))
-            self.queue_table.setItem(row_idx, 3, QTableWidgetItem(f"{summary.mean_system_length:.4f}"))
-            self.queue_table.setItem(row_idx, 4, QTableWidgetItem(f"{summary.mean_waiting_time:.4f}"))
-            self.queue_table.setItem(row_idx, 5, QTableWidgetItem(f"{summary.mean_system_time:.4f}"))
-            self.queue_table.setItem(row_idx, 6, QTableWidgetItem(f"{summary.utilization:.4f}"))
 
-        self.queue_table.resizeColumnsToContents()
+def _update(view: QTableView, model: ArrayTableModel, labels, values, errors=None) -> None:
+    # Szerokości kolumn dopasowywane są tylko przy zmianie układu wierszy.
+    if model.set_data(labels, values, errors):
+        view.resizeColumnsToContents()
@@ -2,41 +2,148 @@
 
 from __future__ import annotations
 
-import time
-
-from PyQt6.QtCore import QTimer, Qt
+import numpy as np
+from PyQt6.QtCore import QPointF, Qt
 from PyQt6.QtCharts import QChart, QChartView, QLineSeries, QValueAxis
 from PyQt6.QtWidgets import (
+    QCheckBox,
     QDoubleSpinBox,
+    QFileDialog,
     QGridLayout,
     QGroupBox,
+    QHBoxLayout,
     QLabel,
+    QPlainTextEdit,
     QPushButton,
-    QTableWidget,
-    QTableWidgetItem,
-    QTextEdit,
+    QTableView,
     QVBoxLayout,
     QWidget,
 )
 
 from bcmp.network import BCMPNetwork
-from bcmp.simulation import TicketSimulation
+from bcmp.simulation import SimulationSnapshot, TicketSimulation
+from bcmp.trace import TraceReader
+from gui.downsampling import bucket_extrema, minmax_downsample
+from gui.frame_budget import FrameBudget, PaintTimingMixin
+from gui.simulation_worker import SimulationWorker
+from gui.table_models import ArrayTableModel
+
+
+LOG_LINES = 500
+
+
+class _LiveSeries:
+    """Seria wykresu na żywo przerzedzona do przedziałów czasu o stałej szerokości.
+
+    Każdy przedział (około dwóch pikseli) to dwa punkty: minimum i maksimum.
+    Przedziały są wyrównane do zera, więc nowe próbki aktualizują ostatni
+    przedział albo dopisują kolejne, a przedziały sprzed początku okna są
+    odcinane z początku; pełne przerzedzenie (`rebuild`) jest potrzebne
+    tylko po zmianie szerokości przedziału. Przedziały trzymane są w
+    tablicach NumPy, a seria Qt dostaje nowe punkty (jednym `replace`)
+    tylko wtedy, gdy coś się zmieniło.
+    """
+
+    def __init__(self, series: QLineSeries) -> None:
+        self.series = series
+        self.width = 0.0
+        self._buckets = np.empty(0, dtype=np.int64)
+        self._minima = np.empty(0)
+        self._maxima = np.empty(0)
+        self._dirty = False
+
+    def rebuild(self, width: float, times: np.ndarray, minimum: np.ndarray, maximum: np.ndarray) -> None:
+        self.width = width
+        self._buckets, self._minima, self._maxima = bucket_extrema(times, minimum, maximum, width)
+        self._dirty = True
+
+    def append(self, times: np.ndarray, values: np.ndarray) -> None:
+        buckets, minima, maxima = bucket_extrema(times, values, values, self.width)
+        if self._buckets.shape[0]:
+            # Próbki z przedziałów już zamkniętych są w serii (np. po `rebuild`).
+            keep = buckets >= self._buckets[-1]
+            buckets, minima, maxima = buckets[keep], minima[keep], maxima[keep]
+            if buckets.shape[0] and buckets[0] == self._buckets[-1]:
+                if minima[0] < self._minima[-1] or maxima[0] > self._maxima[-1]:
+                    self._minima[-1] = min(self._minima[-1], minima[0])
+                    self._maxima[-1] = max(self._maxima[-1], maxima[0])
+                    self._dirty = True
+                buckets, minima, maxima = buckets[1:], minima[1:], maxima[1:]
+        if buckets.shape[0]:
+            self._buckets = np.concatenate((self._buckets, buckets))
+            self._minima = np.concatenate((self._minima, minima))
+            self._maxima = np.concatenate((self._maxima, maxima))
+            self._dirty = True
+
+    def trim(self, first_bucket: int) -> None:
+        """Odcina przedziały sprzed `first_bucket` (początek przesuwanego okna)."""
+
+        removed = int(np.searchsorted(self._buckets, first_bucket))
+        if removed:
+            self._buckets = self._buckets[removed:]
+            self._minima = self._minima[removed:]
+            self._maxima = self._maxima[removed:]
+            self._dirty = True
+
+    def publish(self) -> None:
+        if not self._dirty:
+            return
+        self._dirty = False
+        starts = self._buckets * self.width
+        times = np.column_stack((starts, starts + 0.5 * self.width)).ravel()
+        lengths = np.column_stack((self._minima, self._maxima)).ravel()
+        self.series.replace(list(map(QPointF, times.tolist(), lengths.tolist())))
+
+    def peak(self) -> float:
+        return float(self._maxima.max()) if self._maxima.shape[0] else 0.0
+
+
+class _TimedTableView(PaintTimingMixin, QTableView):
+    paint_name = "tabela"
+
+
+class _TimedChartView(PaintTimingMixin, QChartView):
+    paint_name = "wykres"
+
+
+class _TimedLogBox(PaintTimingMixin, QPlainTextEdit):
+    paint_name = "dziennik"
 
 
 class SimulationView(QWidget):
-    """Prosty panel prezentujący w czasie rzeczywistym przepływ zgłoszeń."""
+    """Prosty panel prezentujący w czasie rzeczywistym przepływ zgłoszeń.
+
+    Symulację wykonuje `SimulationWorker` w osobnym wątku; widok jedynie
+    renderuje najnowszą opublikowaną migawkę. `FrameBudget` mierzy czasy
+    każdej klatki (widoczne po zaznaczeniu „Czasy klatek”) i dobiera rytm
+    publikacji oraz poziom szczegółowości wykresu i dziennika.
+
+    Wykres na żywo obejmuje cały przebieg (albo okno ustawione przez
+    użytkownika) z wielopoziomowej `QueueHistory` symulacji. Pełne
+    przerzedzenie wykonywane jest tylko po zmianie zakresu osi lub
+    szerokości wykresu; w pozostałych klatkach do serii trafiają jedynie
+    nowe przedziały.
+    """
 
     def __init__(self, network: BCMPNetwork, simulation: TicketSimulation) -> None:
         super().__init__()
         self.network = network
         self.simulation = simulation
         self.series_by_node: dict[str, QLineSeries] = {}
-        self._last_tick_time = time.monotonic()
-
-        self._timer = QTimer(self)
-        self._timer.setInterval(100)
-        self._timer.timeout.connect(self._on_tick)
-        self._timer.start()
+        self._replay_history: dict[str, tuple[np.ndarray, np.ndarray]] | None = None
+        self._live: dict[str, _LiveSeries] = {}
+        self._pending_points: dict[str, list[tuple[float, int]]] = {}
+        self._latest_time = 0.0
+        self._axis_end = 0.0
+        self._chart_grid: tuple[float, float] | None = None
+        self._node_rows: dict[str, int] = {}
+        self._chart_dirty = False
+        self._frames_since_chart = 0
+
+        self.worker = SimulationWorker(simulation, parent=self)
+        self.frame_budget = FrameBudget(base_interval=self.worker.publish_interval)
+        self.worker.snapshot_ready.connect(self._on_snapshot_ready)
+        self.worker.failed.connect(self._on_worker_failed)
 
         layout = QVBoxLayout()
         self.setLayout(layout)
@@ -57,26 +164,68 @@ class SimulationView(QWidget):
         self.reset_button.clicked.connect(self._on_reset)
         controls_layout.addWidget(self.reset_button, 0, 2)
 
+        self.replay_button = QPushButton("Odtwórz ślad…")
+        self.replay_button.clicked.connect(self._on_replay_trace)
+        controls_layout.addWidget(self.replay_button, 0, 3)
+
         controls_layout.addWidget(QLabel("Tempo czasu"), 1, 0)
         self.speed_input = QDoubleSpinBox()
         self.speed_input.setRange(0.1, 20.0)
         self.speed_input.setSingleStep(0.1)
         self.speed_input.setValue(1.0)
         self.speed_input.setSuffix("x")
+        self.speed_input.valueChanged.connect(self.worker.set_speed)
         controls_layout.addWidget(self.speed_input, 1, 1)
+
+        self.turbo_checkbox = QCheckBox("Turbo")
+        self.turbo_checkbox.setToolTip("Stały krok symulacji, tyle kroków, ile mieści budżet CPU; wykres odświeżany osobno")
+        self.turbo_checkbox.toggled.connect(self._on_turbo_changed)
+        controls_layout.addWidget(self.turbo_checkbox, 1, 3)
+
+        self.turbo_rate_input = QDoubleSpinBox()
+        self.turbo_rate_input.setRange(0.0, 1_000_000.0)
+        self.turbo_rate_input.setDecimals(0)
+        self.turbo_rate_input.setSingleStep(100.0)
+        self.turbo_rate_input.setSpecialValueText("bez limitu")
+        self.turbo_rate_input.setSuffix(" s/s")
+        self.turbo_rate_input.setToolTip("Docelowe tempo turbo: sekundy symulacji na sekundę (0 – bez limitu)")
+        self.turbo_rate_input.valueChanged.connect(self._on_turbo_changed)
+        controls_layout.addWidget(self.turbo_rate_input, 1, 4)
         controls_layout.setColumnStretch(3, 1)
 
         self.status_label = QLabel()
         controls_layout.addWidget(self.status_label, 1, 2)
 
+        self.timings_checkbox = QCheckBox("Czasy klatek")
+        self.timings_checkbox.toggled.connect(self._on_timings_toggled)
+        controls_layout.addWidget(self.timings_checkbox, 0, 4)
+
+        self.timings_label = QLabel()
+        self.timings_label.setWordWrap(True)
+        self.timings_label.setVisible(False)
+        controls_layout.addWidget(self.timings_label, 2, 0, 1, 5)
+
         layout.addWidget(controls)
 
-        self.node_table = QTableWidget()
-        self.node_table.setColumnCount(3)
-        self.node_table.setHorizontalHeaderLabels(["Węzeł", "W kolejce", "W obsłudze"])
+        self.node_model = ArrayTableModel(["Węzeł"], ["W kolejce", "W obsłudze"], value_format="{:.0f}", parent=self)
+        self.node_table = _TimedTableView()
+        self.node_table.setModel(self.node_model)
         layout.addWidget(self.node_table)
 
-        layout.addWidget(QLabel("Wykres długości kolejek (na żywo)"))
+        chart_header = QHBoxLayout()
+        chart_header.addWidget(QLabel("Wykres długości kolejek (na żywo)"))
+        chart_header.addStretch(1)
+        chart_header.addWidget(QLabel("Okno"))
+        self.window_input = QDoubleSpinBox()
+        self.window_input.setRange(0.0, 1_000_000.0)
+        self.window_input.setDecimals(0)
+        self.window_input.setSingleStep(60.0)
+        self.window_input.setSpecialValueText("cały przebieg")
+        self.window_input.setSuffix(" s")
+        self.window_input.setToolTip("Szerokość okna wykresu w sekundach symulacji (0 – cały przebieg)")
+        self.window_input.valueChanged.connect(self._on_window_changed)
+        chart_header.addWidget(self.window_input)
+        layout.addLayout(chart_header)
         self.chart = QChart()
         self.chart.legend().setVisible(True)
         self.axis_x = QValueAxis()
@@ -85,77 +234,251 @@ class SimulationView(QWidget):
         self.axis_y.setTitleText("Liczba oczekujących")
         self.chart.addAxis(self.axis_x, Qt.AlignmentFlag.AlignBottom)
         self.chart.addAxis(self.axis_y, Qt.AlignmentFlag.AlignLeft)
-        self.chart_view = QChartView(self.chart)
+        self.chart_view = _TimedChartView(self.chart)
         layout.addWidget(self.chart_view)
 
-        self.log_box = QTextEdit()
+        self.log_box = _TimedLogBox()
         self.log_box.setReadOnly(True)
+        self.log_box.setMaximumBlockCount(LOG_LINES)
         self.log_box.setMinimumHeight(200)
         layout.addWidget(QLabel("Dziennik zdarzeń"))
         layout.addWidget(self.log_box)
 
         self.refresh()
+        self.worker.start()
+
+    def shutdown(self) -> None:
+        """Zatrzymuje wątek symulacji (wywoływane przy zamykaniu okna)."""
+
+        self.worker.stop_and_wait()
 
-    def _on_tick(self) -> None:
-        now = time.monotonic()
-        elapsed = max(0.0, now - self._last_tick_time)
-        self._last_tick_time = now
-        self.simulation.step(elapsed * self.speed_input.value())
+    def _on_snapshot_ready(self) -> None:
+        updates = self.worker.take_updates()
+        if updates is not None:
+            self._apply(updates)
+            self._end_frame()
+
+    def _on_window_changed(self, *_args) -> None:
+        self._chart_dirty = True
+        self._frames_since_chart = self.frame_budget.detail.chart_every
         self.refresh()
 
+    def _on_worker_failed(self, message: str) -> None:
+        self._update_controls()
+
+    def _end_frame(self) -> None:
+        step, steps, snapshot = self.worker.take_timings()
+        timing = self.frame_budget.end_frame(step, steps, snapshot)
+        self.worker.publish_interval = self.frame_budget.interval
+        if self.timings_label.isVisible():
+            budget = self.frame_budget
+            lines = [
+                timing.summary(),
+                f"GUI średnio {budget.average * 1000:.1f} ms / budżet {budget.budget * 1000:.0f} ms"
+                f" · odstęp klatek {budget.interval * 1000:.0f} ms · poziom szczegółowości {budget.level}",
+            ]
+            slowest = budget.slowest()
+            if slowest is not None:
+                lines.append(f"Najwolniejsza z ostatnich {len(budget.history)} (nr {slowest.frame}): {slowest.summary()}")
+            self.timings_label.setText("\n".join(lines))
+
+    def _on_turbo_changed(self, *_args) -> None:
+        self.worker.set_turbo(self.turbo_checkbox.isChecked(), self.turbo_rate_input.value() or None)
+        self.speed_input.setEnabled(not self.turbo_checkbox.isChecked())
+
+    def _on_timings_toggled(self, enabled: bool) -> None:
+        for widget in (self.node_table, self.chart_view, self.log_box):
+            widget.paint_budget = self.frame_budget if enabled else None
+        self.timings_label.setVisible(enabled)
+
     def _on_start(self) -> None:
-        self._last_tick_time = time.monotonic()
-        self.simulation.start()
+        if self._replay_history is not None:
+            self._replay_history = None
+            self._chart_grid = None
+            self._chart_dirty = True
+        with self.worker.lock:
+            self.worker.reset_clock()
+            self.simulation.start()
+        # Po błędzie w pętli wątek jest zakończony – wznowienie uruchamia go ponownie.
+        self.worker.start()
         self.refresh()
 
     def _on_pause(self) -> None:
-        self.simulation.stop()
+        with self.worker.lock:
+            self.simulation.stop()
         self.refresh()
 
     def _on_reset(self) -> None:
-        self.simulation.reset()
-        self._last_tick_time = time.monotonic()
+        self._replay_history = None
+        self._chart_dirty = True
+        with self.worker.lock:
+            self.simulation.reset()
+            self.worker.reset_clock()
+        self.refresh()
+
+    def _on_replay_trace(self) -> None:
+        path, _ = QFileDialog.getOpenFileName(self, "Wybierz plik śladu", "", "Ślad symulacji (*.trc);;Wszystkie pliki (*)")
+        if path:
+            self.load_trace(TraceReader(path))
+
+    def load_trace(self, reader: TraceReader) -> None:
+        """Pokazuje na wykresie długości kolejek odtworzone z zapisanego śladu.
+
+        Wykres pozostaje w trybie odtwarzania do czasu wznowienia lub resetu symulacji.
+        """
+
+        with self.worker.lock:
+            self.simulation.stop()
+        self._replay_history = {node_id: reader.queue_history(node_id) for node_id in reader.node_ids}
+        self._chart_dirty = True
         self.refresh()
 
     def refresh(self) -> None:
-        snapshot = self.simulation.snapshot()
-        node_ids = [node.id for node in self.network.config.nodes]
-        self.node_table.setRowCount(len(node_ids))
+        """Publikuje zmiany natychmiast (np. po akcji użytkownika) i je renderuje."""
 
-        for row, node_id in enumerate(node_ids):
-            queue_len, in_service = snapshot.node_states.get(node_id, (0, 0))
-            self.node_table.setItem(row, 0, QTableWidgetItem(node_id))
-            self.node_table.setItem(row, 1, QTableWidgetItem(str(queue_len)))
-            self.node_table.setItem(row, 2, QTableWidgetItem(str(in_service)))
-        self.node_table.resizeColumnsToContents()
+        self.worker.publish()
 
-        self._refresh_chart(node_ids, snapshot.queue_history)
+    def _apply(self, snapshot: SimulationSnapshot) -> None:
+        """Nanosi migawkę (pełną albo przyrostową) na tabelę, wykres i dziennik."""
 
-        self.log_box.setPlainText("\n".join(snapshot.events))
-        self.log_box.verticalScrollBar().setValue(self.log_box.verticalScrollBar().maximum())
+        budget = self.frame_budget
+        detail = budget.detail
+        node_ids = [node.id for node in self.network.config.nodes]
+        with budget.measure("tabela"):
+            if snapshot.full or self.node_model.rowCount() != len(node_ids):
+                self._rebuild_node_table(node_ids)
+                self._pending_points.clear()
+                self._latest_time = 0.0
+                self._axis_end = 0.0
+                self._chart_grid = None
+                self.log_box.clear()
+                self._frames_since_chart = detail.chart_every
+
+            for node_id, (queue_len, in_service) in snapshot.node_states.items():
+                row = self._node_rows.get(node_id)
+                if row is not None:
+                    self.node_model.update_row(row, (queue_len, in_service))
+
+        with budget.measure("historia"):
+            for node_id, points in snapshot.queue_history.items():
+                if points:
+                    self._pending_points.setdefault(node_id, []).extend(points)
+                    self._latest_time = max(self._latest_time, points[-1][0])
+                    self._chart_dirty = True
+
+        if snapshot.events:
+            with budget.measure("dziennik"):
+                # Jedno dopisanie na klatkę; najstarsze linie usuwa limit bloków widżetu.
+                scroll_bar = self.log_box.verticalScrollBar()
+                follow = scroll_bar.value() == scroll_bar.maximum()
+                self.log_box.appendPlainText("\n".join(snapshot.events[-min(LOG_LINES, detail.log_lines):]))
+                if follow:
+                    scroll_bar.setValue(scroll_bar.maximum())
+
+        self._frames_since_chart += 1
+        if self._chart_dirty and self._frames_since_chart >= detail.chart_every:
+            self._chart_dirty = False
+            self._frames_since_chart = 0
+            with budget.measure("wykres"):
+                if self._replay_history is not None:
+                    self._show_replay(node_ids, self._replay_history)
+                else:
+                    self._refresh_chart(node_ids)
         self._update_controls()
 
-    def _refresh_chart(self, node_ids: list[str], history: dict[str, list[tuple[float, int]]]) -> None:
-        max_time = 0.0
-        max_queue = 0.0
+    def _rebuild_node_table(self, node_ids: list[str]) -> None:
+        self._node_rows = {node_id: row for row, node_id in enumerate(node_ids)}
+        if self.node_model.set_data([(node_id,) for node_id in node_ids], np.zeros((len(node_ids), 2))):
+            self.node_table.resizeColumnsToContents()
+
+    def _chart_points(self) -> int:
+        """Docelowa liczba punktów serii – rzędu szerokości obszaru wykresu w pikselach."""
+
+        points = max(200, int(self.chart.plotArea().width()) * 2)
+        return max(50, int(points * self.frame_budget.detail.chart_scale))
+
+    def _series(self, node_id: str) -> QLineSeries:
+        series = self.series_by_node.get(node_id)
+        if series is None:
+            series = QLineSeries(name=node_id)
+            self.series_by_node[node_id] = series
+            self.chart.addSeries(series)
+            series.attachAxis(self.axis_x)
+            series.attachAxis(self.axis_y)
+        return series
+
+    def _refresh_chart(self, node_ids: list[str]) -> None:
+        """Aktualizuje wykres na żywo; pełne przerzedzenie tylko po zmianie siatki przedziałów."""
+
+        latest = self._latest_time
+        # Jeden przedział (minimum i maksimum) na dwa piksele; liczba zaokrąglona
+        # w dół do 32, aby drobne zmiany szerokości obszaru wykresu (np. szersze
+        # etykiety osi) nie wymuszały przerzedzenia.
+        buckets = max(32, self._chart_points() // 128 * 32)
+        window = self.window_input.value()
+        if window > 0:
+            start = max(0.0, latest - window)
+            end = max(window, latest)
+            width = window / buckets
+        else:
+            # Oś całego przebiegu rośnie skokowo, więc siatka zmienia się rzadko.
+            if latest >= self._axis_end:
+                self._axis_end = max(60.0, latest * 1.5)
+            start, end = 0.0, self._axis_end
+            width = self._axis_end / buckets
+
+        live = {node_id: self._live.get(node_id) or _LiveSeries(self._series(node_id)) for node_id in node_ids}
+        self._live = live
+        if (width, window) != self._chart_grid:
+            self._chart_grid = (width, window)
+            self._pending_points.clear()
+            history = self.simulation.history
+            with self.worker.lock:
+                ranges = {
+                    node_id: history.span(node_id, start, end)
+                    for node_id in node_ids
+                    if node_id in history.node_lookup
+                }
+            for node_id, series in live.items():
+                queue = ranges.get(node_id)
+                if queue is None:
+                    series.rebuild(width, np.empty(0), np.empty(0), np.empty(0))
+                else:
+                    series.rebuild(width, queue.times, queue.minimum, queue.maximum)
+                series.publish()
+        else:
+            pending, self._pending_points = self._pending_points, {}
+            for node_id, points in pending.items():
+                series = live.get(node_id)
+                if series is not None:
+                    block = np.asarray(points, dtype=np.float64).reshape(len(points), 2)
+                    series.append(block[:, 0], block[:, 1])
+            first_bucket = int(np.floor(start / width))
+            for series in live.values():
+                if window > 0:
+                    series.trim(first_bucket)
+                series.publish()
+
+        max_queue = max((series.peak() for series in live.values()), default=0.0)
+        self.axis_x.setRange(start, end)
+        self.axis_y.setRange(0.0, max(1.0, max_queue + 1))
+
+    def _show_replay(self, node_ids: list[str], history: dict[str, tuple[np.ndarray, np.ndarray]]) -> None:
+        """Pokazuje cały ślad odtworzony z pliku (jednorazowe przerzedzenie)."""
 
+        max_time = max((float(times[-1]) for times, _ in history.values() if times.shape[0]), default=0.0)
+        max_points = self._chart_points()
+        max_queue = 0.0
         for node_id in node_ids:
-            series = self.series_by_node.get(node_id)
-            if series is None:
-                series = QLineSeries(name=node_id)
-                self.series_by_node[node_id] = series
-                self.chart.addSeries(series)
-                series.attachAxis(self.axis_x)
-                series.attachAxis(self.axis_y)
-            else:
-                series.clear()
-
-            for timestamp, queue_len in history.get(node_id, []):
-                series.append(timestamp, queue_len)
-                max_time = max(max_time, timestamp)
-                max_queue = max(max_queue, float(queue_len))
-
-        self.axis_x.setRange(max(0.0, max_time - 60.0), max(60.0, max_time))
+            times, lengths = history.get(node_id, (np.empty(0), np.empty(0)))
+            times, lengths = minmax_downsample(times, lengths, max_points)
+            if lengths.shape[0]:
+                max_queue = max(max_queue, float(lengths.max()))
+            self._series(node_id).replace([QPointF(x, y) for x, y in zip(times.tolist(), lengths.tolist())])
+
+        # Powrót do wykresu na żywo wymaga pełnego przerzedzenia.
+        self._chart_grid = None
+        self.axis_x.setRange(0.0, max(1.0, max_time))
         self.axis_y.setRange(0.0, max(1.0, max_queue + 1))
 
     def _update_controls(self) -> None:
@@ -164,4 +487,14 @@ class SimulationView(QWidget):
         self.start_button.setText(label)
         self.start_button.setEnabled(not self.simulation.running)
         self.pause_button.setEnabled(self.simulation.running)
-        self.status_label.setText(f"Status: {status} | Tempo: {self.speed_input.value():.1f}x")
+        if self.worker.turbo:
+            target = f"{self.worker.turbo_rate:.0f}x" if self.worker.turbo_rate else "bez limitu"
+            speed = f"turbo ({target})"
+        else:
+            speed = f"{self.speed_input.value():.1f}x"
+        achieved = ""
+        if self.simulation.running:
+            events = f"{self.worker.event_rate:,.0f}".replace(",", " ")
+            achieved = f" | Osiągnięte: {self.worker.sim_rate:.1f}x, {events} zdarzeń/s"
+        error = f" | Błąd symulacji: {self.worker.error}" if self.worker.error else ""
+        self.status_label.setText(f"Status: {status} | Tempo: {speed}{achieved}{error}")
@@ -0,0 +1,256 @@
+"""Wątek roboczy wykonujący symulację poza wątkiem GUI.
+
+`SimulationWorker` przesuwa `TicketSimulation` w zadanym tempie (albo
+najszybciej, jak to możliwe) i co `publish_interval` sekund pobiera
+przyrostową migawkę stanu. Migawki łączone są w jedną aktualizację
+oczekującą na widok; widok odbiera ją przez `take_updates()` i nanosi
+tylko zmiany, więc przepustowość symulacji nie zależy od kosztu
+rysowania, a ciężki krok symulacji nie blokuje interfejsu.
+
+Każda zmiana stanu symulacji z innego wątku (start, pauza, reset, odczyt
+akumulatorów) powinna odbywać się pod blokadą `lock`.
+
+Wątek mierzy czas kroków i pobierania migawek; `take_timings()` zwraca
+sumy zebrane od poprzedniego wywołania (do pomiaru czasu klatek widoku).
+
+W trybie turbo czas symulacji jest oddzielony od rytmu rysowania: wątek
+wykonuje kroki o stałej długości `time_step` tak długo, jak pozwala
+budżet CPU jednej porcji (`turbo_slice`), opcjonalnie nie szybciej niż
+`turbo_rate` sekund symulacji na sekundę rzeczywistą. Widok odświeża się
+niezależnie, co `publish_interval`. Osiągnięte tempo (sekundy symulacji
+i zdarzenia na sekundę) dostępne jest w `sim_rate` i `event_rate`.
+
+Wyjątek zgłoszony w pętli (krok, migawka) wstrzymuje symulację, kończy
+wątek i jest przekazywany sygnałem `failed`; `start()` uruchamia wątek
+ponownie.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import threading
+import time
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from bcmp.simulation import SimulationSnapshot, TicketSimulation
+
+
+class SimulationWorker(QObject):
+    """Wykonuje kroki symulacji i publikuje migawki w stałym rytmie.
+
+    Pętla działa w wątku demonicznym, więc nie blokuje zakończenia procesu;
+    sygnał `snapshot_ready` emitowany z tego wątku trafia do wątku GUI
+    przez kolejkę zdarzeń Qt.
+    """
+
+    snapshot_ready = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(
+        self,
+        simulation: TicketSimulation,
+        publish_interval: float = 0.1,
+        tick_interval: float = 0.02,
+        time_step: float = 0.1,
+        max_events: int = 200,
+        turbo_slice: float = 0.02,
+        parent=None,
+    ) -> None:
+        super().__init__(parent)
+        self.simulation = simulation
+        self.lock = threading.RLock()
+        self.publish_interval = publish_interval
+        self.tick_interval = tick_interval
+        self.time_step = time_step
+        self.speed = 1.0
+        self.turbo = False
+        self.turbo_rate: float | None = None
+        self.turbo_slice = turbo_slice
+        self.max_events = max_events
+        self.sim_rate = 0.0
+        self.event_rate = 0.0
+        self.error: str | None = None
+
+        self._pending: SimulationSnapshot | None = None
+        self._step_time = 0.0
+        self._steps = 0
+        self._snapshot_time = 0.0
+        self._simulation_version: int | None = None
+        self._version = 0
+        self._last_tick_time = time.monotonic()
+        self._turbo_allowance = 0.0
+        self._rate_mark: tuple[float, float, int] | None = None
+        self._stop_requested = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_requested.clear()
+        self.error = None
+        self._thread = threading.Thread(target=self.run, name="simulation-worker", daemon=True)
+        self._thread.start()
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def take_updates(self) -> SimulationSnapshot | None:
+        """Zwraca zmiany zebrane od poprzedniego wywołania (lub None, gdy ich brak).
+
+        Wynik z `full = True` zastępuje cały stan widoku (np. po resecie).
+        """
+
+        with self.lock:
+            pending, self._pending = self._pending, None
+        return pending
+
+    def take_timings(self) -> tuple[float, int, float]:
+        """Zwraca (czas kroków [s], liczba kroków, czas migawek [s]) od poprzedniego wywołania."""
+
+        with self.lock:
+            timings = (self._step_time, self._steps, self._snapshot_time)
+            self._step_time, self._steps, self._snapshot_time = 0.0, 0, 0.0
+        return timings
+
+    def set_speed(self, speed: float) -> None:
+        self.speed = speed
+
+    def set_turbo(self, enabled: bool, rate: float | None = None) -> None:
+        """Przełącza tryb turbo; `rate` to docelowe tempo [s symulacji / s], None – bez limitu."""
+
+        self.turbo = enabled
+        self.turbo_rate = rate if rate else None
+        self.reset_clock()
+
+    def reset_clock(self) -> None:
+        """Zaczyna odmierzanie upływu czasu od teraz (np. po wznowieniu)."""
+
+        self._last_tick_time = time.monotonic()
+        self._turbo_allowance = 0.0
+        self._rate_mark = None
+
+    def publish(self, full: bool = False) -> None:
+        """Pobiera zmiany stanu symulacji i udostępnia je widokom."""
+
+        with self.lock:
+            since = None if full else self._simulation_version
+            started = time.perf_counter()
+            delta = self.simulation.snapshot(self.max_events, since_version=since)
+            self._snapshot_time += time.perf_counter() - started
+            self._simulation_version = delta.version
+            self._merge(delta)
+            self._version += 1
+            self._update_rates()
+        self.snapshot_ready.emit()
+
+    def _update_rates(self, smoothing: float = 0.3) -> None:
+        now = time.monotonic()
+        current = (now, self.simulation.current_time, self.simulation.event_log.total)
+        mark, self._rate_mark = self._rate_mark, current
+        if mark is None or now - mark[0] <= 0:
+            return
+        elapsed = now - mark[0]
+        simulated = current[1] - mark[1]
+        events = current[2] - mark[2]
+        if simulated < 0 or events < 0:
+            # Reset symulacji między pomiarami.
+            return
+        self.sim_rate += smoothing * (simulated / elapsed - self.sim_rate)
+        self.event_rate += smoothing * (events / elapsed - self.event_rate)
+
+    def _merge(self, delta: SimulationSnapshot) -> None:
+        # Historie pełnej migawki to listy modyfikowane dalej przez symulację – kopiujemy je.
+        history = {node_id: list(points) for node_id, points in delta.queue_history.items()}
+        pending = self._pending
+        if pending is None or delta.full:
+            self._pending = dataclasses.replace(
+                delta,
+                node_states=dict(delta.node_states),
+                events=list(delta.events),
+                queue_history=history,
+                empirical_metrics=dict(delta.empirical_metrics),
+            )
+            return
+
+        pending.node_states.update(delta.node_states)
+        pending.events.extend(delta.events)
+        del pending.events[: -self.max_events]
+        for node_id, points in history.items():
+            pending.queue_history.setdefault(node_id, []).extend(points)
+        pending.empirical_metrics.update(delta.empirical_metrics)
+        pending.version = delta.version
+
+    def stop_and_wait(self) -> None:
+        self._stop_requested.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def run(self) -> None:
+        next_publish = time.monotonic()
+        while not self._stop_requested.is_set():
+            try:
+                now = time.monotonic()
+                elapsed = max(0.0, now - self._last_tick_time)
+                self._last_tick_time = now
+
+                busy = False
+                with self.lock:
+                    running = self.simulation.running
+                    if running and self.turbo:
+                        busy = self._run_turbo_slice(elapsed)
+                    elif running:
+                        started = time.perf_counter()
+                        self.simulation.step(elapsed * self.speed)
+                        self._step_time += time.perf_counter() - started
+                        self._steps += 1
+
+                if now >= next_publish:
+                    self.publish()
+                    next_publish = now + self.publish_interval
+            except Exception as error:
+                self._fail(error)
+                return
+
+            if busy:
+                # Krótkie oddanie GIL, aby wątek GUI mógł przejąć blokadę między porcjami.
+                time.sleep(0)
+            else:
+                self._stop_requested.wait(self.tick_interval)
+
+    def _fail(self, error: Exception) -> None:
+        """Wstrzymuje symulację po błędzie w pętli i powiadamia widok."""
+
+        with self.lock:
+            self.simulation.stop()
+            self.error = f"{type(error).__name__}: {error}"
+        self.failed.emit(self.error)
+
+    def _run_turbo_slice(self, elapsed: float) -> bool:
+        """Wykonuje kroki `time_step` w ramach budżetu porcji; zwraca True, gdy budżet się wyczerpał."""
+
+        rate = self.turbo_rate
+        if rate is not None:
+            # Limit tempa: dozwolony czas symulacji rośnie z czasem rzeczywistym (bez nadrabiania > 0,5 s).
+            self._turbo_allowance = min(self._turbo_allowance + elapsed * rate, max(rate * 0.5, self.time_step))
+
+        started = time.perf_counter()
+        deadline = started + self.turbo_slice
+        exhausted = False
+        while True:
+            if rate is not None and self._turbo_allowance < self.time_step:
+                break
+            if time.perf_counter() >= deadline:
+                exhausted = True
+                break
+            self.simulation.step(self.time_step)
+            self._steps += 1
+            if rate is not None:
+                self._turbo_allowance -= self.time_step
+        self._step_time += time.perf_counter() - started
+        return exhausted
@@ -0,0 +1,99 @@
+"""Spekulatywne przeliczanie sąsiednich scenariuszy w tle.
+
+Po każdym nowym wyniku SUM `SpeculativeSolver` zleca do osobnej puli
+procesów scenariusze różniące się od bieżącej konfiguracji jedną typową
+edycją (`bcmp.scenarios.neighbour_configs`) i zapisuje wyniki w
+`MetricsCache`. Zleceń w locie jest najwyżej dwa na proces, więc nowa
+konfiguracja bazowa (`start`) lub `cancel()` porzuca resztę kolejki bez
+czekania; pula jest odrębna od tej, która liczy bieżącą konfigurację,
+więc spekulacja nigdy nie opóźnia właściwego przeliczenia.
+"""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import Future
+from typing import Dict, Iterator, Sequence, Tuple
+
+from PyQt6.QtCore import QObject, Qt, pyqtSignal
+
+from bcmp.config_schema import NetworkConfig
+from bcmp.scenarios import MetricsCache, neighbour_configs
+from bcmp.solver_pool import SolverPool
+
+
+class SpeculativeSolver(QObject):
+    """Kolejka scenariuszy sąsiednich rozwiązywanych w wolnym czasie.
+
+    - `max_scenarios`: limit scenariuszy na jedną konfigurację bazową,
+    - `max_workers`: liczba procesów puli (domyślnie rdzenie − 1).
+    """
+
+    result_ready = pyqtSignal(str)
+    _done = pyqtSignal(str, object)
+
+    def __init__(
+        self,
+        cache: MetricsCache,
+        max_scenarios: int = 200,
+        max_workers: int | None = None,
+        parent=None,
+    ) -> None:
+        super().__init__(parent)
+        self.cache = cache
+        self.max_scenarios = max_scenarios
+        self.pool = SolverPool(max_workers=max_workers or max(1, (os.cpu_count() or 2) - 1))
+        self.completed = 0
+        self._queue: Iterator[Tuple[str, NetworkConfig]] | None = None
+        self._remaining = 0
+        self._futures: Dict[str, Future] = {}
+        self._done.connect(self._on_done, Qt.ConnectionType.QueuedConnection)
+
+    @property
+    def active(self) -> bool:
+        return bool(self._futures) or self._queue is not None
+
+    def start(self, config: NetworkConfig, node_order: Sequence[str] | None = None) -> None:
+        """Zaczyna spekulację wokół `config` (porzuca poprzednią kolejkę)."""
+
+        self.cancel()
+        self._queue = neighbour_configs(config, node_order)
+        self._remaining = self.max_scenarios
+        self._pump()
+
+    def cancel(self) -> None:
+        self._queue = None
+        for future in self._futures.values():
+            future.cancel()
+        self._futures.clear()
+
+    def shutdown(self) -> None:
+        self.cancel()
+        self.pool.shutdown()
+
+    def _pump(self) -> None:
+        limit = self.pool.max_workers * 2
+        while self._queue is not None and len(self._futures) < limit:
+            if self._remaining <= 0:
+                self._queue = None
+                break
+            try:
+                fingerprint, config = next(self._queue)
+            except StopIteration:
+                self._queue = None
+                break
+            if fingerprint in self.cache or fingerprint in self._futures:
+                continue
+            self._remaining -= 1
+            future = self.pool.submit_background(config)
+            self._futures[fingerprint] = future
+            future.add_done_callback(lambda done, key=fingerprint: self._done.emit(key, done))
+
+    def _on_done(self, fingerprint: str, future: Future) -> None:
+        if self._futures.get(fingerprint) is future:
+            del self._futures[fingerprint]
+        if not future.cancelled() and future.exception() is None:
+            self.cache.put(fingerprint, future.result())
+            self.completed += 1
+            self.result_ready.emit(fingerprint)
+        self._pump()
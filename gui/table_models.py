@@ -0,0 +1,328 @@
+"""Modele tabel Qt oparte na tablicach NumPy.
+
+`ArrayTableModel` przechowuje kolumny etykiet (np. węzeł, klasa) oraz
+macierz wartości liczbowych. Widok (`QTableView`) pyta model tylko o
+widoczne komórki, a przy aktualizacji model porównuje nowe wartości ze
+starymi i emituje `dataChanged` wyłącznie dla zmienionych zakresów
+wierszy – zamiast tworzyć od nowa `QTableWidgetItem` dla każdej komórki.
+
+`RoutingTableModel` pokazuje routing jednej klasy jako listę niezerowych
+krawędzi (`SparseRouting`), doczytywaną porcjami w miarę przewijania.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Callable, ContextManager, Sequence
+
+import numpy as np
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
+
+from bcmp.routing import SparseRouting
+
+
+EditHandler = Callable[[int, int, str], bool]
+
+
+class ArrayTableModel(QAbstractTableModel):
+    """Tabela: `len(label_headers)` kolumn tekstowych + macierz wartości.
+
+    - `value_format`: format wartości (np. "{:.4f}"); NaN wyświetlane jest jako pusta komórka,
+    - `errors`: opcjonalna macierz połówek przedziałów ufności – komórka ma postać „x ± h”,
+    - `editable_columns` / `on_edit`: kolumny wartości edytowalne w widoku; `on_edit(wiersz,
+      kolumna wartości, tekst)` zwraca True, gdy zmiana została przyjęta (przyjęty tekst
+      nieliczbowy, np. pusty, daje pustą komórkę),
+    - `editable_labels` / `on_label_edit`: to samo dla kolumn etykiet (indeks kolumny etykiety).
+    """
+
+    def __init__(
+        self,
+        label_headers: Sequence[str],
+        value_headers: Sequence[str],
+        value_format: str = "{:.4f}",
+        editable_columns: Sequence[int] = (),
+        on_edit: EditHandler | None = None,
+        editable_labels: Sequence[int] = (),
+        on_label_edit: EditHandler | None = None,
+        parent=None,
+    ) -> None:
+        super().__init__(parent)
+        self.label_headers = list(label_headers)
+        self.value_headers = list(value_headers)
+        self.value_format = value_format
+        self.editable_columns = set(editable_columns)
+        self.on_edit = on_edit
+        self.editable_labels = set(editable_labels)
+        self.on_label_edit = on_label_edit
+        self.labels: list[tuple[str, ...]] = []
+        self.values = np.zeros((0, len(self.value_headers)))
+        self.errors: np.ndarray | None = None
+
+    # ------------------------------------------------------------------
+    # Interfejs QAbstractTableModel
+    # ------------------------------------------------------------------
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.labels)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.label_headers) + len(self.value_headers)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            headers = self.label_headers + self.value_headers
+            return headers[section] if section < len(headers) else None
+        return str(section + 1)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role not in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return None
+        row, column = index.row(), index.column()
+        label_count = len(self.label_headers)
+        if column < label_count:
+            return self.labels[row][column]
+
+        value = float(self.values[row, column - label_count])
+        if np.isnan(value):
+            return ""
+        if role == Qt.ItemDataRole.EditRole:
+            return str(value)
+        text = self.value_format.format(value)
+        if self.errors is not None:
+            error = float(self.errors[row, column - label_count])
+            if not np.isnan(error):
+                text += f" ± {self.value_format.format(error)}"
+        return text
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlag:
+        flags = super().flags(index)
+        if index.isValid() and (
+            index.column() in self.editable_labels
+            or index.column() - len(self.label_headers) in self.editable_columns
+        ):
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def setData(self, index: QModelIndex, value, role: int = Qt.ItemDataRole.EditRole) -> bool:
+        if role != Qt.ItemDataRole.EditRole or not index.isValid():
+            return False
+        row, text = index.row(), str(value)
+        column = index.column() - len(self.label_headers)
+        if column < 0:
+            if index.column() not in self.editable_labels or self.on_label_edit is None:
+                return False
+            if not self.on_label_edit(row, index.column(), text):
+                return False
+            label = list(self.labels[row])
+            label[index.column()] = text
+            self.labels[row] = tuple(label)
+        else:
+            if column not in self.editable_columns or self.on_edit is None:
+                return False
+            if not self.on_edit(row, column, text):
+                return False
+            try:
+                self.values[row, column] = float(text)
+            except ValueError:
+                self.values[row, column] = np.nan
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole])
+        return True
+
+    # ------------------------------------------------------------------
+    # Aktualizacja danych
+    # ------------------------------------------------------------------
+    def set_value_headers(self, headers: Sequence[str]) -> None:
+        headers = list(headers)
+        if headers == self.value_headers:
+            return
+        self.beginResetModel()
+        self.value_headers = headers
+        self.values = np.zeros((len(self.labels), len(headers)))
+        self.errors = None
+        self.endResetModel()
+
+    def set_data(
+        self,
+        labels: Sequence[tuple[str, ...]],
+        values: np.ndarray,
+        errors: np.ndarray | None = None,
+    ) -> bool:
+        """Podmienia zawartość; zwraca True, gdy zmienił się układ wierszy (pełny reset modelu)."""
+
+        labels = [tuple(label) for label in labels]
+        values = np.asarray(values, dtype=np.float64).reshape(len(labels), len(self.value_headers))
+        if errors is not None:
+            errors = np.asarray(errors, dtype=np.float64).reshape(values.shape)
+
+        if labels != self.labels or (errors is None) != (self.errors is None):
+            self.beginResetModel()
+            self.labels = labels
+            self.values = values.copy()
+            self.errors = None if errors is None else errors.copy()
+            self.endResetModel()
+            return True
+
+        changed = ~_same(self.values, values)
+        if errors is not None:
+            changed |= ~_same(self.errors, errors)
+            self.errors[:] = errors
+        self.values[:] = values
+        self._emit_changed(changed)
+        return False
+
+    def update_row(self, row: int, values: Sequence[float]) -> None:
+        """Zmienia wartości jednego wiersza (np. z migawki przyrostowej)."""
+
+        values = np.asarray(values, dtype=np.float64)
+        changed = ~_same(self.values[row], values)
+        if not changed.any():
+            return
+        self.values[row] = values
+        columns = np.flatnonzero(changed) + len(self.label_headers)
+        self.dataChanged.emit(self.index(row, int(columns[0])), self.index(row, int(columns[-1])))
+
+    def _emit_changed(self, changed: np.ndarray) -> None:
+        rows = np.flatnonzero(changed.any(axis=1))
+        if rows.shape[0] == 0:
+            return
+        columns = np.flatnonzero(changed.any(axis=0)) + len(self.label_headers)
+        first_column, last_column = int(columns[0]), int(columns[-1])
+        # Spójne ciągi zmienionych wierszy zgłaszane są jednym sygnałem.
+        breaks = np.flatnonzero(np.diff(rows) > 1)
+        starts = np.concatenate(([rows[0]], rows[breaks + 1]))
+        stops = np.concatenate((rows[breaks], [rows[-1]]))
+        for start, stop in zip(starts.tolist(), stops.tolist()):
+            self.dataChanged.emit(self.index(start, first_column), self.index(stop, last_column))
+
+
+class RoutingTableModel(QAbstractTableModel):
+    """Rzadki routing jednej klasy: wiersz = krawędź (z węzła, do węzła, p).
+
+    Widok dostaje wiersze porcjami po `batch_size` (`canFetchMore` /
+    `fetchMore`), więc koszt zależy od liczby obejrzanych krawędzi, a nie od
+    N×N. Zmiana prawdopodobieństwa aktualizuje `SparseRouting` w miejscu;
+    po każdej zmianie emitowany jest `edited(z węzła)`, a walidację
+    wykonuje właściciel modelu – raz dla całej partii zmian. Zmiany routingu
+    wykonywane są pod blokadą `lock` (np. blokadą wątku symulacji, która
+    czyta tę samą macierz).
+    """
+
+    HEADERS = ("Z węzła", "Do węzła", "Prawdopodobieństwo")
+
+    edited = pyqtSignal(str)
+
+    def __init__(
+        self, routing: SparseRouting, batch_size: int = 500, lock: ContextManager | None = None, parent=None
+    ) -> None:
+        super().__init__(parent)
+        self.routing = routing
+        self.lock = lock if lock is not None else threading.RLock()
+        self.batch_size = batch_size
+        self._loaded = min(batch_size, len(routing))
+        self._inserting = False
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._loaded
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return str(section + 1)
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        # Widok może pytać o kolejną porcję w trakcie wstawiania – wtedy odmawiamy.
+        return not parent.isValid() and not self._inserting and self._loaded < len(self.routing)
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()) -> None:
+        if self.canFetchMore(parent):
+            self.ensure_loaded(self._loaded + self.batch_size - 1)
+
+    def ensure_loaded(self, row: int) -> None:
+        """Doczytuje wiersze do `row` włącznie (np. przed przewinięciem do nowej krawędzi)."""
+
+        target = min(row + 1, len(self.routing))
+        if target <= self._loaded:
+            return
+        self._inserting = True
+        try:
+            self.beginInsertRows(QModelIndex(), self._loaded, target - 1)
+            self._loaded = target
+            self.endInsertRows()
+        finally:
+            self._inserting = False
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role not in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return None
+        if index.row() >= len(self.routing):
+            return None
+        entry = self.routing.entries[index.row()]
+        if index.column() == 0:
+            return entry.from_node_id
+        if index.column() == 1:
+            return entry.to_node_id
+        return str(entry.probability)
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlag:
+        flags = super().flags(index)
+        if index.isValid() and index.column() == 2:
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def setData(self, index: QModelIndex, value, role: int = Qt.ItemDataRole.EditRole) -> bool:
+        if role != Qt.ItemDataRole.EditRole or not index.isValid() or index.column() != 2:
+            return False
+        try:
+            probability = float(value)
+        except (TypeError, ValueError):
+            return False
+        if probability < 0:
+            return False
+        entry = self.routing.entries[index.row()]
+        self.set_edge(entry.from_node_id, entry.to_node_id, probability)
+        return True
+
+    def set_edge(self, from_node: str, to_node: str, probability: float) -> int | None:
+        """Ustawia krawędź (0 usuwa ją) i zwraca jej wiersz albo None po usunięciu."""
+
+        existing = self.routing.position(from_node, to_node)
+        if probability == 0.0:
+            if existing is None:
+                return None
+            # Usunięcie przenosi ostatni wpis na miejsce usuniętego, a znika ostatni wiersz.
+            with self.lock:
+                self.routing.set(from_node, to_node, probability)
+            if existing < min(self._loaded, len(self.routing)):
+                self.dataChanged.emit(self.index(existing, 0), self.index(existing, 2))
+            if self._loaded > len(self.routing):
+                self.beginRemoveRows(QModelIndex(), self._loaded - 1, self._loaded - 1)
+                self._loaded -= 1
+                self.endRemoveRows()
+            self.edited.emit(from_node)
+            return None
+
+        with self.lock:
+            position, _ = self.routing.set(from_node, to_node, probability)
+        if position < self._loaded:
+            self.dataChanged.emit(self.index(position, 2), self.index(position, 2))
+        elif position == self._loaded:
+            # Nowa krawędź tuż za wczytanymi wierszami – pokazujemy ją od razu.
+            self.ensure_loaded(position)
+        self.edited.emit(from_node)
+        return position
+
+    def reset(self, routing: SparseRouting) -> None:
+        self.beginResetModel()
+        self.routing = routing
+        self._loaded = min(self.batch_size, len(routing))
+        self.endResetModel()
+
+
+def _same(old: np.ndarray, new: np.ndarray) -> np.ndarray:
+    return (old == new) | (np.isnan(old) & np.isnan(new))